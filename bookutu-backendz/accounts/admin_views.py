@@ -9,8 +9,13 @@ from datetime import datetime, timedelta
 from companies.models import Company, Bus, Driver, CompanySettings
 from trips.models import Route, Trip
 from bookings.models import Booking
+from payments.models import CompanyEarnings
 from accounts.models import User
 from bookutu.models import SystemSettings, Advert
+from bookutu.pagination import InvalidCursor, keyset_page
+from bookutu import metrics, reporting
+from notifications import audit
+from notifications.models import SystemLog
 from .admin_forms import (
     CompanyForm, SystemSettingsForm, SuperUserCreationForm,
     CompanySearchForm, BookingSearchForm, FinancialReportForm
@@ -26,30 +31,8 @@ def admin_dashboard(request):
         messages.error(request, 'Access denied. Super admin privileges required.')
         return redirect('company:dashboard')
     
-    # Calculate statistics
-    today = timezone.now().date()
-    this_month = today.replace(day=1)
-    last_month = (this_month - timedelta(days=1)).replace(day=1)
-    
-    # Platform statistics
-    total_companies = Company.objects.count()
-    active_companies = Company.objects.filter(status='ACTIVE').count()
-    verified_companies = Company.objects.filter(verified_at__isnull=False).count()
-    
-    total_staff = User.objects.filter(user_type='COMPANY_STAFF').count()
-    total_bookings = Booking.objects.count()
-    total_revenue = Booking.objects.filter(
-        status='CONFIRMED'
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Monthly growth
-    new_companies_this_month = Company.objects.filter(
-        created_at__date__gte=this_month
-    ).count()
-    
-    new_bookings_this_month = Booking.objects.filter(
-        created_at__date__gte=this_month
-    ).count()
+    # Platform statistics, one aggregate per table and cached briefly
+    stats = metrics.platform_metrics()
     
     # Recent activities
     recent_companies = Company.objects.order_by('-created_at')[:5]
@@ -57,25 +40,10 @@ def admin_dashboard(request):
         'company', 'trip__route'
     ).order_by('-created_at')[:5]
     
-    # Bus statistics
-    total_buses = Bus.objects.count()
-    active_buses = Bus.objects.filter(status='ACTIVE').count()
-    maintenance_buses = Bus.objects.filter(status='MAINTENANCE').count()
-    
     context = {
-        'total_companies': total_companies,
-        'active_companies': active_companies,
-        'verified_companies': verified_companies,
-        'total_staff': total_staff,
-        'total_bookings': total_bookings,
-        'total_revenue': total_revenue,
-        'new_companies_this_month': new_companies_this_month,
-        'new_bookings_this_month': new_bookings_this_month,
+        **stats,
         'recent_companies': recent_companies,
         'recent_bookings': recent_bookings,
-        'total_buses': total_buses,
-        'active_buses': active_buses,
-        'maintenance_buses': maintenance_buses,
     }
     
     return render(request, 'admin/dashboard.html', context)
@@ -131,14 +99,7 @@ def company_detail(request, company_id):
     company = get_object_or_404(Company, id=company_id)
     
     # Get company statistics
-    total_buses = Bus.objects.filter(company=company).count()
-    active_buses = Bus.objects.filter(company=company, status='ACTIVE').count()
-    total_drivers = Driver.objects.filter(company=company).count()
-    total_routes = Route.objects.filter(company=company).count()
-    total_bookings = Booking.objects.filter(company=company).count()
-    total_revenue = Booking.objects.filter(
-        company=company, status='CONFIRMED'
-    ).aggregate(total=Sum('total_amount'))['total'] or 0
+    stats = metrics.company_metrics(company.id)
     
     # Recent bookings
     recent_bookings = Booking.objects.filter(
@@ -147,12 +108,12 @@ def company_detail(request, company_id):
     
     context = {
         'company': company,
-        'total_buses': total_buses,
-        'active_buses': active_buses,
-        'total_drivers': total_drivers,
-        'total_routes': total_routes,
-        'total_bookings': total_bookings,
-        'total_revenue': total_revenue,
+        'total_buses': stats['total_buses'],
+        'active_buses': stats['active_buses'],
+        'total_drivers': stats['total_drivers'],
+        'total_routes': stats['total_routes'],
+        'total_bookings': stats['total_bookings'],
+        'total_revenue': stats['total_revenue'],
         'recent_bookings': recent_bookings,
     }
     
@@ -198,6 +159,7 @@ def create_company(request):
                 user.save()
                 messages.success(request, f'Initial staff account created: {staff_email}')
 
+            audit.log('COMPANY_CREATED', f'Company "{company.name}" created', request=request, target=company)
             messages.success(request, f'Company "{company.name}" created successfully.')
             return redirect('super_admin:company_detail', company_id=company.id)
     else:
@@ -266,19 +228,33 @@ def admin_bookings(request):
         if date_to:
             bookings = bookings.filter(created_at__date__lte=date_to)
     
-    # Pagination
-    paginator = Paginator(bookings, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: no COUNT(*) or OFFSET over the global booking table
+    try:
+        page_obj = keyset_page(
+            bookings, ['-created_at', '-id'], cursor=request.GET.get('cursor'), page_size=25
+        )
+    except InvalidCursor:
+        page_obj = keyset_page(bookings, ['-created_at', '-id'], page_size=25)
     
     context = {
         'page_obj': page_obj,
         'search_form': search_form,
+        'next_query': _cursor_query(request, page_obj.next_cursor),
+        'previous_query': _cursor_query(request, page_obj.previous_cursor),
     }
     
     return render(request, 'admin/bookings.html', context)
 
 
+def _cursor_query(request, cursor):
+    """Current querystring with the pagination cursor replaced"""
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return params.urlencode()
+
+
 @login_required
 def booking_detail(request, booking_id):
     """View detailed booking information"""
@@ -328,27 +304,33 @@ def admin_financials(request):
             date_from = custom_date_from
             date_to = custom_date_to
     
-    # Calculate financial data
-    bookings = Booking.objects.filter(
-        created_at__date__range=[date_from, date_to],
-        status='CONFIRMED'
-    )
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
     
-    total_revenue = bookings.aggregate(total=Sum('total_amount'))['total'] or 0
-    total_bookings = bookings.count()
+    # Financial data comes from the daily earnings rollups
+    earnings = CompanyEarnings.objects.filter(date__range=[date_from, date_to])
+    
+    totals = earnings.aggregate(
+        revenue=Sum('gross_revenue'),
+        bookings=Sum('total_bookings'),
+        commission=Sum('platform_commission'),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_bookings = totals['bookings'] or 0
+    total_commission = totals['commission'] or 0
     
     # Revenue by company
-    revenue_by_company = bookings.values('company__name').annotate(
-        revenue=Sum('total_amount'),
-        bookings=Count('id')
+    revenue_by_company = earnings.values('company__name').annotate(
+        revenue=Sum('gross_revenue'),
+        bookings=Sum('total_bookings')
     ).order_by('-revenue')
     
-    # Daily revenue for chart
-    daily_revenue = bookings.extra(
-        select={'day': 'date(created_at)'}
-    ).values('day').annotate(
-        revenue=Sum('total_amount')
-    ).order_by('day')
+    # Revenue series for chart, monthly for ranges over a year
+    period = 'day' if (date_to - date_from).days <= 366 else 'month'
+    daily_revenue = reporting.time_series(
+        CompanyEarnings.objects.all(), 'date', date_from, date_to,
+        period=period, metrics={'revenue': Sum('gross_revenue')}
+    )
     
     context = {
         'report_form': report_form,
@@ -356,6 +338,7 @@ def admin_financials(request):
         'date_to': date_to,
         'total_revenue': total_revenue,
         'total_bookings': total_bookings,
+        'total_commission': total_commission,
         'revenue_by_company': revenue_by_company,
         'daily_revenue': daily_revenue,
     }
@@ -365,21 +348,39 @@ def admin_financials(request):
 
 @login_required
 def admin_logs(request):
-    """System logs and audit trail"""
+    """System logs and audit trail, one month at a time"""
     if not request.user.is_superuser:
         messages.error(request, 'Access denied. Super admin privileges required.')
         return redirect('company:dashboard')
     
-    # For now, we'll show recent activities
-    # In a real system, you'd have a proper logging system
-    recent_companies = Company.objects.order_by('-created_at')[:20]
-    recent_bookings = Booking.objects.select_related(
-        'company', 'trip__route'
-    ).order_by('-created_at')[:20]
+    try:
+        month = datetime.strptime(request.GET.get('month', ''), '%Y-%m').date()
+    except ValueError:
+        month = timezone.localdate().replace(day=1)
+    start, end = audit.month_range(month)
+    
+    # Bounded to one month over the created_at index, however large the table
+    logs = SystemLog.objects.filter(
+        created_at__gte=start, created_at__lt=end
+    ).select_related('user')
+    action = request.GET.get('action', '')
+    if action:
+        logs = logs.filter(action=action)
+    
+    try:
+        page_obj = keyset_page(
+            logs, ['-created_at', '-id'], cursor=request.GET.get('cursor'), page_size=50
+        )
+    except InvalidCursor:
+        page_obj = keyset_page(logs, ['-created_at', '-id'], page_size=50)
     
     context = {
-        'recent_companies': recent_companies,
-        'recent_bookings': recent_bookings,
+        'page_obj': page_obj,
+        'month': month,
+        'action': action,
+        'action_choices': SystemLog.ACTION_CHOICES,
+        'next_query': _cursor_query(request, page_obj.next_cursor),
+        'previous_query': _cursor_query(request, page_obj.previous_cursor),
     }
     
     return render(request, 'admin/logs.html', context)
@@ -407,6 +408,13 @@ def admin_settings(request):
         form = SystemSettingsForm(request.POST, instance=settings)
         if form.is_valid():
             form.save()
+            audit.log(
+                'SYSTEM_SETTING_CHANGED',
+                'System settings updated',
+                request=request,
+                target=settings,
+                metadata={'fields': form.changed_data},
+            )
             messages.success(request, 'System settings updated successfully.')
             return redirect('super_admin:admin_settings')
     else:
@@ -537,6 +545,12 @@ def toggle_company_status(request, company_id):
         company.status = 'ACTIVE'
         status = 'activated'
     company.save()
+    audit.log(
+        'COMPANY_SUSPENDED' if company.status == 'INACTIVE' else 'COMPANY_ACTIVATED',
+        f'Company "{company.name}" {status}',
+        request=request,
+        target=company,
+    )
     
     messages.success(request, f'Company "{company.name}" {status} successfully.')
     
@@ -558,6 +572,12 @@ def toggle_company_verification(request, company_id):
         company.verified_at = timezone.now()
         status = 'verified'
     company.save()
+    audit.log(
+        'COMPANY_VERIFIED' if company.verified_at else 'COMPANY_UNVERIFIED',
+        f'Company "{company.name}" {status}',
+        request=request,
+        target=company,
+    )
     
     messages.success(request, f'Company "{company.name}" {status} successfully.')
     
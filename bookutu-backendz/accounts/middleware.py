@@ -1,9 +1,19 @@
+import contextlib
+import logging
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 from django.http import HttpResponseForbidden
 from django.urls import resolve
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class TenantMiddleware(MiddlewareMixin):
@@ -121,3 +131,88 @@ class SecurityMiddleware(MiddlewareMixin):
             return 'TABLET'
         else:
             return 'WEB'
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its QUERY_BUDGETS entry allows"""
+
+
+class QueryProfilerMiddleware:
+    """
+    Opt-in per-request profiling of database queries and latency.
+
+    Records the number of queries, repeated queries (same SQL and parameters),
+    time spent in the database and total latency of each request. They are
+    returned in X-DB-* and Server-Timing headers and logged for a sample of
+    requests. QUERY_BUDGETS caps the queries of a view by its URL name; going
+    over logs a warning, or raises QueryBudgetExceeded when QUERY_BUDGET_STRICT
+    is on, as it is in tests.
+
+    With QUERY_PROFILER_ENABLED off the middleware removes itself from the
+    stack at startup and costs nothing per request. Queries made while a
+    streaming response is iterated are not counted.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def profile(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append((sql, _freeze(params), time.perf_counter() - start))
+
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        db_ms = sum(duration for _, _, duration in queries) * 1000
+        duplicates = sum(n - 1 for n in Counter((sql, params) for sql, params, _ in queries).values())
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path_info
+
+        response['X-DB-Queries'] = str(len(queries))
+        response['X-DB-Duplicate-Queries'] = str(duplicates)
+        response['X-DB-Time-Ms'] = f'{db_ms:.1f}'
+        response['X-Response-Time-Ms'] = f'{total_ms:.1f}'
+        response['Server-Timing'] = f'db;dur={db_ms:.1f}, total;dur={total_ms:.1f}'
+
+        if random.random() < getattr(settings, 'QUERY_PROFILER_LOG_SAMPLE_RATE', 0.0):
+            logger.info(
+                f"{request.method} {view_name} {response.status_code}: {len(queries)} queries "
+                f"({duplicates} duplicate) in {db_ms:.1f}ms, total {total_ms:.1f}ms"
+            )
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and len(queries) > budget:
+            repeated = Counter(sql for sql, _, _ in queries).most_common(1)[0]
+            message = (
+                f"{view_name} ran {len(queries)} queries, over its budget of {budget}; "
+                f"most repeated ({repeated[1]}x): {repeated[0]}"
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+def _freeze(params):
+    """Hashable form of query parameters, for spotting repeated queries"""
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze(p) for p in params)
+    if isinstance(params, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in params.items()))
+    try:
+        hash(params)
+    except TypeError:
+        return repr(params)
+    return params
@@ -12,7 +12,7 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
 from .serializers import (
     CustomTokenObtainPairSerializer, UserRegistrationSerializer,
@@ -24,6 +24,7 @@ from api.serializers import MobileRegisterSerializer, MobileLoginSerializer
 from .permissions import IsOwnerOrReadOnly, IsSuperAdmin
 from .models import PasswordResetToken, UserSession
 from .forms import LoginForm, CompanyRegistrationForm
+from notifications.delivery import queue_email
 import uuid
 from datetime import timedelta
 
@@ -245,21 +246,22 @@ class PasswordResetRequestView(APIView):
             token = str(uuid.uuid4())
             expires_at = timezone.now() + timedelta(hours=24)
 
-            PasswordResetToken.objects.create(
-                user=user,
-                token=token,
-                expires_at=expires_at
-            )
+            with transaction.atomic():
+                PasswordResetToken.objects.create(
+                    user=user,
+                    token=token,
+                    expires_at=expires_at
+                )
 
-            # Send password reset email
-            self.send_password_reset_email(user, token)
+                # Queue the password reset email with the token it carries
+                self.send_password_reset_email(user, token)
 
             return Response({'message': 'Password reset email sent.'})
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def send_password_reset_email(self, user, token):
-        """Send password reset email"""
+        """Queue password reset email"""
         subject = 'Password Reset - Bookutu'
         message = f'''
         Hi {user.first_name},
@@ -276,13 +278,7 @@ class PasswordResetRequestView(APIView):
         Bookutu Team
         '''
 
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
+        queue_email(user.email, subject, message, 'PASSWORD_RESET')
 
 
 class PasswordResetConfirmView(APIView):
@@ -0,0 +1,133 @@
+import datetime
+from unittest import mock
+
+from celery.signals import task_postrun
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from companies.models import Company
+from notifications import audit
+from notifications.models import SystemLog
+
+User = get_user_model()
+
+
+@override_settings(AUDIT_LOG_BUFFER_SIZE=3, AUDIT_LOG_FLUSH_SECONDS=60)
+class AuditLogTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(audit, "buffer", audit.AuditBuffer())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_superuser("audit-admin@example.com", "pass1234")
+        self.company = Company.objects.create(
+            name="Audit Co",
+            email="audit@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-AUD",
+            license_number="LIC-AUD",
+            status="ACTIVE",
+        )
+
+    def _request(self):
+        request = RequestFactory().post(
+            "/admin/companies/1/toggle-status/",
+            HTTP_X_FORWARDED_FOR="41.210.1.1, 10.0.0.1",
+            HTTP_USER_AGENT="pytest",
+        )
+        request.user = self.admin
+        return request
+
+    def test_events_are_buffered_and_written_in_bulk(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.log("COMPANY_SUSPENDED", "Suspended", request=self._request(), target=self.company)
+            audit.log("COMPANY_VERIFIED", "Verified", user=self.admin, target=self.company)
+        self.assertEqual(len(audit.buffer), 2)
+        self.assertFalse(SystemLog.objects.exists())
+
+        # A rolled back action is never logged
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    audit.log("COMPANY_CREATED", "Rolled back")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(len(audit.buffer), 2)
+
+        # The third event fills the buffer and flushes it with one INSERT
+        with self.assertNumQueries(1):
+            with self.captureOnCommitCallbacks(execute=True):
+                audit.log("PAYMENT_PROCESSED", "Payout", user=self.admin)
+        self.assertEqual(len(audit.buffer), 0)
+
+        log = SystemLog.objects.get(action="COMPANY_SUSPENDED")
+        self.assertEqual(log.user, self.admin)
+        self.assertEqual((log.target_model, log.target_id), ("Company", self.company.id))
+        self.assertEqual(log.ip_address, "41.210.1.1")
+        self.assertEqual(log.user_agent, "pytest")
+        self.assertEqual(log.metadata, {"method": "POST", "path": "/admin/companies/1/toggle-status/"})
+
+    def test_failed_flush_is_retried_and_tasks_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.log("COMPANY_CREATED", "First", user=self.admin)
+            audit.log("COMPANY_VERIFIED", "Second", user=self.admin)
+        with mock.patch.object(SystemLog.objects, "bulk_create", side_effect=RuntimeError("db down")):
+            self.assertEqual(audit.buffer.flush(), 0)
+        self.assertEqual(len(audit.buffer), 2)
+
+        # Events written by a Celery task are flushed when it finishes
+        task_postrun.send(sender=None)
+        self.assertEqual(
+            list(SystemLog.objects.order_by("id").values_list("description", flat=True)),
+            ["First", "Second"],
+        )
+
+        # An outage keeps at most MAX_BUFFERED_BATCHES batches, newest first
+        with mock.patch.object(audit, "MAX_BUFFERED_BATCHES", 1), \
+                mock.patch.object(SystemLog.objects, "bulk_create", side_effect=RuntimeError("db down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(4):
+                    audit.log("COMPANY_CREATED", f"Event {i}", user=self.admin)
+        self.assertEqual([event.description for event in audit.buffer._events], ["Event 1", "Event 2", "Event 3"])
+
+    def test_flush_on_age_and_month_view(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.log("COMPANY_CREATED", "Created", user=self.admin, target=self.company)
+        audit.flush_if_due()
+        self.assertFalse(SystemLog.objects.exists())
+        with override_settings(AUDIT_LOG_FLUSH_SECONDS=0):
+            audit.flush_if_due()
+        self.assertEqual(SystemLog.objects.count(), 1)
+
+        SystemLog.objects.create(
+            action="COMPANY_VERIFIED",
+            description="Last year",
+            created_at=timezone.now() - datetime.timedelta(days=400),
+        )
+        self.client.force_login(self.admin)
+        response = self.client.get("/admin/logs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log.description for log in response.context["page_obj"]], ["Created"])
+
+        response = self.client.get("/admin/logs/", {"action": "COMPANY_VERIFIED"})
+        self.assertEqual(list(response.context["page_obj"]), [])
+
+    def test_prune_drops_months_past_retention(self):
+        now = timezone.make_aware(datetime.datetime(2026, 3, 15, 12, 0))
+        for days_ago in (0, 30, 45, 80):
+            SystemLog.objects.create(
+                action="COMPANY_CREATED",
+                description=f"{days_ago} days ago",
+                created_at=now - datetime.timedelta(days=days_ago),
+            )
+        with override_settings(AUDIT_LOG_RETENTION_MONTHS=2), mock.patch.object(audit, "PRUNE_BATCH_SIZE", 1):
+            self.assertEqual(audit.prune(now), 2)
+        self.assertEqual(
+            sorted(SystemLog.objects.values_list("description", flat=True)),
+            ["0 days ago", "30 days ago"],
+        )
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+from bookutu import settings_cache
+from companies.models import Company, Bus, CompanySettings
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class BookingSerializerQueryTests(TestCase):
+    def setUp(self):
+        settings_cache.clear()
+        self.company = Company.objects.create(
+            name="Lister Co",
+            email="lister@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-LIST",
+            license_number="LIC-LIST",
+            status="ACTIVE",
+        )
+        CompanySettings.objects.create(company=self.company, cancellation_hours=24)
+        self.staff = User.objects.create_user(
+            email="lister-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.passenger = User.objects.create_passenger(
+            email="lister-passenger@example.com", password="pass1234"
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-MBL",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Mbale",
+            destination_terminal="Main",
+            distance_km=230,
+            estimated_duration_hours=4,
+            base_fare=30000,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _book_trip(self, plate, days_ahead, count):
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate=plate,
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        trip = Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=bus,
+            departure_date=(timezone.now() + timezone.timedelta(days=days_ahead)).date(),
+            departure_time=timezone.datetime(2000, 1, 1, 9, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+            base_fare=30000,
+            available_seats=8,
+        )
+        for seat in bus.seats.all()[:count]:
+            Booking.objects.create(
+                trip=trip,
+                passenger=self.passenger,
+                seat=seat,
+                status="CONFIRMED",
+                passenger_name="Passenger",
+                passenger_phone="0700000002",
+                base_fare=30000,
+                total_amount=30000,
+            )
+        return trip
+
+    def _list_queries(self):
+        settings_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get("/api/v1/bookings/", {"page_size": 50})
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), res.json()["results"]
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        self._book_trip("ULS001L", 5, 2)
+        small, _ = self._list_queries()
+
+        self._book_trip("ULS002L", 6, 8)
+        self._book_trip("ULS003L", 7, 8)
+        large, rows = self._list_queries()
+
+        self.assertEqual(len(rows), 18)
+        self.assertEqual(small, large)
+
+    def test_cancellation_terms_follow_company_policy(self):
+        soon = self._book_trip("ULS004L", 0, 1)
+        Trip.objects.filter(pk=soon.pk).update(
+            departure_time=(timezone.now() + timezone.timedelta(hours=2)).time()
+        )
+        self._book_trip("ULS005L", 5, 1)
+
+        data = BookingSerializer(
+            BookingSerializer.setup_eager_loading(Booking.objects.order_by("trip__departure_date")),
+            many=True,
+        ).data
+        self.assertEqual(
+            [(row["can_cancel"], row["cancellation_fee"]) for row in data],
+            [(False, 3000.0), (True, 0.0)],
+        )
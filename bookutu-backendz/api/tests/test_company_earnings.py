@@ -0,0 +1,199 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from bookings.models import Booking
+from companies.models import Company, Bus
+from payments import earnings
+from payments.models import CompanyEarnings, Payment, Refund
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class CompanyEarningsRollupTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Earner Co",
+            email="earner@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-EARN",
+            license_number="LIC-EARN",
+            status="ACTIVE",
+            commission_rate=Decimal("10.00"),
+        )
+        self.passenger = User.objects.create_passenger(
+            email="earner-passenger@example.com", password="pass1234"
+        )
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-GUL",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Gulu",
+            destination_terminal="Main",
+            distance_km=330,
+            estimated_duration_hours=5,
+            base_fare=40000,
+        )
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UER001E",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.trip = trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=timezone.now().date() + timezone.timedelta(days=3),
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+            base_fare=40000,
+            available_seats=8,
+        )
+        self.bookings = [
+            Booking.objects.create(
+                trip=trip,
+                passenger=self.passenger,
+                seat=seat,
+                status="CONFIRMED",
+                passenger_name="Passenger",
+                passenger_phone="0700000002",
+                base_fare=40000,
+                total_amount=40000,
+            )
+            for seat in bus.seats.all()[:3]
+        ]
+        self.today = timezone.localdate()
+
+    def _pay(self, booking, method, status="COMPLETED", amount=40000):
+        return Payment.objects.create(
+            booking=booking,
+            user=self.passenger,
+            amount=amount,
+            payment_method=method,
+            status=status,
+            completed_at=timezone.now() if status == "COMPLETED" else None,
+        )
+
+    def test_completed_payments_and_refunds_update_the_day(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._pay(self.bookings[0], "CASH")
+            self._pay(self.bookings[1], "MOBILE_MONEY")
+            self._pay(self.bookings[2], "CARD", status="PENDING")
+
+        row = CompanyEarnings.objects.get(company=self.company, date=self.today)
+        self.assertEqual(row.total_bookings, 2)
+        self.assertEqual(row.gross_revenue, Decimal("80000"))
+        self.assertEqual(row.platform_commission, Decimal("8000"))
+        self.assertEqual(row.net_earnings, Decimal("72000"))
+        self.assertEqual(row.cash_payments, Decimal("40000"))
+        self.assertEqual(row.mobile_money_payments, Decimal("40000"))
+        self.assertEqual(row.card_payments, 0)
+
+        cash = Payment.objects.get(booking=self.bookings[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            Refund.objects.create(
+                payment=cash,
+                booking=cash.booking,
+                amount=10000,
+                reason="Cancelled",
+                status="COMPLETED",
+                completed_at=timezone.now(),
+            )
+
+        row.refresh_from_db()
+        self.assertEqual(row.gross_revenue, Decimal("70000"))
+        self.assertEqual(row.cash_payments, Decimal("30000"))
+        self.assertEqual(row.net_earnings, Decimal("63000"))
+
+    def test_booking_paid_in_two_methods_counts_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._pay(self.bookings[0], "MOBILE_MONEY", amount=15000)
+            self._pay(self.bookings[0], "CASH", amount=25000)
+
+        row = CompanyEarnings.objects.get(company=self.company, date=self.today)
+        self.assertEqual(row.total_bookings, 1)
+        self.assertEqual(row.gross_revenue, Decimal("40000"))
+        self.assertEqual(earnings.compute_rows()[0].total_bookings, 1)
+
+    def test_repeated_events_do_not_double_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = self._pay(self.bookings[0], "CASH")
+            payment.save()
+            payment.save()
+
+        row = CompanyEarnings.objects.get(company=self.company)
+        self.assertEqual(row.gross_revenue, Decimal("40000"))
+
+    def test_backfill_command_rebuilds_history(self):
+        # Bulk writes skip signals, as in imported history
+        Payment.objects.bulk_create([
+            Payment(
+                payment_reference=f"PAYBULK{i}",
+                company=self.company,
+                booking=booking,
+                user=self.passenger,
+                amount=40000,
+                payment_method="CARD",
+                status="COMPLETED",
+                completed_at=timezone.now() - timezone.timedelta(days=i),
+            )
+            for i, booking in enumerate(self.bookings)
+        ])
+        CompanyEarnings.objects.create(
+            company=self.company, date=self.today - timezone.timedelta(days=10),
+            gross_revenue=999,
+        )
+        self.assertFalse(CompanyEarnings.objects.filter(date=self.today).exists())
+
+        call_command("rebuild_company_earnings", stdout=StringIO())
+
+        rows = CompanyEarnings.objects.filter(company=self.company).order_by("date")
+        self.assertEqual(
+            [(row.date, row.card_payments) for row in rows],
+            [
+                (self.today - timezone.timedelta(days=2), Decimal("40000")),
+                (self.today - timezone.timedelta(days=1), Decimal("40000")),
+                (self.today, Decimal("40000")),
+            ],
+        )
+        self.assertEqual(earnings.rebuild(), (3, 0))
+
+    def test_trip_detail_shows_trip_revenue(self):
+        other = Company.objects.create(
+            name="Other Co",
+            email="other-earner@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-EARN2",
+            license_number="LIC-EARN2",
+            status="ACTIVE",
+        )
+        CompanyEarnings.objects.create(company=self.company, date=self.today, gross_revenue=999999)
+        CompanyEarnings.objects.create(company=other, date=self.today, gross_revenue=5)
+        Booking.objects.filter(id=self.bookings[2].id).update(status="CANCELLED")
+        staff = User.objects.create_user(
+            email="earner-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.client.force_login(staff)
+
+        response = self.client.get(f"/company/trips/{self.trip.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_revenue"], Decimal("80000"))
+        self.assertEqual(response.context["confirmed_bookings"], 2)
@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from bookutu.models import Advert
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name="Etag Co",
+            email="etag@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-ETAG",
+            license_number="LIC-ETAG",
+            status="ACTIVE",
+        )
+        self.bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UET001E",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-FPT",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Fort Portal",
+            destination_terminal="Main",
+            distance_km=300,
+            estimated_duration_hours=5,
+            base_fare=35000,
+        )
+        self.trip = Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=self.bus,
+            departure_date=(timezone.now() + timezone.timedelta(days=2)).date(),
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+            base_fare=35000,
+            available_seats=8,
+        )
+
+    def _revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_public_trips_not_modified_until_trip_changes(self):
+        first = self.client.get("/api/trips/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(1):
+            again = self._revalidate("/api/trips/", first)
+        self.assertEqual(again.status_code, 304)
+
+        self.route.name = "Kampala - Fort Portal"
+        self.route.save()
+        changed = self._revalidate("/api/trips/", first)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_seat_map_etag_follows_bookings(self):
+        url = f"/api/trips/{self.trip.id}/seats/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._revalidate(url, first).status_code, 304)
+
+        passenger = User.objects.create_passenger(email="etag-passenger@example.com", password="pass1234")
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                trip=self.trip,
+                passenger=passenger,
+                seat=self.bus.seats.first(),
+                passenger_name="Passenger",
+                passenger_phone="0700000002",
+                base_fare=35000,
+                total_amount=35000,
+            )
+        changed = self._revalidate(url, first)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_adverts_not_modified(self):
+        Advert.objects.create(title="Promo", image="adverts/promo.png")
+        first = self.client.get("/api/adverts/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self._revalidate("/api/adverts/", first).status_code, 304)
+
+        Advert.objects.create(title="Second", image="adverts/second.png")
+        self.assertEqual(self._revalidate("/api/adverts/", first).status_code, 200)
+
+    def test_deletion_is_not_hidden_by_if_modified_since(self):
+        Advert.objects.create(title="Promo", image="adverts/promo.png")
+        second = Advert.objects.create(title="Second", image="adverts/second.png")
+        first = self.client.get("/api/adverts/")
+        second.delete()
+
+        # Last-Modified cannot move back for a deletion; the ETag changes
+        response = self.client.get("/api/adverts/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._revalidate("/api/adverts/", first).status_code, 200)
+        self.assertEqual(
+            self.client.get("/api/adverts/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304
+        )
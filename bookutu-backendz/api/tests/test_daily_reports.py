@@ -0,0 +1,134 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from bookings import daily_reports
+from bookings.models import Booking
+from bookings.tasks import generate_daily_booking_report
+from companies.models import Company, Bus
+from notifications import delivery
+from notifications.models import Notification
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class DailyReportTests(TestCase):
+    def setUp(self):
+        self.day = timezone.localdate() - datetime.timedelta(days=1)
+        self.passenger = User.objects.create_passenger(
+            email="report-passenger@example.com", password="pass1234"
+        )
+        self.companies = [self._company(i) for i in range(3)]
+        self.companies[2].status = "SUSPENDED"
+        self.companies[2].save()
+
+        trip = self._trip(self.companies[0])
+        seats = list(trip.bus.seats.all())
+        self._book(trip, seats[0], "CONFIRMED", "DIRECT", self.day)
+        self._book(trip, seats[1], "CONFIRMED", "MOBILE_APP", self.day)
+        self._book(trip, seats[2], "CANCELLED", "MOBILE_APP", self.day)
+        self._book(trip, seats[3], "CONFIRMED", "DIRECT", self.day + datetime.timedelta(days=1))
+
+    def _company(self, i):
+        return Company.objects.create(
+            name=f"Report Co {i}",
+            email=f"report{i}@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number=f"REG-RPT{i}",
+            license_number=f"LIC-RPT{i}",
+            status="ACTIVE",
+        )
+
+    def _trip(self, company):
+        route = Route.objects.create(
+            company=company,
+            name="KLA-MBR",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Mbarara",
+            destination_terminal="Main",
+            distance_km=270,
+            estimated_duration_hours=4,
+            base_fare=30000,
+        )
+        bus = Bus.objects.create(
+            company=company,
+            license_plate="URP001R",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        return Trip.objects.create(
+            company=company,
+            route=route,
+            bus=bus,
+            departure_date=self.day + datetime.timedelta(days=3),
+            departure_time=datetime.time(8, 0),
+            arrival_time=datetime.time(12, 0),
+            base_fare=30000,
+            available_seats=8,
+        )
+
+    def _book(self, trip, seat, status, source, day):
+        booking = Booking.objects.create(
+            trip=trip,
+            passenger=self.passenger,
+            seat=seat,
+            status=status,
+            source=source,
+            passenger_name="Passenger",
+            passenger_phone="0700000002",
+            base_fare=30000,
+            total_amount=30000,
+        )
+        # Just after local midnight, the first moment of the day
+        created = timezone.make_aware(datetime.datetime.combine(day, datetime.time(0, 30)))
+        Booking.objects.filter(id=booking.id).update(created_at=created)
+
+    def test_figures_for_all_companies_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(daily_reports.daily_figures(self.day))
+        self.assertEqual([row["id"] for row in rows], [c.id for c in self.companies[:2]])
+        self.assertEqual(
+            {key: rows[0][key] for key in (
+                "total_bookings", "confirmed_bookings", "cancelled_bookings",
+                "total_revenue", "direct_bookings", "online_bookings",
+            )},
+            {
+                "total_bookings": 3,
+                "confirmed_bookings": 2,
+                "cancelled_bookings": 1,
+                "total_revenue": Decimal("60000.00"),
+                "direct_bookings": 1,
+                "online_bookings": 2,
+            },
+        )
+        self.assertEqual(rows[1]["total_bookings"], 0)
+        self.assertIn("Total Revenue: UGX 0.00", daily_reports.render_report(rows[1], self.day)[1])
+
+    def test_reports_are_queued_once_per_company_and_day(self):
+        with mock.patch("notifications.tasks.drain_outbox.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(daily_reports.queue_daily_reports(), 2)
+            self.assertEqual(daily_reports.queue_daily_reports(self.day), 0)
+            generate_daily_booking_report(self.companies[0].id, self.day.isoformat())
+        self.assertEqual(Notification.objects.filter(kind="REPORT").count(), 2)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open") as opened:
+            self.assertEqual(delivery.drain("EMAIL"), (2, False))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["report0@example.com", "report1@example.com"],
+        )
+        self.assertIn("- Confirmed: 2", mail.outbox[0].body)
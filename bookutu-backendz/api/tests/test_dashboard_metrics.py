@@ -0,0 +1,155 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookutu import metrics
+from companies.models import Company, Bus, Driver
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(
+            name="Metrics Co",
+            email="metrics@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-MET",
+            license_number="LIC-MET",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="metrics-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UMT001M",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=10,
+        )
+        Bus.objects.create(
+            company=self.company,
+            license_plate="UMT002M",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=10,
+            status="MAINTENANCE",
+        )
+        Driver.objects.create(
+            company=self.company,
+            first_name="Dan",
+            last_name="Driver",
+            phone_number="0700000001",
+            license_number="DL-MET",
+            license_expiry_date=timezone.now().date() + timezone.timedelta(days=365),
+            date_of_birth="1990-01-01",
+            hire_date="2020-01-01",
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-JJA",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Jinja",
+            destination_terminal="Main",
+            distance_km=80,
+            estimated_duration_hours=1,
+            base_fare=10000,
+        )
+        self.today = timezone.now().date()
+        self.hour = 5
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _trip(self, days, status="SCHEDULED"):
+        self.hour += 1
+        trip = Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=self.bus,
+            departure_date=self.today + timezone.timedelta(days=days),
+            departure_time=timezone.datetime(2000, 1, 1, self.hour, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, self.hour, 30).time(),
+            base_fare=10000,
+            available_seats=10,
+        )
+        Trip.objects.filter(pk=trip.pk).update(status=status)
+        return trip
+
+    def test_company_metrics_values_and_query_count(self):
+        self._trip(0)
+        self._trip(2)
+        self._trip(-2, status="COMPLETED")
+        self._trip(-1, status="CANCELLED")
+
+        # One aggregate each for bookings, buses, routes, trips and drivers
+        with self.assertNumQueries(5):
+            stats = metrics.company_metrics(self.company.id)
+
+        self.assertEqual(stats["total_trips"], 4)
+        self.assertEqual(stats["scheduled_trips"], 2)
+        self.assertEqual(stats["completed_trips"], 1)
+        self.assertEqual(stats["cancelled_trips"], 1)
+        self.assertEqual(stats["today_trips"], 1)
+        self.assertEqual(stats["total_buses"], 2)
+        self.assertEqual(stats["active_buses"], 1)
+        self.assertEqual(
+            stats["fleet_status"],
+            [{"status": "ACTIVE", "count": 1}, {"status": "MAINTENANCE", "count": 1}],
+        )
+        self.assertEqual(stats["active_routes"], 1)
+        self.assertEqual(stats["total_drivers"], 1)
+        self.assertEqual(stats["total_bookings"], 0)
+        self.assertEqual(stats["monthly_revenue"], 0)
+
+        with self.assertNumQueries(0):
+            metrics.company_metrics(self.company.id)
+
+    def test_periods_use_the_local_day(self):
+        # 01:30 in Kampala is still the previous day in UTC
+        now = timezone.make_aware(timezone.datetime(2026, 3, 1, 1, 30))
+        utc_now = now.astimezone(datetime.timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=utc_now):
+            today, today_start, month_start = metrics._periods()
+        self.assertEqual(today, now.date())
+        self.assertEqual(today_start, now.replace(hour=0, minute=0))
+        self.assertEqual(month_start, today_start)
+
+    def test_stale_entry_is_served_while_another_request_recomputes(self):
+        metrics.cached_metrics("probe", lambda: 1, ttl=60)
+        with mock.patch("bookutu.metrics.time.time", return_value=timezone.now().timestamp() + 120):
+            # Another process holds the refresh lock: the stale value is served
+            cache.add("metrics_lock:probe", 1)
+            self.assertEqual(metrics.cached_metrics("probe", lambda: 2, ttl=60), 1)
+            cache.delete("metrics_lock:probe")
+            self.assertEqual(metrics.cached_metrics("probe", lambda: 2, ttl=60), 2)
+
+    def test_trip_dashboard_stats_endpoint(self):
+        self._trip(0)
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get("/api/v1/trips/dashboard/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["today_trips"], 1)
+        self.assertEqual(response.data["active_routes"], 1)
+
+        with CaptureQueriesContext(connection) as second:
+            self.client.get("/api/v1/trips/dashboard/stats/")
+        self.assertLess(len(second), len(first))
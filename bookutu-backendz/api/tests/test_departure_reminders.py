@@ -0,0 +1,134 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookings import reminders
+from bookings.models import Booking
+from companies.models import Company, Bus
+from notifications import delivery, sms
+from notifications.models import Notification
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class HalfFailingSmsBackend(sms.BaseSmsBackend):
+    def send(self, to, message):
+        if to.endswith("1"):
+            raise sms.SmsError("rejected", retryable=False)
+        return f"ok-{to}"
+
+
+@override_settings(SMS_BACKEND="notifications.sms.LocMemSmsBackend", REMINDER_WINDOW_HOURS=24)
+class DepartureReminderTests(TestCase):
+    def setUp(self):
+        sms.outbox.clear()
+        self.now = timezone.now().replace(microsecond=0)
+        self.company = Company.objects.create(
+            name="Reminder Co",
+            email="reminder@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-REM",
+            license_number="LIC-REM",
+            status="ACTIVE",
+        )
+        self.passenger = User.objects.create_passenger(
+            email="reminder-passenger@example.com", password="pass1234"
+        )
+        self.soon = self._trip("UREM01R", self.now + datetime.timedelta(hours=3))
+        self.later = self._trip("UREM02R", self.now + datetime.timedelta(hours=30))
+        self.bookings = [
+            self._book(self.soon, 0, "CONFIRMED", "0700000011"),
+            self._book(self.soon, 1, "CONFIRMED", "0700000012"),
+            self._book(self.soon, 2, "CANCELLED", "0700000013"),
+            self._book(self.later, 0, "CONFIRMED", "0700000014"),
+        ]
+
+    def _trip(self, plate, departs_at):
+        departs_at = timezone.localtime(departs_at)
+        route = Route.objects.create(
+            company=self.company,
+            name=plate,
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city=f"Town {plate}",
+            destination_terminal="Main",
+            distance_km=130,
+            estimated_duration_hours=2,
+            base_fare=20000,
+        )
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate=plate,
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        return Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=departs_at.date(),
+            departure_time=departs_at.time(),
+            arrival_time=(departs_at + datetime.timedelta(hours=2)).time(),
+            base_fare=20000,
+            available_seats=8,
+        )
+
+    def _book(self, trip, seat_index, status, phone):
+        return Booking.objects.create(
+            trip=trip,
+            passenger=self.passenger,
+            seat=trip.bus.seats.all()[seat_index],
+            status=status,
+            passenger_name="Passenger",
+            passenger_phone=phone,
+            base_fare=20000,
+            total_amount=20000,
+        )
+
+    def test_sweep_selects_due_bookings_in_one_query(self):
+        with self.assertNumQueries(1):
+            due = reminders.due_reminders(self.now)
+        self.assertEqual(
+            [row["id"] for row, _ in due], [self.bookings[0].id, self.bookings[1].id]
+        )
+        self.assertIn("Your trip is in 3 hours!", reminders.render_reminder(*due[0], self.now))
+
+    def test_sweep_queues_each_reminder_once(self):
+        with mock.patch("notifications.tasks.drain_outbox.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(reminders.send_departure_reminders(self.now, batch_size=1), 2)
+        self.assertEqual(delay.call_count, 2)
+        self.bookings[0].refresh_from_db()
+        self.assertEqual(self.bookings[0].reminder_sent_at, self.now)
+
+        self.assertEqual(delivery.drain("SMS"), (2, False))
+        self.assertEqual(
+            sorted(to for to, _ in sms.outbox), ["0700000011", "0700000012"]
+        )
+        self.assertEqual(
+            Notification.objects.filter(kind="REMINDER", status="SENT").count(), 2
+        )
+
+        # Later runs skip bookings already reminded
+        self.assertEqual(reminders.send_departure_reminders(), 0)
+
+    @override_settings(SMS_BACKEND="api.tests.test_departure_reminders.HalfFailingSmsBackend")
+    def test_batch_records_each_outcome(self):
+        for phone in ("0700000021", "0700000022"):
+            Notification.objects.create(kind="REMINDER", recipient=phone, message="Hi")
+        self.assertEqual(delivery.drain("SMS"), (1, False))
+        self.assertEqual(
+            list(Notification.objects.order_by("id").values_list("status", "provider_reference")),
+            [("DEAD", ""), ("SENT", "ok-0700000022")],
+        )
+        # Nothing left to send again
+        self.assertEqual(delivery.drain("SMS"), (0, False))
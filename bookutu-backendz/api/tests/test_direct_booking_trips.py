@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, SeatReservation
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class DirectBookingTripsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Counter Co",
+            email="counter@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-CTR",
+            license_number="LIC-CTR",
+            status="ACTIVE",
+        )
+        self.clerk = User.objects.create_user(
+            email="counter-clerk@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-HMA",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Hoima",
+            destination_terminal="Main",
+            distance_km=200,
+            estimated_duration_hours=4,
+            base_fare=25000,
+        )
+        self.day = (timezone.now() + timezone.timedelta(days=3)).date()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.clerk)
+
+    def _trip(self, plate, hour, booked=0):
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate=plate,
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=4,
+        )
+        trip = Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=bus,
+            departure_date=self.day,
+            departure_time=timezone.datetime(2000, 1, 1, hour, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, hour + 4, 0).time(),
+            base_fare=25000,
+            available_seats=4,
+        )
+        Trip.objects.filter(pk=trip.pk).update(booked_seats=booked)
+        return trip
+
+    def _get(self, **params):
+        params.update(route_id=self.route.id, departure_date=self.day.isoformat())
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get("/api/v1/bookings/direct/trips/", params)
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), res.json()["trips"]
+
+    def test_full_trips_filtered_in_sql_with_fixed_queries(self):
+        self._trip("UCT001C", 6)
+        few, _ = self._get()
+
+        self._trip("UCT002C", 8, booked=4)
+        self._trip("UCT003C", 10, booked=1)
+        self._trip("UCT004C", 12)
+        many, trips = self._get()
+
+        self.assertEqual(few, many)
+        self.assertEqual([trip["available_seats"] for trip in trips], [4, 3, 4])
+
+    def test_occupancy_summary(self):
+        trip = self._trip("UCT005C", 7, booked=1)
+        passenger = User.objects.create_passenger(email="counter-passenger@example.com", password="pass1234")
+        seats = list(trip.bus.seats.all())
+        Booking.objects.create(
+            trip=trip,
+            passenger=passenger,
+            seat=seats[0],
+            passenger_name="Passenger",
+            passenger_phone="0700000002",
+            base_fare=25000,
+            total_amount=25000,
+        )
+        SeatReservation.objects.create(trip=trip, seat=seats[1], user=passenger)
+
+        _, trips = self._get(occupancy="true")
+        self.assertEqual(
+            trips[0]["occupancy"],
+            {"confirmed": 1, "pending": 1, "held": 1, "occupancy_percentage": 25.0},
+        )
+        _, trips = self._get()
+        self.assertNotIn("occupancy", trips[0])
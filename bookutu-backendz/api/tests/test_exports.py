@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from companies.models import Company, Bus
+from payments.models import Payment
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Export Co",
+            email="export@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-EXP",
+            license_number="LIC-EXP",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="export-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.passenger = User.objects.create_passenger(
+            email="export-passenger@example.com", password="pass1234"
+        )
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-MSK",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Masaka",
+            destination_terminal="Main",
+            distance_km=130,
+            estimated_duration_hours=2,
+            base_fare=20000,
+        )
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UEX001E",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=timezone.localdate() + timezone.timedelta(days=2),
+            departure_time=timezone.datetime(2000, 1, 1, 9, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 11, 0).time(),
+            base_fare=20000,
+            available_seats=8,
+        )
+        self.bookings = [
+            Booking.objects.create(
+                trip=self.trip,
+                passenger=self.passenger,
+                seat=seat,
+                status="CONFIRMED" if i < 3 else "CANCELLED",
+                source="DIRECT" if i % 2 else "MOBILE_APP",
+                passenger_name=f"Passenger {i}",
+                passenger_phone="0700000002",
+                base_fare=20000,
+                total_amount=20000,
+            )
+            for i, seat in enumerate(bus.seats.all()[:4])
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _content(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b"".join(response.streaming_content).decode()
+
+    def test_booking_csv_export_streams_with_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/v1/bookings/export/")
+            rows = list(csv.DictReader(io.StringIO(self._content(response))))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["route"], "KLA-MSK")
+        # Authentication aside, the rows come from a single query
+        self.assertEqual(
+            len([q for q in ctx.captured_queries if "bookings_booking" in q["sql"]]), 1
+        )
+
+    def test_booking_export_honours_list_filters(self):
+        response = self.client.get(
+            "/api/v1/bookings/export/", {"status": "CONFIRMED", "source": "DIRECT", "output": "ndjson"}
+        )
+        lines = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            [line["booking_reference"] for line in lines],
+            [self.bookings[1].booking_reference],
+        )
+
+        response = self.client.get("/api/v1/bookings/export/", {"output": "xlsx"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_manifest_and_payment_exports(self):
+        response = self.client.get("/api/v1/bookings/manifest/export/", {"trip_id": self.trip.id})
+        rows = list(csv.DictReader(io.StringIO(self._content(response))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["bus"], "UEX001E")
+
+        Payment.objects.create(
+            booking=self.bookings[0],
+            user=self.passenger,
+            amount=20000,
+            payment_method="CASH",
+            status="COMPLETED",
+        )
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            "/api/v1/payments/export/",
+            {"output": "ndjson", "date_from": today, "date_to": today},
+        )
+        lines = [json.loads(line) for line in self._content(response).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["booking_reference"], self.bookings[0].booking_reference)
+        self.assertEqual(lines[0]["amount"], "20000.00")
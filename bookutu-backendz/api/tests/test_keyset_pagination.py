@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookutu.pagination import InvalidCursor, keyset_page
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Pager Co",
+            email="pager@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-PAGE",
+            license_number="LIC-PAGE",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="pager-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-JIN",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Jinja",
+            destination_terminal="Main",
+            distance_km=80,
+            estimated_duration_hours=2,
+            base_fare=15000,
+        )
+        tomorrow = (timezone.now() + timezone.timedelta(days=1)).date()
+        # Several trips share a departure date and time so the keyset must
+        # fall back to the id tie-breaker
+        self.trips = []
+        for index in range(7):
+            bus = Bus.objects.create(
+                company=self.company,
+                license_plate=f"UAP{index:03d}P",
+                model="Model X",
+                make="Make Y",
+                year=2020,
+                total_seats=4,
+            )
+            self.trips.append(Trip.objects.create(
+                company=self.company,
+                route=route,
+                bus=bus,
+                departure_date=tomorrow + timezone.timedelta(days=index // 3),
+                departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+                arrival_time=timezone.datetime(2000, 1, 1, 10, 0).time(),
+                base_fare=15000,
+                available_seats=4,
+            ))
+        self.ordering = ["departure_date", "departure_time", "id"]
+
+    def test_walks_forward_and_back_without_gaps(self):
+        queryset = Trip.objects.filter(company=self.company)
+        seen, pages, cursor = [], [], None
+        while True:
+            page = keyset_page(queryset, self.ordering, cursor=cursor, page_size=3)
+            pages.append(page)
+            seen.extend(trip.id for trip in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [trip.id for trip in self.trips])
+        self.assertFalse(pages[0].has_previous)
+
+        back = keyset_page(queryset, self.ordering, cursor=pages[-1].previous_cursor, page_size=3)
+        self.assertEqual(list(back), list(pages[-2]))
+
+    def test_rows_in_the_same_millisecond_are_not_skipped(self):
+        moment = timezone.now().replace(microsecond=123000)
+        for index, trip in enumerate(self.trips[:6]):
+            Trip.objects.filter(id=trip.id).update(
+                created_at=moment + timezone.timedelta(microseconds=index * 100)
+            )
+        queryset = Trip.objects.filter(id__in=[trip.id for trip in self.trips[:6]])
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(queryset, ["-created_at"], cursor=cursor, page_size=2)
+            seen.extend(trip.id for trip in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [trip.id for trip in reversed(self.trips[:6])])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            keyset_page(Trip.objects.all(), self.ordering, cursor="not-a-cursor")
+
+    def test_trip_list_endpoint_uses_cursor_links(self):
+        client = APIClient()
+        client.force_authenticate(user=self.staff)
+
+        res = client.get("/api/v1/trips/", {"page_size": 5})
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertNotIn("count", body)
+        self.assertEqual(len(body["results"]), 5)
+
+        res = client.get(body["next"])
+        self.assertEqual(
+            [trip["id"] for trip in res.json()["results"]],
+            [trip.id for trip in self.trips[5:]],
+        )
+        self.assertIsNone(res.json()["next"])
+        self.assertEqual(client.get("/api/v1/trips/", {"cursor": "bogus"}).status_code, 404)
@@ -0,0 +1,126 @@
+import datetime
+import smtplib
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bookutu.checks import check_shared_cache
+from notifications import delivery, sms
+from notifications.models import Notification
+
+
+class FlakySmsBackend(sms.BaseSmsBackend):
+    retryable = True
+
+    def send(self, to, message):
+        raise sms.SmsError("provider down", retryable=self.retryable)
+
+
+@override_settings(
+    SMS_BACKEND="notifications.sms.LocMemSmsBackend",
+    NOTIFICATION_RATE_LIMITS={"SMS": 3, "EMAIL": 100},
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        sms.outbox.clear()
+
+    def test_rows_are_written_with_the_transaction_and_drained_after_commit(self):
+        with mock.patch("notifications.tasks.drain_outbox.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    notification = delivery.queue_sms("0700000001", "Hello", "TICKET")
+                    delivery.queue_email("ops@example.com", "Report", "Body", "REPORT")
+                delay.assert_not_called()
+        self.assertEqual(sorted(call.args for call in delay.call_args_list), [("EMAIL",), ("SMS",)])
+        self.assertEqual(notification.status, "QUEUED")
+        self.assertIsNone(delivery.queue_sms("", "Hello", "TICKET"))
+
+        # A rolled back change leaves nothing in the outbox
+        with mock.patch("notifications.tasks.drain_outbox.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        delivery.queue_sms("0700000002", "Lost", "TICKET")
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        self.assertFalse(Notification.objects.filter(recipient="0700000002").exists())
+
+    def test_drain_sends_batches_within_the_rate_limit(self):
+        for i in range(5):
+            delivery.queue_sms(f"070000000{i}", f"Hello {i}", "TICKET")
+        for i in range(2):
+            delivery.queue_email(f"user{i}@example.com", "Subject", "Body", "REPORT")
+
+        self.assertEqual(delivery.drain("SMS", batch_size=2), (3, True))
+        self.assertEqual([to for to, _ in sms.outbox], ["0700000000", "0700000001", "0700000002"])
+        self.assertEqual(delivery.drain("SMS"), (0, True))
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open") as opened:
+            self.assertEqual(delivery.drain("EMAIL"), (2, False))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual([message.to for message in mail.outbox], [["user0@example.com"], ["user1@example.com"]])
+
+        stats = delivery.outbox_stats()
+        self.assertEqual(stats["SMS"]["depth"], 2)
+        self.assertEqual(stats["SMS"]["sent"], 3)
+        self.assertEqual(stats["EMAIL"]["depth"], 0)
+        self.assertIsNotNone(stats["EMAIL"]["avg_latency_seconds"])
+
+    def test_rate_limit_counters_need_a_shared_cache(self):
+        caches = {
+            "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"},
+            "limits": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        }
+        with override_settings(DEBUG=False, TESTING=False, CACHES=caches, NOTIFICATION_RATE_LIMIT_CACHE="limits"):
+            self.assertEqual(
+                [error.msg for error in check_shared_cache(None)],
+                ["The 'limits' cache is local to each process."],
+            )
+            self.assertIs(delivery._limiter(), delivery.caches["limits"])
+
+    @override_settings(SMS_BACKEND="api.tests.test_notification_outbox.FlakySmsBackend")
+    def test_failures_back_off_then_dead_letter(self):
+        notification = Notification.objects.create(
+            kind="TICKET", recipient="0700000001", message="Hello"
+        )
+        self.assertEqual(delivery.drain("SMS"), (0, False))
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ("FAILED", 1))
+        self.assertGreater(notification.next_attempt_at, timezone.now())
+
+        # Not due again until the backoff passes
+        self.assertEqual(delivery.claim("SMS", 10), [])
+        Notification.objects.update(next_attempt_at=timezone.now())
+        with mock.patch.object(FlakySmsBackend, "retryable", False):
+            delivery.drain("SMS")
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts), ("DEAD", 2))
+        self.assertEqual(delivery.outbox_stats()["SMS"]["dead"], 1)
+
+    def test_email_refused_recipient_is_dead_lettered(self):
+        delivery.queue_email("nobody@example.com", "Subject", "Body", "REPORT")
+        refused = smtplib.SMTPRecipientsRefused({"nobody@example.com": (550, b"No such user")})
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=refused):
+            delivery.drain("EMAIL")
+        self.assertEqual(Notification.objects.get().status, "DEAD")
+
+    def test_claims_do_not_overlap_and_stale_claims_are_reclaimed(self):
+        for i in range(3):
+            Notification.objects.create(kind="TICKET", recipient=f"070000000{i}", message="Hi")
+        first = delivery.claim("SMS", 2)
+        second = delivery.claim("SMS", 2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({n.id for n in first} & {n.id for n in second})
+
+        # A worker died mid-send
+        Notification.objects.filter(id=first[0].id).update(
+            updated_at=timezone.now() - delivery.STALE_AFTER - datetime.timedelta(minutes=1)
+        )
+        self.assertEqual([n.id for n in delivery.claim("SMS", 10)], [first[0].id])
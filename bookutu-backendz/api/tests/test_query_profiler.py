@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.middleware import QueryBudgetExceeded
+from bookings.models import Booking
+from companies.models import Company, Bus, CompanySettings
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+@override_settings(QUERY_PROFILER_ENABLED=True, QUERY_BUDGET_STRICT=True)
+class QueryProfilerTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Profiled Co",
+            email="profiled@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-PROF",
+            license_number="LIC-PROF",
+            status="ACTIVE",
+        )
+        CompanySettings.objects.create(company=self.company, cancellation_hours=24)
+        self.staff = User.objects.create_user(
+            email="profiled-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        passenger = User.objects.create_passenger(
+            email="profiled-passenger@example.com", password="pass1234"
+        )
+        for i, city in enumerate(["Mbale", "Gulu", "Mbarara"]):
+            route = Route.objects.create(
+                company=self.company,
+                name=f"KLA-{city}",
+                origin_city="Kampala",
+                origin_terminal="Park",
+                destination_city=city,
+                destination_terminal="Main",
+                distance_km=230,
+                estimated_duration_hours=4,
+                base_fare=30000,
+            )
+            bus = Bus.objects.create(
+                company=self.company,
+                license_plate=f"UPR00{i}P",
+                model="Model X",
+                make="Make Y",
+                year=2020,
+                total_seats=8,
+            )
+            trip = Trip.objects.create(
+                company=self.company,
+                route=route,
+                bus=bus,
+                departure_date=timezone.localdate() + timezone.timedelta(days=i + 1),
+                departure_time=timezone.datetime(2000, 1, 1, 9, 0).time(),
+                arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+                base_fare=30000,
+                available_seats=8,
+            )
+            for seat in bus.seats.all()[:3]:
+                Booking.objects.create(
+                    trip=trip,
+                    passenger=passenger,
+                    seat=seat,
+                    status="CONFIRMED",
+                    passenger_name="Passenger",
+                    passenger_phone="0700000002",
+                    base_fare=30000,
+                    total_amount=30000,
+                )
+        self.client = APIClient()
+        self.client.force_login(self.staff)
+
+    def test_profile_headers(self):
+        res = self.client.get("/api/v1/trips/routes/")
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(int(res["X-DB-Queries"]), 0)
+        self.assertGreaterEqual(int(res["X-DB-Duplicate-Queries"]), 0)
+        self.assertGreaterEqual(float(res["X-Response-Time-Ms"]), float(res["X-DB-Time-Ms"]))
+        self.assertTrue(res["Server-Timing"].startswith("db;dur="))
+
+    def test_endpoints_stay_within_budget(self):
+        # Strict budgets raise QueryBudgetExceeded from the request
+        for url in (
+            "/api/v1/bookings/",
+            "/api/v1/trips/routes/",
+            "/api/v1/trips/dashboard/stats/",
+            "/api/v1/companies/dashboard/",
+        ):
+            with self.subTest(url=url):
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, 200)
+                self.assertIn(res.resolver_match.view_name, settings.QUERY_BUDGETS)
+
+    def test_over_budget_fails_loudly(self):
+        budgets = {**settings.QUERY_BUDGETS, "trips:company_routes": 1}
+        with override_settings(QUERY_BUDGETS=budgets):
+            with self.assertRaisesMessage(QueryBudgetExceeded, "trips:company_routes ran"):
+                self.client.get("/api/v1/trips/routes/")
+
+    @override_settings(QUERY_PROFILER_ENABLED=False)
+    def test_disabled_profiler_is_not_installed(self):
+        res = APIClient().get("/api/v1/trips/public/")
+        self.assertNotIn("X-DB-Queries", res)
@@ -0,0 +1,157 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from bookutu import reporting
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class TimeSeriesTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Report Co",
+            email="report@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-REP",
+            license_number="LIC-REP",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="report-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.passenger = User.objects.create_passenger(
+            email="report-passenger@example.com", password="pass1234"
+        )
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-FTP",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Fort Portal",
+            destination_terminal="Main",
+            distance_km=300,
+            estimated_duration_hours=5,
+            base_fare=35000,
+        )
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate="URP001R",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=timezone.localdate() + timezone.timedelta(days=5),
+            departure_time=datetime.time(7, 0),
+            arrival_time=datetime.time(12, 0),
+            base_fare=35000,
+            available_seats=8,
+        )
+        self.seats = list(bus.seats.all())
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _booking(self, created_at, source="MOBILE_APP", status="CONFIRMED"):
+        booking = Booking.objects.create(
+            trip=self.trip,
+            passenger=self.passenger,
+            seat=self.seats.pop(),
+            status=status,
+            source=source,
+            passenger_name="Passenger",
+            passenger_phone="0700000002",
+            base_fare=35000,
+            total_amount=35000,
+        )
+        Booking.objects.filter(pk=booking.pk).update(created_at=created_at)
+        return booking
+
+    def _local(self, day, hour):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+    def test_days_are_local_and_gap_filled(self):
+        day = datetime.date(2026, 3, 10)
+        # 00:30 Kampala time is still the previous day in UTC
+        self._booking(self._local(day, 0) + timezone.timedelta(minutes=30))
+        self._booking(self._local(day, 23))
+        self._booking(self._local(day + timezone.timedelta(days=2), 9))
+
+        series = reporting.time_series(
+            Booking.objects.all(), "created_at", day - timezone.timedelta(days=1),
+            day + timezone.timedelta(days=2),
+        )
+        self.assertEqual(
+            [(point["period"], point["count"]) for point in series],
+            [
+                (day - timezone.timedelta(days=1), 0),
+                (day, 2),
+                (day + timezone.timedelta(days=1), 0),
+                (day + timezone.timedelta(days=2), 1),
+            ],
+        )
+
+    def test_weeks_months_and_groups(self):
+        self._booking(self._local(datetime.date(2026, 1, 31), 12), source="DIRECT")
+        self._booking(self._local(datetime.date(2026, 2, 2), 12))
+        self._booking(self._local(datetime.date(2026, 2, 3), 12))
+
+        weeks = reporting.time_series(
+            Booking.objects.all(), "created_at",
+            datetime.date(2026, 1, 28), datetime.date(2026, 2, 8), period="week",
+        )
+        self.assertEqual(
+            [(point["period"], point["count"]) for point in weeks],
+            [(datetime.date(2026, 1, 26), 1), (datetime.date(2026, 2, 2), 2)],
+        )
+
+        months = reporting.time_series(
+            Booking.objects.all(), "created_at",
+            datetime.date(2026, 1, 1), datetime.date(2026, 3, 31),
+            period="month", group_by="source",
+        )
+        self.assertEqual(
+            [(point["group"], point["period"].month, point["count"]) for point in months],
+            [
+                ("DIRECT", 1, 1), ("DIRECT", 2, 0), ("DIRECT", 3, 0),
+                ("MOBILE_APP", 1, 0), ("MOBILE_APP", 2, 2), ("MOBILE_APP", 3, 0),
+            ],
+        )
+
+    def test_booking_report_endpoint(self):
+        today = timezone.localdate()
+        self._booking(self._local(today, 10))
+        self._booking(self._local(today, 11), status="CANCELLED")
+
+        response = self.client.get(
+            "/api/v1/bookings/reports/",
+            {"date_from": today.isoformat(), "date_to": today.isoformat(), "group_by": "status"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(point["group"], point["bookings"], point["revenue"]) for point in response.data["series"]],
+            [("CANCELLED", 1, 0.0), ("CONFIRMED", 1, 35000.0)],
+        )
+
+        response = self.client.get("/api/v1/bookings/reports/", {"group_by": "seat"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            "/api/v1/bookings/reports/", {"date_from": "2020-01-01", "date_to": "2026-01-01"}
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+from trips.stats import with_route_stats
+
+User = get_user_model()
+
+
+class RouteStatsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Routes Co",
+            email="routes@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-RTS",
+            license_number="LIC-RTS",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="routes-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.bus = Bus.objects.create(
+            company=self.company,
+            license_plate="URS001R",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=10,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+        self.today = timezone.now().date()
+        self.hour = 5
+
+    def _route(self, destination):
+        return Route.objects.create(
+            company=self.company,
+            name=f"KLA-{destination}",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city=destination,
+            destination_terminal="Main",
+            distance_km=100,
+            estimated_duration_hours=1,
+            base_fare=10000,
+        )
+
+    def _trip(self, route, days, booked=0, status="SCHEDULED"):
+        # One hour slots on the shared bus so trips never conflict
+        self.hour += 1
+        trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=self.bus,
+            departure_date=self.today + timezone.timedelta(days=days),
+            departure_time=timezone.datetime(2000, 1, 1, self.hour % 24, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, self.hour % 24, 30).time(),
+            base_fare=10000,
+            available_seats=10,
+        )
+        Trip.objects.filter(pk=trip.pk).update(booked_seats=booked, status=status)
+        return trip
+
+    def test_annotations(self):
+        route = self._route("Jinja")
+        self._trip(route, -3, booked=10, status="COMPLETED")
+        upcoming = self._trip(route, 2, booked=5)
+        self._trip(route, 4, booked=0)
+        self._trip(route, 1, booked=10, status="CANCELLED")
+        idle = self._route("Entebbe")
+
+        stats = {r.pk: r for r in with_route_stats(Route.objects.all())}
+        self.assertEqual(stats[route.pk].total_trips, 4)
+        self.assertEqual(stats[route.pk].upcoming_trips, 2)
+        self.assertEqual(stats[route.pk].next_departure_date, upcoming.departure_date)
+        self.assertEqual(stats[route.pk].next_departure_time, upcoming.departure_time)
+        self.assertAlmostEqual(stats[route.pk].average_occupancy, 50.0)
+        self.assertEqual(stats[idle.pk].total_trips, 0)
+        self.assertIsNone(stats[idle.pk].next_departure_date)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), res.json()
+
+    def test_route_lists_use_fixed_query_count(self):
+        first = self._route("Mityana")
+        self._trip(first, 1)
+        few, _ = self._queries("/api/v1/trips/routes/")
+        few_direct, _ = self._queries("/api/v1/bookings/direct/routes/")
+
+        for index, city in enumerate(["Lugazi", "Mukono", "Luweero", "Masindi"]):
+            self._trip(self._route(city), index + 1)
+            self._trip(self._route(f"{city} North"), -1, status="COMPLETED")
+        many, body = self._queries("/api/v1/trips/routes/")
+        many_direct, direct = self._queries("/api/v1/bookings/direct/routes/")
+
+        self.assertEqual(few, many)
+        self.assertEqual(few_direct, many_direct)
+        self.assertEqual(body["count"], 9)
+        self.assertEqual(len(direct["routes"]), 5)
+        self.assertTrue(all(route["upcoming_trips"] == 1 for route in direct["routes"]))
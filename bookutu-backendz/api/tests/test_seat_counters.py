@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.counters import adjust_booked_seats, reconcile_booked_seats
+from bookings.models import Booking
+from bookutu import settings_cache
+from notifications import audit
+from companies.models import Company, Bus, CompanySettings
+from trips import search
+from trips.models import Route, Trip, TripSearchIndex
+
+User = get_user_model()
+
+
+class TripSeatCounterTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Counter Co",
+            email="counter@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-CNT",
+            license_number="LIC-CNT",
+            status="ACTIVE",
+        )
+        self.passenger = User.objects.create_passenger(email="rider@example.com", password="pass1234")
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UAC001C",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-FTP",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Fort Portal",
+            destination_terminal="Main",
+            distance_km=300,
+            estimated_duration_hours=5,
+            base_fare=35000,
+        )
+        tomorrow = (timezone.now() + timezone.timedelta(days=1)).date()
+        self.trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=tomorrow,
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+            base_fare=35000,
+            available_seats=8,
+        )
+        self.seats = list(bus.seats.all())
+
+    def _booking(self, seat):
+        return Booking.objects.create(
+            trip=self.trip,
+            passenger=self.passenger,
+            seat=seat,
+            passenger_name="Rider",
+            passenger_phone="0700000010",
+            base_fare=self.trip.base_fare,
+            total_amount=self.trip.base_fare,
+        )
+
+    def test_confirm_and_cancel_use_atomic_counter(self):
+        first, second = self._booking(self.seats[0]), self._booking(self.seats[1])
+        # A stale in-memory trip must not clobber the other confirmation
+        second.trip = Trip.objects.get(pk=self.trip.pk)
+
+        first.confirm_booking()
+        second.confirm_booking()
+        second.confirm_booking()
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.booked_seats, 2)
+        self.assertEqual(second.trip.booked_seats, 2)
+
+        first.cancel_booking("changed plans")
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.booked_seats, 1)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self._booking(self.seats[0]).confirm_booking()
+        self._booking(self.seats[1])  # pending bookings are not counted
+        Trip.objects.filter(pk=self.trip.pk).update(booked_seats=5)
+
+        report = reconcile_booked_seats()
+        self.assertEqual(report, [{"trip_id": self.trip.id, "recorded": 5, "actual": 1}])
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.booked_seats, 1)
+        self.assertEqual(reconcile_booked_seats(), [])
+
+    def test_direct_booking_updates_counter_and_search_index(self):
+        patcher = mock.patch.object(audit, "buffer", audit.AuditBuffer())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        settings_cache.clear()
+        CompanySettings.objects.create(company=self.company, cancellation_hours=24)
+        search.refresh_trips([self.trip.id])
+        staff = User.objects.create_user(
+            email="counter-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        client = APIClient()
+        client.force_authenticate(user=staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post("/api/v1/bookings/direct/create/", {
+                "trip": self.trip.id,
+                "seat_number": self.seats[0].seat_number,
+                "passenger_name": "Walk In",
+                "passenger_phone": "0700000011",
+                "payment_method": "CASH",
+            })
+        self.assertEqual(response.status_code, 201)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.booked_seats, 1)
+        self.assertEqual(TripSearchIndex.objects.get(trip=self.trip).remaining_seats, 7)
+
+        # Cancelling twice over never pushes the index past capacity
+        booking = Booking.objects.get(trip=self.trip)
+        booking.cancel_booking("refund")
+        adjust_booked_seats(self.trip.id, -1)
+        self.assertEqual(TripSearchIndex.objects.get(trip=self.trip).remaining_seats, 8)
@@ -0,0 +1,128 @@
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+from bookings.models import Booking, SeatReservation
+from bookings.holds import SeatUnavailable, hold_seats, hold_and_book
+
+User = get_user_model()
+
+
+class SeatHoldTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Hold Co",
+            email="holds@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-HOLD",
+            license_number="LIC-HOLD",
+            status="ACTIVE",
+        )
+        self.bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UAH001H",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-GUL",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Gulu",
+            destination_terminal="Main",
+            distance_km=330,
+            estimated_duration_hours=5,
+            base_fare=40000,
+        )
+        tomorrow = timezone.now() + timezone.timedelta(days=1)
+        self.trip = Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=self.bus,
+            departure_date=tomorrow.date(),
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+            base_fare=40000,
+            available_seats=self.bus.total_seats,
+        )
+        self.alice = User.objects.create_passenger(email="alice@example.com", password="pass1234")
+        self.bob = User.objects.create_passenger(email="bob@example.com", password="pass1234")
+        self.seat_1a = self.bus.seats.get(seat_number="1A")
+        self.seat_1b = self.bus.seats.get(seat_number="1B")
+
+    def _booking(self, user, seat):
+        return Booking(
+            trip=self.trip,
+            passenger=user,
+            seat=seat,
+            passenger_name=user.email,
+            passenger_phone="0700000010",
+            base_fare=self.trip.base_fare,
+            total_amount=self.trip.base_fare,
+        )
+
+    def test_multi_seat_hold_is_all_or_nothing(self):
+        hold_seats(self.trip, [self.seat_1b], self.bob)
+
+        with self.assertRaises(SeatUnavailable) as ctx:
+            hold_seats(self.trip, [self.seat_1a, self.seat_1b], self.alice)
+
+        self.assertEqual(ctx.exception.seat_ids, [self.seat_1b.id])
+        self.assertFalse(
+            SeatReservation.objects.filter(trip=self.trip, user=self.alice).exists()
+        )
+
+    def test_expired_hold_can_be_taken_over(self):
+        (reservation,) = hold_seats(self.trip, [self.seat_1a], self.bob)
+        SeatReservation.objects.filter(pk=reservation.pk).update(
+            expires_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+
+        (reservation,) = hold_seats(self.trip, [self.seat_1a], self.alice)
+        self.assertEqual(reservation.user, self.alice)
+
+    def test_hold_and_book_rejects_second_claim(self):
+        hold_and_book(self.trip, self.alice, [self._booking(self.alice, self.seat_1a)])
+
+        with self.assertRaises(SeatUnavailable):
+            hold_and_book(self.trip, self.bob, [self._booking(self.bob, self.seat_1a)])
+
+        self.assertEqual(
+            Booking.objects.filter(trip=self.trip, seat=self.seat_1a).count(), 1
+        )
+        self.assertFalse(
+            SeatReservation.objects.filter(trip=self.trip, is_active=True).exists()
+        )
+
+    def test_group_booking_is_all_or_nothing(self):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.alice)
+        hold_seats(self.trip, [self.seat_1b], self.bob)
+        payload = {
+            "trip_id": self.trip.id,
+            "seat_numbers": ["1A", "1B", "1C"],
+            "passenger_name": "Alice",
+            "passenger_phone": "0700000010",
+        }
+
+        res = client.post("/api/bookings/create/", payload, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["conflicts"], [{"seat_number": "1B", "reason": "held"}])
+        self.assertFalse(Booking.objects.filter(trip=self.trip).exists())
+
+        payload["seat_numbers"] = ["1A", "1C", "1D", "2A", "2B", "2C"]
+        res = client.post("/api/bookings/create/", payload, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        group = Booking.objects.filter(group_reference=res.json()["group_reference"])
+        self.assertEqual(group.count(), 6)
+        self.assertEqual(sorted(res.json()["booking_ids"]), sorted(group.values_list("id", flat=True)))
@@ -0,0 +1,165 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+from bookings.models import Booking, SeatReservation
+from bookings import inventory
+from bookutu.checks import check_shared_cache
+
+User = get_user_model()
+
+
+class SeatInventoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name="Seat Map Co",
+            email="seats@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-SEAT",
+            license_number="LIC-SEAT",
+            status="ACTIVE",
+        )
+        self.user = User.objects.create_user(
+            email="clerk@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        # Bus.save materialises a 2-2 layout: 1A 1B 1C 1D 2A ...
+        self.bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UAS001S",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.seats = list(self.bus.seats.order_by("row_number", "seat_position", "id"))
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-MBR",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Mbarara",
+            destination_terminal="Main",
+            distance_km=270,
+            estimated_duration_hours=4.5,
+            base_fare=30000,
+        )
+        tomorrow = timezone.now() + timezone.timedelta(days=1)
+        self.trip = Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=self.bus,
+            departure_date=tomorrow.date(),
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 13, 0).time(),
+            base_fare=30000,
+            available_seats=self.bus.total_seats,
+        )
+
+    def _book(self, seat, status="PENDING"):
+        return Booking.objects.create(
+            trip=self.trip,
+            passenger=self.user,
+            seat=seat,
+            status=status,
+            passenger_name="Alice",
+            passenger_phone="0700000010",
+            base_fare=self.trip.base_fare,
+            total_amount=self.trip.base_fare,
+        )
+
+    def test_booking_writes_update_cached_map_in_place(self):
+        seat_map = inventory.get_seat_map(self.trip.id)
+        self.assertEqual(seat_map.booked_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self._book(self.seats[0])
+
+        with self.assertNumQueries(0):
+            seat_map = inventory.get_seat_map(self.trip.id)
+        self.assertEqual(seat_map.booked_seat_ids(), {self.seats[0].id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.cancel_booking("changed plans")
+
+        with self.assertNumQueries(0):
+            seat_map = inventory.get_seat_map(self.trip.id)
+        self.assertEqual(seat_map.booked_seat_ids(), set())
+
+    def test_booking_during_rebuild_is_not_lost(self):
+        build = inventory.build_seat_map
+
+        def build_then_book(trip):
+            # The rebuild read the database just before a booking committed
+            data = build(trip)
+            with self.captureOnCommitCallbacks(execute=True):
+                self._book(self.seats[3])
+            return data
+
+        with mock.patch.object(inventory, "build_seat_map", build_then_book):
+            stale = inventory.get_seat_map(self.trip.id)
+        self.assertEqual(stale.booked_seat_ids(), set())
+
+        seat_map = inventory.get_seat_map(self.trip.id)
+        self.assertEqual(seat_map.booked_seat_ids(), {self.seats[3].id})
+        self.assertNotEqual(seat_map.etag_version, stale.etag_version)
+
+    def test_reservation_hides_seat_from_other_users_only(self):
+        other = User.objects.create_user(
+            email="other@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        inventory.get_seat_map(self.trip.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            SeatReservation.objects.create(
+                trip=self.trip, seat=self.seats[1], user=other
+            )
+
+        seat_map = inventory.get_seat_map(self.trip.id)
+        self.assertEqual(seat_map.held_seat_ids(exclude_user_id=self.user.id), {self.seats[1].id})
+        self.assertEqual(seat_map.held_seat_ids(exclude_user_id=other.id), set())
+
+    def test_mobile_seat_endpoint_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._book(self.seats[2], status="CONFIRMED")
+
+        url = f"/api/trips/{self.trip.id}/seats/"
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["bus_capacity"], 8)
+
+    def test_direct_booking_seat_endpoint_statuses(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._book(self.bus.seats.get(seat_number="1A"), status="CONFIRMED")
+        self.client.force_authenticate(user=self.user)
+
+        res = self.client.get(f"/api/v1/bookings/direct/trips/{self.trip.id}/seats/")
+        self.assertEqual(res.status_code, 200)
+        statuses = {seat["seat_number"]: seat["status"] for seat in res.json()["seats"]}
+        self.assertEqual(statuses["1A"], "booked")
+        self.assertEqual(statuses["1B"], "available")
+
+    def test_process_local_cache_is_refused_in_production(self):
+        local = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        shared = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with override_settings(DEBUG=False, TESTING=False, CACHES=local):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["bookutu.E001"])
+        with override_settings(DEBUG=False, TESTING=False, CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,172 @@
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from bookings.models import Booking
+from companies.models import Company, Bus, SeatLayout
+from companies.seating import materialize_seats
+from django.contrib.auth import get_user_model
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class SeatLayoutTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Layout Co",
+            email="layout@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-LAY",
+            license_number="LIC-LAY",
+            status="ACTIVE",
+        )
+        self.layout = SeatLayout.objects.create(
+            company=self.company,
+            name="Executive 2-1",
+            rows=3,
+            columns=[
+                {"letter": "A", "position": "LEFT_WINDOW", "is_window": True},
+                {"letter": "B", "position": "LEFT_AISLE", "is_aisle": True},
+                {"letter": "C", "position": "RIGHT_WINDOW", "is_window": True},
+            ],
+            row_overrides={"1": {"seat_type": "PREMIUM", "price_multiplier": "1.25", "has_extra_legroom": True}},
+        )
+
+    def _bus(self, plate, **kwargs):
+        return Bus.objects.create(
+            company=self.company,
+            license_plate=plate,
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            **kwargs,
+        )
+
+    def test_bus_materializes_layout_in_one_insert(self):
+        with self.assertNumQueries(2):  # bus insert, one bulk insert for all seats
+            bus = self._bus("UAL001L", total_seats=0, seat_layout=self.layout)
+
+        self.assertEqual(bus.total_seats, 9)
+        seats = {seat.seat_number: seat for seat in bus.seats.all()}
+        self.assertEqual(len(seats), 9)
+        self.assertEqual(seats["1C"].seat_type, "PREMIUM")
+        self.assertEqual(str(seats["1C"].price_multiplier), "1.25")
+        self.assertFalse(seats["2A"].has_extra_legroom)
+
+    def test_default_layout_keeps_two_two_rows(self):
+        bus = self._bus("UAL002L", total_seats=8)
+        self.assertEqual(
+            sorted(bus.seats.values_list("seat_number", flat=True)),
+            ["1A", "1B", "1C", "1D", "2A", "2B", "2C", "2D"],
+        )
+
+    def test_rematerialize_keeps_booked_seats_attached(self):
+        bus = self._bus("UAL003L", total_seats=0, seat_layout=self.layout)
+        seat = bus.seats.get(seat_number="2A")
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-MSK",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Masaka",
+            destination_terminal="Main",
+            distance_km=130,
+            estimated_duration_hours=2,
+            base_fare=20000,
+        )
+        trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=(timezone.now() + timezone.timedelta(days=1)).date(),
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 10, 0).time(),
+            base_fare=20000,
+            available_seats=9,
+        )
+        Booking.objects.create(
+            trip=trip,
+            passenger=User.objects.create_passenger(email="lay@example.com", password="pass1234"),
+            seat=seat,
+            passenger_name="Lay",
+            passenger_phone="0700000010",
+            base_fare=20000,
+            total_amount=20000,
+        )
+
+        self.layout.row_overrides = {}
+        self.layout.save()
+        bus.refresh_from_db()
+        materialize_seats(bus, replace=True)
+        seat.refresh_from_db()
+        self.assertEqual(seat.seat_number, "2A")
+        self.assertEqual(bus.seats.get(seat_number="1A").seat_type, "REGULAR")
+
+        # Shrinking the layout would orphan the booked seat
+        self.layout.rows = 1
+        self.layout.save()
+        bus.refresh_from_db()
+        with self.assertRaises(ValidationError):
+            materialize_seats(bus, replace=True)
+        self.assertEqual(bus.seats.count(), 9)
+
+    def test_changing_layout_rebuilds_seats(self):
+        bus = self._bus("UAL004L", total_seats=8)
+        bus = Bus.objects.get(id=bus.id)
+        bus.seat_layout = self.layout
+        bus.save()
+        self.assertEqual(bus.total_seats, 9)
+        self.assertEqual(bus.seats.count(), 9)
+        self.assertEqual(bus.seats.get(seat_number="1C").seat_type, "PREMIUM")
+
+        # Unrelated edits leave the seats alone
+        seat_ids = set(bus.seats.values_list("id", flat=True))
+        bus.model = "Model Z"
+        with mock.patch("companies.seating.materialize_seats") as materialize:
+            bus.save()
+        materialize.assert_not_called()
+        self.assertEqual(set(bus.seats.values_list("id", flat=True)), seat_ids)
+
+        # Switching to a layout without a booked seat is refused and rolled back
+        Booking.objects.create(
+            trip=Trip.objects.create(
+                company=self.company,
+                route=Route.objects.create(
+                    company=self.company,
+                    name="KLA-HMA",
+                    origin_city="Kampala",
+                    origin_terminal="Park",
+                    destination_city="Hoima",
+                    destination_terminal="Main",
+                    distance_km=200,
+                    estimated_duration_hours=4,
+                    base_fare=25000,
+                ),
+                bus=bus,
+                departure_date=(timezone.now() + timezone.timedelta(days=1)).date(),
+                departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+                arrival_time=timezone.datetime(2000, 1, 1, 12, 0).time(),
+                base_fare=25000,
+                available_seats=9,
+            ),
+            passenger=User.objects.create_passenger(email="relay@example.com", password="pass1234"),
+            seat=bus.seats.get(seat_number="3A"),
+            passenger_name="Relay",
+            passenger_phone="0700000011",
+            base_fare=25000,
+            total_amount=25000,
+        )
+        bus.seat_layout = SeatLayout.objects.create(
+            company=self.company, name="Mini", rows=1, columns=self.layout.columns
+        )
+        with self.assertRaises(ValidationError):
+            bus.save()
+        bus.refresh_from_db()
+        self.assertEqual((bus.seat_layout_id, bus.total_seats), (self.layout.id, 9))
+        self.assertEqual(bus.seats.count(), 9)
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bookings.models import Booking
+from bookings.serializers import BookingSerializer
+from bookutu import settings_cache
+from bookutu.models import SystemSettings
+from companies.models import Company, Bus, CompanySettings
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class SettingsCacheTests(TestCase):
+    def setUp(self):
+        settings_cache.clear()
+        self.company = Company.objects.create(
+            name="Settings Co",
+            email="settings@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-SET",
+            license_number="LIC-SET",
+            status="ACTIVE",
+        )
+        CompanySettings.objects.create(company=self.company, cancellation_hours=12)
+
+    def _settings_queries(self, queries):
+        return [q for q in queries if "companies_settings" in q["sql"]]
+
+    def test_booking_list_reads_company_settings_once(self):
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate="USC001S",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=12,
+        )
+        route = Route.objects.create(
+            company=self.company,
+            name="KLA-MSK",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Masaka",
+            destination_terminal="Main",
+            distance_km=130,
+            estimated_duration_hours=2,
+            base_fare=20000,
+        )
+        trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=(timezone.now() + timezone.timedelta(days=3)).date(),
+            departure_time=timezone.datetime(2000, 1, 1, 9, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 11, 0).time(),
+            base_fare=20000,
+            available_seats=12,
+        )
+        passenger = User.objects.create_passenger(email="settings-passenger@example.com", password="pass1234")
+        for seat in bus.seats.all()[:10]:
+            Booking.objects.create(
+                trip=trip,
+                passenger=passenger,
+                seat=seat,
+                status="CONFIRMED",
+                passenger_name="Passenger",
+                passenger_phone="0700000002",
+                base_fare=20000,
+                total_amount=20000,
+            )
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = BookingSerializer(Booking.objects.filter(trip=trip), many=True).data
+        self.assertEqual(len(data), 10)
+        self.assertTrue(all(row["can_cancel"] for row in data))
+        self.assertEqual(len(self._settings_queries(ctx.captured_queries)), 1)
+
+    def test_saving_settings_invalidates_cache(self):
+        self.assertEqual(settings_cache.get_company_settings(self.company.id).cancellation_hours, 12)
+        with self.assertNumQueries(0):
+            settings_cache.get_company_settings(self.company.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            company_settings = CompanySettings.objects.get(company=self.company)
+            company_settings.cancellation_hours = 48
+            company_settings.save()
+        self.assertEqual(settings_cache.get_company_settings(self.company.id).cancellation_hours, 48)
+
+    def test_system_settings_cached(self):
+        SystemSettings.get_settings()
+        with self.assertNumQueries(0):
+            self.assertTrue(SystemSettings.get_settings().allow_company_registration)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            system_settings = SystemSettings.objects.get(pk=1)
+            system_settings.allow_company_registration = False
+            system_settings.save()
+        self.assertFalse(SystemSettings.get_settings().allow_company_registration)
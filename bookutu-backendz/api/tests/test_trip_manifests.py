@@ -0,0 +1,193 @@
+import datetime
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from companies.models import Company, Bus
+from payments.models import Payment
+from trips import manifests
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class TripManifestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(
+            name="Manifest Co",
+            email="manifest@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-MAN",
+            license_number="LIC-MAN",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="manifest-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.passenger = User.objects.create_passenger(
+            email="manifest-passenger@example.com", password="pass1234"
+        )
+        self.day = timezone.localdate() + timezone.timedelta(days=1)
+        self.trips = [
+            self._trip("Park", "UMN00%dM" % i, datetime.time(6 + i, 0), bookings=i + 1)
+            for i in range(3)
+        ]
+        self._trip("Nakawa", "UMN009M", datetime.time(7, 30), bookings=1)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+
+    def _trip(self, terminal, plate, departs, bookings):
+        route = Route.objects.create(
+            company=self.company,
+            name=f"{terminal}-{plate}",
+            origin_city="Kampala",
+            origin_terminal=terminal,
+            destination_city=f"Town {plate}",
+            destination_terminal="Main",
+            distance_km=270,
+            estimated_duration_hours=4,
+            base_fare=30000,
+        )
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate=plate,
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        trip = Trip.objects.create(
+            company=self.company,
+            route=route,
+            bus=bus,
+            departure_date=self.day,
+            departure_time=departs,
+            arrival_time=datetime.time(departs.hour + 4, 0),
+            base_fare=30000,
+            available_seats=8,
+            driver_name="Driver",
+        )
+        for seat in bus.seats.all()[:bookings]:
+            booking = Booking.objects.create(
+                trip=trip,
+                passenger=self.passenger,
+                seat=seat,
+                status="CONFIRMED",
+                passenger_name="Passenger (A)",
+                passenger_phone="0700000002",
+                base_fare=30000,
+                total_amount=30000,
+            )
+            Payment.objects.create(
+                booking=booking,
+                user=self.passenger,
+                amount=30000,
+                payment_method="CASH",
+                status="COMPLETED",
+                completed_at=timezone.now(),
+            )
+        return trip
+
+    def test_all_departures_built_with_fixed_queries(self):
+        trips = manifests.trips_departing(self.company, self.day, terminal="park")
+        # Trips, versions, passengers and payment methods
+        with self.assertNumQueries(4):
+            built = manifests.build_manifests(trips)
+
+        self.assertEqual([m["trip_info"]["id"] for m in built], [t.id for t in self.trips])
+        self.assertEqual(
+            [m["summary"]["total_passengers"] for m in built], [1, 2, 3]
+        )
+        self.assertEqual(built[2]["summary"]["payment_methods"], {"CASH": 3})
+        self.assertEqual(built[0]["trip_info"]["bus_registration"], "UMN000M")
+
+        # Unchanged trips come from the cache
+        with self.assertNumQueries(2):
+            manifests.build_manifests(trips)
+
+        # A cancellation changes the trip's version and rebuilds its manifest
+        booking = Booking.objects.filter(trip=self.trips[1]).first()
+        booking.status = "CANCELLED"
+        booking.save()
+        rebuilt = manifests.build_manifests(trips)
+        self.assertEqual(rebuilt[1]["summary"]["total_passengers"], 1)
+
+        # So do edits to the trip's bus and route, and a bare counter update
+        bus = self.trips[0].bus
+        bus.license_plate = "UMN100M"
+        bus.save()
+        route = self.trips[2].route
+        route.destination_terminal = "New Park"
+        route.save()
+        Trip.objects.filter(id=self.trips[1].id).update(booked_seats=7)
+        rebuilt = manifests.build_manifests(trips)
+        self.assertEqual(rebuilt[0]["trip_info"]["bus_registration"], "UMN100M")
+        self.assertEqual(rebuilt[1]["trip_info"]["booked_seats"], 7)
+        self.assertEqual(rebuilt[2]["trip_info"]["destination_terminal"], "New Park")
+
+    def test_manifests_endpoint_outputs(self):
+        url = "/api/v1/trips/manifests/"
+        response = self.client.get(url, {"date": self.day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_trips"], 4)
+
+        response = self.client.get(url, {"date": self.day.isoformat(), "terminal": "Park", "output": "text"})
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        pages = response.content.decode().split("\f")
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(all(len(line) <= manifests.PRINT_WIDTH for line in pages[0].splitlines()))
+
+        response = self.client.get(url, {"date": self.day.isoformat(), "output": "pdf"})
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.content.startswith(b"%PDF-1.4"))
+        self.assertIn(b"/Count 4", response.content)
+        self.assertIn(b"Passenger \\(A\\)", response.content)
+
+        self.assertEqual(self.client.get(url, {"output": "docx"}).status_code, 400)
+
+    def test_booking_manifest_uses_bus_license_plate(self):
+        response = self.client.get(
+            "/api/v1/bookings/manifest/", {"trip_id": self.trips[1].id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_trips"], 1)
+        manifest = response.data["manifest"][0]
+        self.assertEqual(manifest["trip_info"]["bus_registration"], "UMN001M")
+        self.assertEqual(manifest["summary"]["total_passengers"], 2)
+
+    def test_pregenerate_covers_trips_within_the_hour(self):
+        departs = timezone.make_aware(
+            datetime.datetime.combine(self.day, self.trips[0].departure_time)
+        )
+        half_hour_before = mock.patch(
+            "trips.manifests.timezone.localtime",
+            return_value=departs - timezone.timedelta(minutes=30),
+        )
+        # A process-local cache would keep the manifests in the Celery worker
+        with half_hour_before:
+            self.assertEqual(manifests.pregenerate_upcoming(), 0)
+
+        # A file cache is shared by every process on the host
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }
+        }):
+            with half_hour_before:
+                self.assertEqual(manifests.pregenerate_upcoming(), 1)
+            with self.assertNumQueries(2):
+                manifests.build_manifests(Trip.objects.filter(id=self.trips[0].id))
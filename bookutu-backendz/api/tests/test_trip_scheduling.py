@@ -0,0 +1,91 @@
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+
+from companies.models import Company, Bus
+from trips.models import Route, Trip
+from trips.scheduling import find_conflicts
+
+
+def at(hour, minute=0):
+    return datetime.time(hour, minute)
+
+
+class TripSchedulingTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Night Co",
+            email="night@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-NGT",
+            license_number="LIC-NGT",
+            status="ACTIVE",
+        )
+        self.bus = Bus.objects.create(
+            company=self.company,
+            license_plate="UAN001N",
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-ARU Night",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Arua",
+            destination_terminal="Main",
+            distance_km=500,
+            estimated_duration_hours=9,
+            base_fare=60000,
+        )
+        self.day = (timezone.now() + timezone.timedelta(days=2)).date()
+
+    def _trip(self, day, departure, arrival, save=True):
+        trip = Trip(
+            company=self.company,
+            route=self.route,
+            bus=self.bus,
+            departure_date=day,
+            departure_time=departure,
+            arrival_time=arrival,
+            base_fare=60000,
+            available_seats=8,
+        )
+        if save:
+            trip.save()
+        return trip
+
+    def test_overnight_trip_blocks_next_morning(self):
+        self._trip(self.day, at(22), at(6))
+
+        with self.assertRaises(ValidationError) as ctx:
+            self._trip(self.day + datetime.timedelta(days=1), at(5), at(9))
+        self.assertIn("KLA-ARU Night", str(ctx.exception))
+
+        # After the overnight arrival the bus is free again
+        self._trip(self.day + datetime.timedelta(days=1), at(7), at(11))
+
+    def test_batch_checked_with_one_query(self):
+        self._trip(self.day, at(8), at(12))
+        proposed = [
+            self._trip(self.day + datetime.timedelta(days=offset), at(10), at(14), save=False)
+            for offset in range(5)
+        ] + [self._trip(self.day + datetime.timedelta(days=4), at(13), at(15), save=False)]
+
+        with self.assertNumQueries(1):
+            conflicts = find_conflicts(self.bus.id, proposed)
+
+        pairs = {(c.proposed.departure_date, c.proposed.departure_time) for c in conflicts}
+        self.assertEqual(pairs, {(self.day, at(10)), (self.day + datetime.timedelta(days=4), at(13))})
+
+    def test_cancelled_trips_free_the_bus(self):
+        trip = self._trip(self.day, at(8), at(12))
+        Trip.objects.filter(pk=trip.pk).update(status="CANCELLED")
+        self._trip(self.day, at(9), at(11))
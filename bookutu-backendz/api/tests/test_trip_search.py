@@ -0,0 +1,90 @@
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from companies.models import Company, Bus
+from trips.models import Route, Trip, TripSearchIndex
+from trips import search
+
+
+class TripSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.company = Company.objects.create(
+            name="Search Co",
+            email="search@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-SRCH",
+            license_number="LIC-SRCH",
+            status="ACTIVE",
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-MBR",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Mbarara",
+            destination_terminal="Main",
+            distance_km=270,
+            estimated_duration_hours=4.5,
+            base_fare=30000,
+        )
+        self.tomorrow = (timezone.now() + timezone.timedelta(days=1)).date()
+
+    def _trip(self, plate, hour, fare, day=None):
+        bus = Bus.objects.create(
+            company=self.company,
+            license_plate=plate,
+            model="Model X",
+            make="Make Y",
+            year=2020,
+            total_seats=8,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return Trip.objects.create(
+                company=self.company,
+                route=self.route,
+                bus=bus,
+                departure_date=day or self.tomorrow,
+                departure_time=timezone.datetime(2000, 1, 1, hour, 0).time(),
+                arrival_time=timezone.datetime(2000, 1, 1, hour + 4, 0).time(),
+                base_fare=fare,
+                available_seats=8,
+            )
+
+    def test_search_filters_by_route_and_day_and_sorts(self):
+        early = self._trip("UAS101A", 7, 35000)
+        late = self._trip("UAS102A", 14, 25000)
+        self._trip("UAS103A", 9, 20000, day=self.tomorrow + timezone.timedelta(days=3))
+
+        params = {"origin": " kampala ", "destination": "MBARARA", "date": self.tomorrow.isoformat()}
+        res = self.client.get("/api/trips/search/", params)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([row["id"] for row in res.json()["results"]], [early.id, late.id])
+
+        res = self.client.get("/api/trips/search/", {**params, "sort": "price"})
+        self.assertEqual([row["id"] for row in res.json()["results"]], [late.id, early.id])
+
+    def test_cancelled_trip_leaves_index(self):
+        trip = self._trip("UAS104A", 8, 30000)
+        self.assertTrue(TripSearchIndex.objects.filter(trip=trip).exists())
+
+        trip.status = "CANCELLED"
+        with self.captureOnCommitCallbacks(execute=True):
+            trip.save()
+        self.assertFalse(TripSearchIndex.objects.filter(trip=trip).exists())
+
+    def test_rebuild_restores_rows(self):
+        trip = self._trip("UAS105A", 8, 30000)
+        TripSearchIndex.objects.all().delete()
+
+        indexed, _ = search.rebuild()
+        self.assertEqual(indexed, 1)
+        self.assertEqual(TripSearchIndex.objects.get().trip_id, trip.id)
+
+    def test_invalid_params_rejected(self):
+        self.assertEqual(self.client.get("/api/trips/search/", {"date": "tomorrow"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/trips/search/", {"sort": "seats"}).status_code, 400)
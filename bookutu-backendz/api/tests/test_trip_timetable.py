@@ -0,0 +1,148 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from companies.models import Company, Bus
+from trips.models import Route, Trip, TripPricing, TripSearchIndex
+
+User = get_user_model()
+
+
+class TripTimetableTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(
+            name="Timetable Co",
+            email="timetable@example.com",
+            phone_number="0700000000",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-TT",
+            license_number="LIC-TT",
+            status="ACTIVE",
+        )
+        self.staff = User.objects.create_user(
+            email="timetable-staff@example.com",
+            password="pass1234",
+            user_type="COMPANY_STAFF",
+            company=self.company,
+        )
+        self.route = Route.objects.create(
+            company=self.company,
+            name="KLA-GUL",
+            origin_city="Kampala",
+            origin_terminal="Park",
+            destination_city="Gulu",
+            destination_terminal="Main",
+            distance_km=340,
+            estimated_duration_hours=5,
+            base_fare=40000,
+        )
+        self.buses = [
+            Bus.objects.create(
+                company=self.company,
+                license_plate=f"UTT{index:03d}T",
+                model="Model X",
+                make="Make Y",
+                year=2020,
+                total_seats=8,
+            )
+            for index in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.staff)
+        # Start on a Monday well in the future
+        today = timezone.now().date()
+        self.start = today + datetime.timedelta(days=14 - today.weekday())
+
+    def _payload(self, bus, **extra):
+        timetable = {
+            "route": self.route.id,
+            "bus": bus.id,
+            "departure_times": ["06:00", "20:00"],
+            "weekdays": [0, 2, 4],
+            "start_date": self.start.isoformat(),
+            "end_date": (self.start + datetime.timedelta(days=13)).isoformat(),
+        }
+        timetable.update(extra)
+        return timetable
+
+    def test_dry_run_previews_without_writing(self):
+        res = self.client.post(
+            "/api/v1/trips/timetable/",
+            {"timetables": [self._payload(self.buses[0])], "dry_run": True},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        # Two weeks of Mon/Wed/Fri, two departures a day
+        self.assertEqual(body["trip_count"], 12)
+        self.assertFalse(body["created"])
+        self.assertEqual(body["trips"][1]["arrival_time"], "01:00:00")
+        self.assertFalse(Trip.objects.exists())
+
+    def test_generates_fleet_with_bulk_inserts(self):
+        payload = {"timetables": [self._payload(bus) for bus in self.buses]}
+        with self.captureOnCommitCallbacks(execute=True):
+            # Lookups and one conflict query per timetable, then one INSERT
+            # each for trips and pricing regardless of the number of trips
+            with self.assertNumQueries(14):
+                res = self.client.post("/api/v1/trips/timetable/", payload, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(Trip.objects.count(), 36)
+        self.assertEqual(TripPricing.objects.count(), 36)
+        self.assertEqual(TripSearchIndex.objects.count(), 36)
+        pricing = TripPricing.objects.select_related("trip").first()
+        self.assertEqual(pricing.final_base_fare, pricing.trip.base_fare)
+
+    def test_conflicts_block_unless_skipped(self):
+        bus = self.buses[0]
+        Trip.objects.create(
+            company=self.company,
+            route=self.route,
+            bus=bus,
+            departure_date=self.start,
+            departure_time=datetime.time(7),
+            arrival_time=datetime.time(9),
+            base_fare=40000,
+            available_seats=8,
+        )
+
+        res = self.client.post(
+            "/api/v1/trips/timetable/", {"timetables": [self._payload(bus)]}, format="json"
+        )
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(len(res.json()["conflicts"]), 1)
+        self.assertEqual(Trip.objects.count(), 1)
+
+        res = self.client.post(
+            "/api/v1/trips/timetable/",
+            {"timetables": [self._payload(bus)], "skip_conflicts": True},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["trip_count"], 11)
+        self.assertEqual(Trip.objects.count(), 12)
+
+    def test_rejects_other_company_bus(self):
+        other = Company.objects.create(
+            name="Other Co",
+            email="other-tt@example.com",
+            phone_number="0700000001",
+            address="Address",
+            city="Kampala",
+            state="Central",
+            registration_number="REG-TT2",
+            license_number="LIC-TT2",
+            status="ACTIVE",
+        )
+        bus = Bus.objects.create(
+            company=other, license_plate="UTX999T", model="M", make="M", year=2020, total_seats=8
+        )
+        res = self.client.post(
+            "/api/v1/trips/timetable/", {"timetables": [self._payload(bus)]}, format="json"
+        )
+        self.assertEqual(res.status_code, 400)
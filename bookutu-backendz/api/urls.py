@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     public_trips, add_trip, MobileRegisterView, MobileLoginView, MobileLogoutView,
-    get_trip_seats, create_booking
+    get_trip_seats, create_booking, search_trips
 ) 
 
 urlpatterns = [
@@ -11,6 +11,7 @@ urlpatterns = [
     path('logout/', MobileLogoutView.as_view(), name='mobile-logout'),
     
     path('trips/', public_trips, name='public-trips'),
+    path('trips/search/', search_trips, name='search-trips'),
     path('trips/add/', add_trip, name='add-trip'),
     path('trips/<int:trip_id>/seats/', get_trip_seats, name='trip-seats'),
     path('bookings/create/', create_booking, name='create-booking'),
@@ -1,3 +1,5 @@
+import datetime
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -8,12 +10,18 @@ from django.contrib.auth import get_user_model
 from rest_framework.decorators import api_view, permission_classes
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
+from django.db import transaction
 
 from .serializers import RegisterSerializer, CustomTokenObtainPairSerializer, MobileRegisterSerializer, MobileLoginSerializer
 from trips.models import Trip
-from trips.serializers import TripSerializer, TripPublicSerializer  
-from companies.models import Company, Bus
+from trips.serializers import TripSerializer, TripPublicSerializer, TripSearchResultSerializer
+from trips import search as trip_search
+from companies.models import Company, Bus, BusSeat
 from bookings.models import Booking
+from bookings import inventory
+from bookings.holds import SeatUnavailable, hold_and_book
+from bookutu.pagination import KeysetPagination
+from bookutu.conditional import conditional_view, list_last_modified, queryset_version
 
 User = get_user_model()
 
@@ -99,18 +107,83 @@ class LogoutView(APIView):
         except Exception as e:
             return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def _public_trip_queryset(today):
+    return Trip.objects.filter(
+        status="SCHEDULED",
+        departure_date__gte=today
+    )
+
+
+def _public_trips_version(request):
+    today = timezone.now().date()
+    # Route, bus and company names are part of the payload too
+    count, latest = queryset_version(
+        _public_trip_queryset(today),
+        "updated_at", "route__updated_at", "bus__updated_at", "company__updated_at",
+    )
+    return (today, count, latest), list_last_modified(latest)
+
+
+@conditional_view(_public_trips_version)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_trips(request):
     now = timezone.now().date()
-    trips = Trip.objects.filter(
-        status="SCHEDULED",
-        departure_date__gte=now
-    ).select_related("route", "bus", "company").order_by("departure_date", "departure_time")
+    trips = _public_trip_queryset(now).select_related(
+        "route", "bus", "company"
+    ).order_by("departure_date", "departure_time")
 
     serializer = TripPublicSerializer(trips, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_trips(request):
+    """
+    Search bookable trips by origin, destination and departure date window.
+
+    Query params: origin, destination, date (single day) or date_from/date_to,
+    sort (time|price) and seats (minimum remaining seats, default 1).
+    """
+    params = request.query_params
+    try:
+        date_from = _parse_date(params.get('date') or params.get('date_from'))
+        date_to = _parse_date(params.get('date') or params.get('date_to'))
+        min_seats = int(params.get('seats', 1))
+    except ValueError:
+        return Response(
+            {'error': 'Dates must be YYYY-MM-DD and seats must be a number'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    sort = params.get('sort', trip_search.SORT_TIME)
+    if sort not in trip_search.SORT_ORDERINGS:
+        return Response(
+            {'error': f"sort must be one of: {', '.join(trip_search.SORT_ORDERINGS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = trip_search.search(
+        origin=params.get('origin'),
+        destination=params.get('destination'),
+        date_from=date_from,
+        date_to=date_to,
+        sort=sort,
+        min_seats=min_seats,
+    )
+    paginator = KeysetPagination()
+    paginator.ordering = trip_search.SORT_ORDERINGS[sort]
+    page = paginator.paginate_queryset(results, request)
+    serializer = TripSearchResultSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.date.fromisoformat(value)
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -128,106 +201,133 @@ def add_trip(request):
         return Response({"message": "Trip added successfully", "trip": serializer.data})
     return Response(serializer.errors, status=400)
 
+def _trip_seats_version(request, trip_id):
+    try:
+        return (trip_id, inventory.get_seat_map(trip_id).etag_version), None
+    except Trip.DoesNotExist:
+        return None, None
+
+
+@conditional_view(_trip_seats_version)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_trip_seats(request, trip_id):
     try:
-        trip = Trip.objects.get(id=trip_id)
-        bus = trip.bus
-        
-        # Get booked seat numbers for this trip and convert to integers
-        booked_seat_strings = list(Booking.objects.filter(
-            trip=trip, 
-            status__in=['CONFIRMED', 'PENDING']
-        ).values_list('seat__seat_number', flat=True))
-        
-        # Convert string seat numbers to integers for Flutter app
-        booked_seats = []
-        for seat_str in booked_seat_strings:
-            try:
-                booked_seats.append(int(seat_str))
-            except ValueError:
-                # Skip non-integer seat numbers
-                pass
-        
-        return Response({
-            'trip_id': trip.id,
-            'bus_capacity': bus.total_seats,
-            'booked_seats': booked_seats,
-            'available_seats': bus.total_seats - len(booked_seats),
-            'seat_price': float(trip.base_fare)
-        })
+        seat_map = inventory.get_seat_map(trip_id)
     except Trip.DoesNotExist:
         return Response({'error': 'Trip not found'}, status=404)
 
+    # Convert string seat numbers to integers for Flutter app
+    booked_seats = []
+    for seat_str in seat_map.booked_seat_numbers():
+        try:
+            booked_seats.append(int(seat_str))
+        except ValueError:
+            # Skip non-integer seat numbers
+            pass
+
+    return Response({
+        'trip_id': seat_map.trip_id,
+        'bus_capacity': seat_map.bus_capacity,
+        'booked_seats': booked_seats,
+        'available_seats': seat_map.bus_capacity - len(booked_seats),
+        'seat_price': float(seat_map.base_fare)
+    })
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_booking(request):
+    """
+    Book one or more seats on a trip as a single all-or-nothing group.
+
+    Seats are claimed together, every booking is inserted in one statement
+    under a shared group reference, and any conflict rolls back the whole
+    request with the status of each unavailable seat.
+    """
+    trip_id = request.data.get('trip_id')
+    seat_numbers = request.data.get('seat_numbers', [])
+    passenger_name = request.data.get('passenger_name')
+    passenger_phone = request.data.get('passenger_phone')
+
+    if not isinstance(seat_numbers, list) or not seat_numbers:
+        return Response({'error': 'seat_numbers must be a non-empty list'}, status=400)
+    if not passenger_name or not passenger_phone:
+        return Response({'error': 'passenger_name and passenger_phone are required'}, status=400)
+
+    # Convert seat numbers to strings for consistency
+    seat_numbers_str = [str(seat_num) for seat_num in seat_numbers]
+    if len(set(seat_numbers_str)) != len(seat_numbers_str):
+        return Response({'error': 'Each seat can only be requested once'}, status=400)
+
     try:
-        trip_id = request.data.get('trip_id')
-        seat_numbers = request.data.get('seat_numbers', [])
-        passenger_name = request.data.get('passenger_name')
-        passenger_phone = request.data.get('passenger_phone')
-        
-        trip = Trip.objects.get(id=trip_id)
-        bus = trip.bus
-        
-        # Convert seat numbers to strings for consistency
-        seat_numbers_str = [str(seat_num) for seat_num in seat_numbers]
-        
-        # Check if seats are available
-        booked_seat_numbers = list(Booking.objects.filter(
-            trip=trip,
-            status__in=['CONFIRMED', 'PENDING']
-        ).values_list('seat__seat_number', flat=True))
-        
-        for seat_num in seat_numbers_str:
-            if seat_num in booked_seat_numbers:
-                return Response({'error': f'Seat {seat_num} is already booked'}, status=400)
-        
-        # Create bookings for each seat (since model expects one booking per seat)
-        bookings = []
-        total_amount = 0
-        
-        for seat_num in seat_numbers_str:
-            # Find or create bus seat
-            try:
-                from companies.models import BusSeat
-                bus_seat = BusSeat.objects.get(bus=bus, seat_number=seat_num)
-            except BusSeat.DoesNotExist:
-                # Create seat if it doesn't exist - calculate row number for integer seats
-                row_number = ((int(seat_num) - 1) // 4) + 1
-                bus_seat = BusSeat.objects.create(
-                    bus=bus,
-                    seat_number=seat_num,
-                    row_number=row_number,
-                    seat_position='REGULAR',
-                    seat_type='REGULAR'
+        trip = Trip.objects.select_related('bus', 'company').get(id=trip_id)
+    except (Trip.DoesNotExist, ValueError, TypeError):
+        return Response({'error': 'Trip not found'}, status=404)
+    bus = trip.bus
+
+    try:
+        with transaction.atomic():
+            seats = {
+                seat.seat_number: seat
+                for seat in BusSeat.objects.filter(bus=bus, seat_number__in=seat_numbers_str)
+            }
+            missing = [seat_num for seat_num in seat_numbers_str if seat_num not in seats]
+            if missing:
+                # Create seats the app knows by number but the bus does not have yet
+                for bus_seat in BusSeat.objects.bulk_create([
+                    BusSeat(
+                        bus=bus,
+                        seat_number=seat_num,
+                        row_number=((int(seat_num) - 1) // 4) + 1,
+                        seat_position='REGULAR',
+                        seat_type='REGULAR',
+                    )
+                    for seat_num in missing
+                ]):
+                    seats[bus_seat.seat_number] = bus_seat
+                transaction.on_commit(lambda: inventory.invalidate(trip.id))
+
+            bookings = [
+                Booking(
+                    trip=trip,
+                    passenger=request.user,
+                    seat=seats[seat_num],
+                    passenger_name=passenger_name,
+                    passenger_phone=passenger_phone,
+                    base_fare=trip.base_fare,
+                    total_amount=trip.base_fare,
+                    status='PENDING'
                 )
-            
-            booking = Booking.objects.create(
-                trip=trip,
-                passenger=request.user,
-                seat=bus_seat,
-                passenger_name=passenger_name,
-                passenger_phone=passenger_phone,
-                base_fare=trip.base_fare,
-                total_amount=trip.base_fare,
-                status='PENDING'
-            )
-            bookings.append(booking)
-            total_amount += trip.base_fare
-        
-        # Return first booking reference (they'll all have same passenger)
+                for seat_num in seat_numbers_str
+            ]
+
+            # Claim and book every seat atomically; any conflict rolls back all
+            hold_and_book(trip, request.user, bookings)
+    except SeatUnavailable as e:
+        seat_by_id = {seat.id: seat.seat_number for seat in seats.values()}
+        conflicts = [
+            {'seat_number': seat_by_id[seat_id], 'reason': e.reasons.get(seat_id)}
+            for seat_id in e.seat_ids
+        ]
+        taken = [conflict['seat_number'] for conflict in conflicts]
         return Response({
-            'booking_id': bookings[0].id,
-            'booking_reference': bookings[0].booking_reference,
-            'total_amount': float(total_amount),
-            'seat_numbers': seat_numbers,
-            'status': bookings[0].status
-        })
-        
-    except Trip.DoesNotExist:
-        return Response({'error': 'Trip not found'}, status=404)
-    except Exception as e:
-        return Response({'error': str(e)}, status=400)
+            'error': f"Seat {', '.join(taken)} is already booked",
+            'unavailable_seats': taken,
+            'conflicts': conflicts,
+        }, status=400)
+    except ValueError:
+        return Response({'error': 'Seat numbers must match seats on this bus'}, status=400)
+
+    total_amount = sum(booking.total_amount for booking in bookings)
+
+    # First booking keeps the response shape older app versions expect
+    return Response({
+        'booking_id': bookings[0].id,
+        'booking_reference': bookings[0].booking_reference,
+        'group_reference': bookings[0].group_reference,
+        'booking_ids': [booking.id for booking in bookings],
+        'booking_references': [booking.booking_reference for booking in bookings],
+        'total_amount': float(total_amount),
+        'seat_numbers': seat_numbers,
+        'status': bookings[0].status
+    })
@@ -0,0 +1,93 @@
+"""
+Trip seat counters.
+
+``Trip.booked_seats`` counts CONFIRMED bookings. It is changed with a single
+``UPDATE ... SET booked_seats = booked_seats + n`` so concurrent
+confirmations cannot lose updates, and without going through ``Trip.save``
+(which re-runs validation, conflict checks and pricing). The counter is a
+cache of ``COUNT(*)`` over confirmed bookings; ``reconcile_booked_seats``
+recomputes it in bulk and reports any drift.
+"""
+import logging
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from trips.models import Trip, TripSearchIndex
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+COUNTED_STATUS = "CONFIRMED"
+
+
+def adjust_booked_seats(trip_id, delta):
+    """
+    Atomically add ``delta`` to a trip's booked seat count (floored at zero)
+    and keep its search-index row in step. Returns the number of rows updated.
+    """
+    updated = Trip.objects.filter(pk=trip_id).update(
+        booked_seats=Greatest(F("booked_seats") + delta, 0),
+        updated_at=timezone.now(),
+    )
+    # Copied from the floored counter so the index never exceeds capacity
+    TripSearchIndex.objects.filter(trip_id=trip_id).update(
+        remaining_seats=Subquery(
+            Trip.objects.filter(pk=trip_id)
+            .values(remaining=F("available_seats") - F("booked_seats"))[:1]
+        )
+    )
+    return updated
+
+
+def _confirmed_count():
+    return Coalesce(
+        Subquery(
+            Booking.objects.filter(trip=OuterRef("pk"), status=COUNTED_STATUS)
+            .order_by()
+            .values("trip")
+            .annotate(total=Count("id"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def reconcile_booked_seats(trips=None):
+    """
+    Recompute ``booked_seats`` from confirmed bookings for ``trips`` (default:
+    every trip) and correct any counter that drifted.
+
+    Detection and correction are each one statement; the correcting UPDATE
+    recomputes the count itself so it never writes a value read earlier.
+    Returns a list of ``{"trip_id", "recorded", "actual"}`` dicts.
+    """
+    trips = Trip.objects.all() if trips is None else trips
+    drifted = list(
+        trips.annotate(actual=_confirmed_count())
+        .exclude(booked_seats=F("actual"))
+        .values("id", "booked_seats", "actual")
+    )
+    if not drifted:
+        return []
+
+    drifted_ids = [row["id"] for row in drifted]
+    Trip.objects.filter(pk__in=drifted_ids).update(
+        booked_seats=_confirmed_count(), updated_at=timezone.now()
+    )
+
+    from trips import search
+
+    search.refresh_trips(drifted_ids)
+
+    report = [
+        {"trip_id": row["id"], "recorded": row["booked_seats"], "actual": row["actual"]}
+        for row in drifted
+    ]
+    for row in report:
+        logger.warning(
+            f"Trip {row['trip_id']} booked_seats drifted: recorded {row['recorded']}, actual {row['actual']}"
+        )
+    return report
@@ -0,0 +1,109 @@
+"""
+Daily booking report emails.
+
+``queue_daily_reports`` runs nightly from Celery beat. It computes the
+previous day's figures for every active company with one grouped aggregate
+over companies and their bookings, renders the emails in memory and writes
+them to the notification outbox in bulk. Outbox workers then send them in
+batches over one reused mail connection per batch.
+
+Each report carries the idempotency key ``daily-report:<company>:<date>``,
+so re-running a night, or two overlapping runs, never emails a company twice
+for the same day.
+"""
+import datetime
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from companies.models import Company
+from notifications import delivery
+from notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(company_id, report_date):
+    return f"daily-report:{company_id}:{report_date.isoformat()}"
+
+
+def daily_figures(report_date, company_ids=None):
+    """
+    One row of booking figures per company for a local date, in a single
+    query. Active companies are reported unless ``company_ids`` is given.
+    """
+    start = timezone.make_aware(datetime.datetime.combine(report_date, datetime.time.min))
+    end = start + datetime.timedelta(days=1)
+    on_day = Q(bookings__created_at__gte=start, bookings__created_at__lt=end)
+    confirmed = on_day & Q(bookings__status="CONFIRMED")
+
+    if company_ids is None:
+        companies = Company.objects.filter(status="ACTIVE")
+    else:
+        companies = Company.objects.filter(id__in=company_ids)
+    return companies.annotate(
+        total_bookings=Count("bookings", filter=on_day),
+        confirmed_bookings=Count("bookings", filter=confirmed),
+        cancelled_bookings=Count("bookings", filter=on_day & Q(bookings__status="CANCELLED")),
+        total_revenue=Sum("bookings__total_amount", filter=confirmed),
+        direct_bookings=Count("bookings", filter=on_day & Q(bookings__source="DIRECT")),
+        online_bookings=Count("bookings", filter=on_day & Q(bookings__source="MOBILE_APP")),
+    ).values(
+        "id",
+        "name",
+        "email",
+        "total_bookings",
+        "confirmed_bookings",
+        "cancelled_bookings",
+        "total_revenue",
+        "direct_bookings",
+        "online_bookings",
+    ).order_by("id")
+
+
+def render_report(row, report_date):
+    """Subject and body of the report email for a ``daily_figures`` row"""
+    subject = f"Daily Booking Report - {row['name']} - {report_date}"
+    message = f"""
+Daily Booking Report for {row['name']}
+Date: {report_date}
+
+Summary:
+- Total Bookings: {row['total_bookings']}
+- Confirmed: {row['confirmed_bookings']}
+- Cancelled: {row['cancelled_bookings']}
+- Total Revenue: UGX {row['total_revenue'] or 0:,.2f}
+- Direct Bookings: {row['direct_bookings']}
+- Online Bookings: {row['online_bookings']}
+
+This is an automated report from Bookutu.
+"""
+    return subject, message
+
+
+def queue_daily_reports(report_date=None, company_ids=None):
+    """
+    Write the reports for ``report_date`` (yesterday by default) to the
+    outbox. Returns the number queued; reports already queued are skipped.
+    """
+    report_date = report_date or timezone.localdate() - datetime.timedelta(days=1)
+    notifications = []
+    for row in daily_figures(report_date, company_ids):
+        if not row["email"]:
+            continue
+        subject, message = render_report(row, report_date)
+        notifications.append(Notification(
+            channel="EMAIL",
+            kind="REPORT",
+            recipient=row["email"],
+            subject=subject,
+            message=message,
+            idempotency_key=idempotency_key(row["id"], report_date),
+        ))
+
+    with transaction.atomic():
+        queued = delivery.enqueue_many(notifications)
+    logger.info(f"Queued {queued} daily booking reports for {report_date}")
+    return queued
@@ -3,14 +3,22 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
-from django.db.models import Q, Sum, Count
+from django.db import transaction
+from django.db.models import (
+    Q, Sum, Count, F, ExpressionWrapper, IntegerField, OuterRef, Subquery
+)
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from .models import Booking, SeatReservation
 from .serializers import DirectBookingSerializer, BookingSerializer
 from companies.models import BusSeat
 from trips.models import Trip, Route
+from trips.stats import with_route_stats
 from accounts.permissions import CanCreateDirectBooking
 from .utils import generate_ticket, send_sms_ticket
+from . import inventory
+from notifications import audit
+from .holds import SeatUnavailable, hold_seats
 import uuid
 
 User = get_user_model()
@@ -24,14 +32,10 @@ class DirectBookingTripsView(APIView):
     permission_classes = [CanCreateDirectBooking]
 
     def get(self, request):
-        print(f"User: {request.user}")
-        print(f"Authenticated: {request.user.is_authenticated}")
-        print(f"User type: {getattr(request.user, 'user_type', None)}")
-        print(f"Company: {getattr(request.user, 'company', None)}")
-
         company = request.user.company
         route_id = request.query_params.get("route_id")
         departure_date = request.query_params.get("departure_date")
+        include_occupancy = request.query_params.get("occupancy", "").lower() in ("1", "true")
 
         if not route_id or not departure_date:
             return Response(
@@ -49,7 +53,7 @@ class DirectBookingTripsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get available trips for the route and date
+        # Bookable trips with free seats, filtered and joined in one query
         trips = (
             Trip.objects.filter(
                 company=company,
@@ -61,41 +65,85 @@ class DirectBookingTripsView(APIView):
                 # Only trips that are bookable
                 departure_date__gte=timezone.now().date()
             )
+            .annotate(
+                free_seats=ExpressionWrapper(
+                    F("available_seats") - F("booked_seats"), output_field=IntegerField()
+                )
+            )
+            .filter(free_seats__gt=0)
+            .select_related("bus", "driver")
             .order_by("departure_time")
         )
+        if include_occupancy:
+            trips = _with_occupancy(trips)
 
         trips_data = []
         for trip in trips:
-            if trip.remaining_seats > 0:
-                trips_data.append(
-                    {
-                        "id": trip.id,
-                        "departure_time": trip.departure_time,
-                        "arrival_time": trip.arrival_time,
-                        "bus_registration": trip.bus.license_plate,
-                        "bus_type": trip.bus.bus_type,
-                        "available_seats": trip.remaining_seats,
-                        "total_seats": trip.available_seats,
-                        "base_fare": trip.base_fare,
-                        "driver_name": (
-                            trip.driver.get_full_name() if trip.driver else None
-                        ),  # Use driver object
-                        "driver_phone": (
-                            trip.driver.phone_number if trip.driver else None
-                        ),  # Use driver object
-                        "features": {
-                            "has_ac": trip.bus.has_ac,
-                            "has_wifi": trip.bus.has_wifi,
-                            "has_charging_ports": trip.bus.has_charging_ports,
-                            "has_entertainment": trip.bus.has_entertainment,
-                            "has_restroom": trip.bus.has_restroom,
-                        },
-                    }
-                )
+            trip_data = {
+                "id": trip.id,
+                "departure_time": trip.departure_time,
+                "arrival_time": trip.arrival_time,
+                "bus_registration": trip.bus.license_plate,
+                "bus_type": trip.bus.bus_type,
+                "available_seats": trip.free_seats,
+                "total_seats": trip.available_seats,
+                "base_fare": trip.base_fare,
+                "driver_name": (
+                    trip.driver.get_full_name() if trip.driver else None
+                ),  # Use driver object
+                "driver_phone": (
+                    trip.driver.phone_number if trip.driver else None
+                ),  # Use driver object
+                "features": {
+                    "has_ac": trip.bus.has_ac,
+                    "has_wifi": trip.bus.has_wifi,
+                    "has_charging_ports": trip.bus.has_charging_ports,
+                    "has_entertainment": trip.bus.has_entertainment,
+                    "has_restroom": trip.bus.has_restroom,
+                },
+            }
+            if include_occupancy:
+                trip_data["occupancy"] = {
+                    "confirmed": trip.booked_seats,
+                    "pending": trip.pending_bookings,
+                    "held": trip.held_seats,
+                    "occupancy_percentage": round(trip.occupancy_percentage, 1),
+                }
+            trips_data.append(trip_data)
 
         return Response({"trips": trips_data})
 
 
+def _with_occupancy(trips):
+    """
+    Annotate trips with pending bookings and active seat holds.
+
+    Counted in correlated subqueries so the two relations do not multiply
+    each other's rows.
+    """
+    now = timezone.now()
+    pending = (
+        Booking.objects.filter(trip=OuterRef("pk"), status="PENDING")
+        .order_by()
+        .values("trip")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    held = (
+        SeatReservation.objects.filter(
+            trip=OuterRef("pk"), is_active=True, expires_at__gt=now
+        )
+        .order_by()
+        .values("trip")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return trips.annotate(
+        pending_bookings=Coalesce(Subquery(pending, output_field=IntegerField()), 0),
+        held_seats=Coalesce(Subquery(held, output_field=IntegerField()), 0),
+    )
+
+
 class DirectBookingSeatsView(APIView):
     """
     Get available seats for a specific trip
@@ -107,52 +155,23 @@ class DirectBookingSeatsView(APIView):
         company = request.user.company
 
         try:
-            trip = Trip.objects.get(id=trip_id, company=company)
+            seat_map = inventory.get_seat_map(trip_id)
         except Trip.DoesNotExist:
+            seat_map = None
+        if seat_map is None or seat_map.company_id != company.id:
             return Response(
                 {"error": "Trip not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get all seats for the bus
-        all_seats = trip.bus.seats.all().order_by("row_number", "seat_position")
-
-        # Get booked seats
-        booked_seats = set(
-            Booking.objects.filter(
-                trip=trip, status__in=["PENDING", "CONFIRMED"]
-            ).values_list("seat_id", flat=True)
-        )
-
-        # Get temporarily reserved seats (not expired)
-        reserved_seats = set(
-            SeatReservation.objects.filter(
-                trip=trip, is_active=True, expires_at__gt=timezone.now()
-            )
-            .exclude(user=request.user)  # Allow user to see their own reservations
-            .values_list("seat_id", flat=True)
-        )
-
+        # Seat statuses come from the cached bitmap; the user's own
+        # reservations are shown as available to them
         seats_data = []
-        for seat in all_seats:
-            seat_status = "available"
-            if seat.id in booked_seats:
-                seat_status = "booked"
-            elif seat.id in reserved_seats:
-                seat_status = "reserved"
-
+        for seat, seat_status in seat_map.seat_statuses(user_id=request.user.id):
             seats_data.append(
                 {
-                    "id": seat.id,
-                    "seat_number": seat.seat_number,
-                    "row_number": seat.row_number,
-                    "seat_position": seat.seat_position,
-                    "seat_type": seat.seat_type,
-                    "is_window": seat.is_window,
-                    "is_aisle": seat.is_aisle,
-                    "has_extra_legroom": seat.has_extra_legroom,
-                    "price_multiplier": seat.price_multiplier,
+                    **seat,
                     "status": seat_status,
-                    "price": float(trip.base_fare * seat.price_multiplier),
+                    "price": float(seat_map.base_fare * seat["price_multiplier"]),
                 }
             )
 
@@ -166,10 +185,10 @@ class DirectBookingSeatsView(APIView):
 
         return Response(
             {
-                "trip_id": trip.id,
-                "bus_registration": trip.bus.license_plate,
-                "total_seats": trip.bus.total_seats,
-                "available_seats": trip.remaining_seats,
+                "trip_id": seat_map.trip_id,
+                "bus_registration": seat_map.bus_registration,
+                "total_seats": seat_map.bus_capacity,
+                "available_seats": seat_map.remaining_seats,
                 "seats": seats_data,
                 "seats_by_row": seats_by_row,
             }
@@ -201,40 +220,14 @@ class SeatReservationView(APIView):
                 {"error": "Trip or seat not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # Check if seat is already booked
-        if Booking.objects.filter(
-            trip=trip, seat=seat, status__in=["PENDING", "CONFIRMED"]
-        ).exists():
-            return Response(
-                {"error": "Seat is already booked"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Check if seat is already reserved by someone else
-        existing_reservation = (
-            SeatReservation.objects.filter(
-                trip=trip, seat=seat, is_active=True, expires_at__gt=timezone.now()
-            )
-            .exclude(user=request.user)
-            .first()
-        )
-
-        if existing_reservation:
+        try:
+            (reservation,) = hold_seats(trip, [seat], request.user)
+        except SeatUnavailable:
             return Response(
-                {"error": "Seat is temporarily reserved"},
+                {"error": "Seat is already booked or temporarily reserved"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Create or update reservation
-        reservation, created = SeatReservation.objects.update_or_create(
-            trip=trip,
-            seat=seat,
-            user=request.user,
-            defaults={
-                "is_active": True,
-                "expires_at": timezone.now() + timezone.timedelta(minutes=15),
-            },
-        )
-
         return Response(
             {
                 "message": "Seat reserved successfully",
@@ -249,8 +242,9 @@ class SeatReservationView(APIView):
         seat_id = request.data.get("seat_id")
 
         SeatReservation.objects.filter(
-            trip_id=trip_id, seat_id=seat_id, user=request.user
+            trip_id=trip_id, seat_id=seat_id, user=request.user, is_active=True
         ).update(is_active=False)
+        inventory.release_user_holds(trip_id, request.user.id, seat_id=seat_id)
 
         return Response({"message": "Seat reservation released"})
 
@@ -271,27 +265,36 @@ class DirectBookingCreateView(APIView):
 
         if serializer.is_valid():
             try:
-                booking = serializer.save()
+                with transaction.atomic():
+                    booking = serializer.save()
+
+                    # Generate ticket
+                    ticket_data = generate_ticket(booking)
+
+                    # The SMS ticket is written to the outbox with the booking;
+                    # delivery happens off the request path
+                    sms = send_sms_ticket(booking, ticket_data)
+                    audit.log(
+                        "BOOKING_CREATED",
+                        f"Direct booking {booking.booking_reference}",
+                        request=request,
+                        target=booking,
+                        metadata={"source": booking.source, "amount": str(booking.total_amount)},
+                    )
 
                 # Release any seat reservations for this user and trip
                 SeatReservation.objects.filter(
                     trip=booking.trip, user=request.user
                 ).update(is_active=False)
-
-                # Generate ticket
-                ticket_data = generate_ticket(booking)
-
-                # Send SMS if phone number provided
-                if booking.passenger_phone:
-                    sms_sent = send_sms_ticket(booking, ticket_data)
-                else:
-                    sms_sent = False
+                inventory.release_user_holds(booking.trip_id, request.user.id)
 
                 response_data = BookingSerializer(booking).data
                 response_data.update(
                     {
                         "ticket": ticket_data,
-                        "sms_sent": sms_sent,
+                        # sms_sent is kept for existing clients and means queued
+                        "sms_sent": sms is not None,
+                        "sms_status": sms.status if sms else None,
                         "message": "Direct booking created successfully",
                     }
                 )
@@ -317,25 +320,15 @@ class DirectBookingRoutesView(APIView):
     def get(self, request):
         company = request.user.company
 
-        # Get routes with upcoming trips
+        # Routes with upcoming trips, counted in the same query
         routes = (
-            Route.objects.filter(
-                company=company,
-                is_active=True,
-                trips__departure_date__gte=timezone.now().date(),
-                trips__status="SCHEDULED",
-            )
-            .distinct()
+            with_route_stats(Route.objects.filter(company=company, is_active=True))
+            .filter(upcoming_trips__gt=0)
             .order_by("origin_city", "destination_city")
         )
 
         routes_data = []
         for route in routes:
-            # Count upcoming trips for this route
-            upcoming_trips = route.trips.filter(
-                departure_date__gte=timezone.now().date(), status="SCHEDULED"
-            ).count()
-
             routes_data.append(
                 {
                     "id": route.id,
@@ -347,7 +340,7 @@ class DirectBookingRoutesView(APIView):
                     "distance_km": route.distance_km,
                     "estimated_duration_hours": route.estimated_duration_hours,
                     "base_fare": route.base_fare,
-                    "upcoming_trips": upcoming_trips,
+                    "upcoming_trips": route.upcoming_trips,
                     "route_display": f"{route.origin_city} → {route.destination_city}",
                 }
             )
@@ -392,17 +385,25 @@ def resend_sms_ticket(request, booking_id):
             {"error": "No phone number available"}, status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Generate and send SMS ticket
+    # Generate and queue the SMS ticket
     ticket_data = generate_ticket(booking)
-    sms_sent = send_sms_ticket(booking, ticket_data)
+    sms = send_sms_ticket(booking, ticket_data)
+
+    if sms is None:
+        return Response(
+            {"error": "SMS delivery is not configured", "sms_sent": False},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
 
     return Response(
         {
-            "message": (
-                "SMS ticket sent successfully" if sms_sent else "Failed to send SMS"
-            ),
-            "sms_sent": sms_sent,
-        }
+            "message": "SMS ticket queued for delivery",
+            # sms_sent is kept for existing clients and means queued
+            "sms_sent": True,
+            "sms_status": sms.status,
+            "notification_id": sms.id,
+        },
+        status=status.HTTP_202_ACCEPTED,
     )
 
 
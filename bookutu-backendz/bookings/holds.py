@@ -0,0 +1,211 @@
+"""
+Atomic seat holds and hold-to-booking conversion.
+
+A seat on a trip can carry at most one active claim. Holds rely on the
+``(trip, seat)`` uniqueness of SeatReservation: existing rows for the
+requested seats are locked once, rows that are free (inactive, expired or
+already ours) are taken over with one UPDATE and missing rows are inserted
+with one bulk INSERT, so a losing writer gets a conflict or an
+IntegrityError instead of a silent overwrite. Bookings are protected by the
+partial unique constraint on active (PENDING/CONFIRMED) bookings, so two
+conversions can never both succeed for one seat.
+
+Multi-seat holds and conversions run in a single transaction, issue a
+constant number of queries regardless of group size and are all-or-nothing;
+every conflicting seat is reported in ``SeatUnavailable``.
+"""
+import uuid
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Booking, SeatReservation
+from . import inventory
+from .counters import COUNTED_STATUS, adjust_booked_seats
+
+HOLD_MINUTES = 15
+
+CONFLICT_BOOKED = "booked"
+CONFLICT_HELD = "held"
+
+
+class SeatUnavailable(Exception):
+    """
+    Raised when one or more requested seats are booked or held by someone else
+    """
+
+    def __init__(self, seat_ids, reasons=None):
+        self.seat_ids = list(seat_ids)
+        # {seat_id: CONFLICT_BOOKED | CONFLICT_HELD}
+        self.reasons = reasons or {seat_id: CONFLICT_BOOKED for seat_id in self.seat_ids}
+        super().__init__(f"Seats unavailable: {self.seat_ids}")
+
+
+def _raise_conflicts(conflicts):
+    if conflicts:
+        raise SeatUnavailable(sorted(conflicts), conflicts)
+
+
+def _booked_conflicts(trip_id, seat_ids):
+    return {
+        seat_id: CONFLICT_BOOKED
+        for seat_id in Booking.objects.filter(
+            trip_id=trip_id,
+            seat_id__in=seat_ids,
+            status__in=inventory.ACTIVE_BOOKING_STATUSES,
+        ).values_list("seat_id", flat=True)
+    }
+
+
+def generate_group_reference():
+    """Reference shared by every booking made in one multi-seat request"""
+    timestamp = timezone.now().strftime("%Y%m%d")
+    return f"GB{timestamp}{str(uuid.uuid4())[:6].upper()}"
+
+
+def hold_seats(trip, seats, user, minutes=HOLD_MINUTES):
+    """
+    Hold every seat in ``seats`` for ``user`` or none of them.
+
+    Returns the list of active SeatReservation rows.
+    """
+    now = timezone.now()
+    expires_at = now + timezone.timedelta(minutes=minutes)
+    seat_ids = [seat.id for seat in seats]
+
+    with transaction.atomic():
+        conflicts = _booked_conflicts(trip.id, seat_ids)
+
+        existing = {
+            reservation.seat_id: reservation
+            for reservation in SeatReservation.objects.select_for_update().filter(
+                trip=trip, seat_id__in=seat_ids
+            )
+        }
+        for seat_id, reservation in existing.items():
+            if (
+                reservation.is_active
+                and reservation.expires_at > now
+                and reservation.user_id != user.id
+            ):
+                conflicts.setdefault(seat_id, CONFLICT_HELD)
+        _raise_conflicts(conflicts)
+
+        if existing:
+            SeatReservation.objects.filter(pk__in=[r.pk for r in existing.values()]).update(
+                user=user, is_active=True, expires_at=expires_at
+            )
+        missing = [seat_id for seat_id in seat_ids if seat_id not in existing]
+        if missing:
+            try:
+                with transaction.atomic():
+                    SeatReservation.objects.bulk_create([
+                        SeatReservation(
+                            trip=trip, seat_id=seat_id, user=user, expires_at=expires_at
+                        )
+                        for seat_id in missing
+                    ])
+            except IntegrityError:
+                # Another writer inserted a hold for one of these seats first
+                _raise_conflicts({
+                    seat_id: CONFLICT_HELD
+                    for seat_id in SeatReservation.objects.filter(
+                        trip=trip, seat_id__in=missing, is_active=True
+                    ).exclude(user=user).values_list("seat_id", flat=True)
+                } or {seat_id: CONFLICT_HELD for seat_id in missing})
+
+        inventory.hold_seats(trip.id, seat_ids, user.id, expires_at)
+
+        return list(
+            SeatReservation.objects.filter(
+                trip=trip, seat_id__in=seat_ids, user=user
+            ).select_related("seat")
+        )
+
+
+def release_holds(trip, user, seats=None):
+    """Release ``user``'s holds on a trip, optionally only for ``seats``"""
+    reservations = SeatReservation.objects.filter(
+        trip=trip, user=user, is_active=True
+    )
+    if seats is not None:
+        reservations = reservations.filter(seat__in=seats)
+    released = reservations.update(is_active=False)
+    if seats is None:
+        inventory.release_user_holds(trip.id, user.id)
+    else:
+        for seat in seats:
+            inventory.release_user_holds(trip.id, user.id, seat_id=seat.id)
+    return released
+
+
+def convert_holds(user, bookings, group_reference=""):
+    """
+    Insert unsaved ``bookings`` for seats currently held by ``user``.
+
+    All bookings must be for the same trip; they are written with one bulk
+    INSERT and share ``group_reference``. The holds are consumed on success;
+    on any conflict nothing is written and SeatUnavailable lists the
+    offending seats.
+    """
+    if not bookings:
+        return []
+    trip = bookings[0].trip
+    seat_ids = [booking.seat_id for booking in bookings]
+
+    with transaction.atomic():
+        held = set(
+            SeatReservation.objects.select_for_update()
+            .filter(
+                trip=trip,
+                seat_id__in=seat_ids,
+                user=user,
+                is_active=True,
+                expires_at__gt=timezone.now(),
+            )
+            .values_list("seat_id", flat=True)
+        )
+        _raise_conflicts({
+            seat_id: CONFLICT_HELD for seat_id in seat_ids if seat_id not in held
+        })
+
+        # bulk_create bypasses Booking.save, so fill in what it derives
+        for booking in bookings:
+            booking.company_id = trip.company_id
+            booking.group_reference = group_reference
+            if not booking.booking_reference:
+                booking.booking_reference = booking.generate_booking_reference()
+        try:
+            with transaction.atomic():
+                Booking.objects.bulk_create(bookings)
+        except IntegrityError:
+            _raise_conflicts(
+                _booked_conflicts(trip.id, seat_ids)
+                or {seat_id: CONFLICT_BOOKED for seat_id in seat_ids}
+            )
+
+        SeatReservation.objects.filter(
+            trip=trip, seat_id__in=seat_ids, user=user
+        ).update(is_active=False)
+        # Neither bulk write fires signals; apply both seat-map changes here
+        inventory.book_held_seats(trip.id, seat_ids)
+        # Bookings inserted already confirmed (direct sales) never pass
+        # through confirm_booking's increment, so count them here
+        confirmed = sum(booking.status == COUNTED_STATUS for booking in bookings)
+        if confirmed:
+            adjust_booked_seats(trip.id, confirmed)
+
+    return bookings
+
+
+def hold_and_book(trip, user, bookings, minutes=HOLD_MINUTES, group_reference=None):
+    """
+    Hold the seats of ``bookings`` and convert them in one transaction.
+
+    Multi-seat requests get a generated group reference unless one is given.
+    """
+    if group_reference is None:
+        group_reference = generate_group_reference() if len(bookings) > 1 else ""
+    with transaction.atomic():
+        hold_seats(trip, [booking.seat for booking in bookings], user, minutes)
+        return convert_holds(user, bookings, group_reference)
@@ -0,0 +1,399 @@
+"""
+Per-trip seat inventory kept in the cache.
+
+Each trip has one cache entry holding the bus seat layout plus two bitsets
+keyed by seat index: ``booked`` (PENDING/CONFIRMED bookings) and ``held``
+(active seat reservations). Seat-map endpoints read the entry with a single
+cache lookup. Booking and reservation writes flip the affected bits instead
+of forcing a rebuild; anything that cannot be applied in place drops the
+entry so the next read rebuilds it from the database.
+
+Every write also bumps a per-trip generation counter, and entries are stamped
+with the generation they were built or last mutated at. A rebuild that read
+the database before a concurrent booking committed is stamped with the old
+generation, so it is ignored on the next read instead of being served until
+it expires.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_BOOKING_STATUSES = ("PENDING", "CONFIRMED")
+
+SEAT_AVAILABLE = "available"
+SEAT_BOOKED = "booked"
+SEAT_RESERVED = "reserved"
+
+SEAT_FIELDS = (
+    "id",
+    "seat_number",
+    "row_number",
+    "seat_position",
+    "seat_type",
+    "is_window",
+    "is_aisle",
+    "has_extra_legroom",
+    "price_multiplier",
+)
+
+
+def _cache_key(trip_id):
+    return f"seat_map:{trip_id}"
+
+
+def _lock_key(trip_id):
+    return f"seat_map_lock:{trip_id}"
+
+
+def _generation_key(trip_id):
+    return f"seat_map_generation:{trip_id}"
+
+
+# Generations outlive the entries they guard by a wide margin; if one does
+# expire it restarts at 0, which only ever makes older entries look stale
+GENERATION_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_timeout():
+    return getattr(settings, "SEAT_MAP_CACHE_TIMEOUT", 300)
+
+
+class SeatMap:
+    """
+    Read-only view over a cached seat-map entry
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def trip_id(self):
+        return self.data["trip_id"]
+
+    @property
+    def company_id(self):
+        return self.data["company_id"]
+
+    @property
+    def bus_capacity(self):
+        return self.data["bus_capacity"]
+
+    @property
+    def bus_registration(self):
+        return self.data["bus_registration"]
+
+    @property
+    def base_fare(self):
+        return self.data["base_fare"]
+
+    @property
+    def available_seats(self):
+        return self.data["available_seats"]
+
+    @property
+    def version(self):
+        return self.data["version"]
+
+    @property
+    def etag_version(self):
+        """Changes whenever the entry is rebuilt or mutated"""
+        return f"{self.data.get('built_at', 0)}.{self.version}"
+
+    @property
+    def seats(self):
+        return self.data["seats"]
+
+    @property
+    def booked_count(self):
+        return bin(self.data["booked"]).count("1")
+
+    @property
+    def remaining_seats(self):
+        return max(self.available_seats - self.booked_count, 0)
+
+    def _held_mask(self, exclude_user_id=None):
+        """Bitmask of unexpired holds, optionally ignoring one user's own holds"""
+        if not self.data["held"]:
+            return 0
+        now = time.time()
+        mask = 0
+        for index, (user_id, expires_at) in self.data["holds"].items():
+            if expires_at > now and user_id != exclude_user_id:
+                mask |= 1 << index
+        return mask & self.data["held"]
+
+    def status_for(self, index, held_mask):
+        if self.data["booked"] >> index & 1:
+            return SEAT_BOOKED
+        if held_mask >> index & 1:
+            return SEAT_RESERVED
+        return SEAT_AVAILABLE
+
+    def seat_statuses(self, user_id=None):
+        """Yield ``(seat, status)`` pairs in layout order"""
+        held_mask = self._held_mask(exclude_user_id=user_id)
+        for index, seat in enumerate(self.seats):
+            yield seat, self.status_for(index, held_mask)
+
+    def booked_seat_ids(self):
+        booked = self.data["booked"]
+        return {
+            seat["id"] for index, seat in enumerate(self.seats) if booked >> index & 1
+        }
+
+    def booked_seat_numbers(self):
+        booked = self.data["booked"]
+        return [
+            seat["seat_number"]
+            for index, seat in enumerate(self.seats)
+            if booked >> index & 1
+        ]
+
+    def held_seat_ids(self, exclude_user_id=None):
+        held_mask = self._held_mask(exclude_user_id=exclude_user_id)
+        return {
+            seat["id"] for index, seat in enumerate(self.seats) if held_mask >> index & 1
+        }
+
+
+def build_seat_map(trip):
+    """Rebuild a trip's seat-map entry from the database"""
+    from django.utils import timezone
+    from .models import Booking, SeatReservation
+
+    seats = list(
+        trip.bus.seats.order_by("row_number", "seat_position", "id").values(
+            *SEAT_FIELDS
+        )
+    )
+    index_by_seat = {seat["id"]: index for index, seat in enumerate(seats)}
+
+    booked = 0
+    for seat_id in Booking.objects.filter(
+        trip_id=trip.id, status__in=ACTIVE_BOOKING_STATUSES
+    ).values_list("seat_id", flat=True):
+        if seat_id in index_by_seat:
+            booked |= 1 << index_by_seat[seat_id]
+
+    held = 0
+    holds = {}
+    for seat_id, user_id, expires_at in SeatReservation.objects.filter(
+        trip_id=trip.id, is_active=True, expires_at__gt=timezone.now()
+    ).values_list("seat_id", "user_id", "expires_at"):
+        if seat_id in index_by_seat:
+            index = index_by_seat[seat_id]
+            held |= 1 << index
+            holds[index] = (user_id, expires_at.timestamp())
+
+    return {
+        "trip_id": trip.id,
+        "company_id": trip.company_id,
+        "bus_id": trip.bus_id,
+        "bus_capacity": trip.bus.total_seats,
+        "bus_registration": trip.bus.license_plate,
+        "base_fare": trip.base_fare,
+        "available_seats": trip.available_seats,
+        "seats": seats,
+        "booked": booked,
+        "held": held,
+        "holds": holds,
+        "version": 1,
+        # Distinguishes rebuilds, whose version restarts at 1
+        "built_at": time.time_ns(),
+    }
+
+
+def get_seat_map(trip_id):
+    """
+    Return the SeatMap for a trip, rebuilding it on a cache miss.
+
+    Raises ``Trip.DoesNotExist`` for unknown trips.
+    """
+    key, generation_key = _cache_key(trip_id), _generation_key(trip_id)
+    cached = cache.get_many([key, generation_key])
+    generation = cached.get(generation_key, 0)
+    data = cached.get(key)
+    if data is None or data.get("generation") != generation:
+        from trips.models import Trip
+
+        trip = Trip.objects.select_related("bus").get(id=trip_id)
+        data = build_seat_map(trip)
+        # Stamped with the generation read before the database was; a write
+        # committing meanwhile bumps it and this entry is never served
+        data["generation"] = generation
+        cache.set(key, data, _cache_timeout())
+    return SeatMap(data)
+
+
+def _bump_generation(trip_id):
+    key = _generation_key(trip_id)
+    cache.add(key, 0, GENERATION_TIMEOUT)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add and incr
+        cache.set(key, 1, GENERATION_TIMEOUT)
+        return 1
+
+
+def invalidate(trip_id):
+    _bump_generation(trip_id)
+    cache.delete(_cache_key(trip_id))
+
+
+def invalidate_bus(bus_id):
+    """Drop seat maps for every upcoming trip on a bus (layout changed)"""
+    from django.utils import timezone
+    from trips.models import Trip
+
+    trip_ids = Trip.objects.filter(
+        bus_id=bus_id, departure_date__gte=timezone.now().date()
+    ).values_list("id", flat=True)
+    for trip_id in trip_ids:
+        invalidate(trip_id)
+
+
+def _apply(trip_id, mutate):
+    """
+    Apply ``mutate(data)`` to the cached entry under a short lock.
+
+    The trip's generation is bumped first, so an entry being rebuilt
+    concurrently from pre-commit data is never served. Entries that are not
+    cached are left alone; the next read rebuilds them. If the lock is busy
+    or the mutation cannot be applied, the entry is dropped rather than
+    risking a lost update.
+    """
+    key = _cache_key(trip_id)
+    lock = _lock_key(trip_id)
+    generation = _bump_generation(trip_id)
+    if not cache.add(lock, 1, timeout=5):
+        cache.delete(key)
+        return
+    try:
+        data = cache.get(key)
+        if data is None:
+            return
+        if data.get("generation") != generation - 1 or mutate(data) is False:
+            # Built before an earlier write, or not patchable in place
+            cache.delete(key)
+            return
+        data["version"] += 1
+        data["generation"] = generation
+        cache.set(key, data, _cache_timeout())
+    finally:
+        cache.delete(lock)
+
+
+def _schedule(trip_id, mutate):
+    transaction.on_commit(lambda: _apply(trip_id, mutate))
+
+
+def _seat_index(data, seat_id):
+    for index, seat in enumerate(data["seats"]):
+        if seat["id"] == seat_id:
+            return index
+    return None
+
+
+def mark_booked(trip_id, seat_id):
+    def mutate(data):
+        index = _seat_index(data, seat_id)
+        if index is None:
+            return False
+        data["booked"] |= 1 << index
+
+    _schedule(trip_id, mutate)
+
+
+def mark_unbooked(trip_id, seat_id):
+    def mutate(data):
+        index = _seat_index(data, seat_id)
+        if index is None:
+            return False
+        data["booked"] &= ~(1 << index)
+
+    _schedule(trip_id, mutate)
+
+
+def hold_seat(trip_id, seat_id, user_id, expires_at):
+    def mutate(data):
+        index = _seat_index(data, seat_id)
+        if index is None:
+            return False
+        data["held"] |= 1 << index
+        data["holds"][index] = (user_id, expires_at.timestamp())
+
+    _schedule(trip_id, mutate)
+
+
+def hold_seats(trip_id, seat_ids, user_id, expires_at):
+    """Mark several seats held by ``user_id`` in one cache update"""
+
+    def mutate(data):
+        indexes = [_seat_index(data, seat_id) for seat_id in seat_ids]
+        if None in indexes:
+            return False
+        for index in indexes:
+            data["held"] |= 1 << index
+            data["holds"][index] = (user_id, expires_at.timestamp())
+
+    _schedule(trip_id, mutate)
+
+
+def book_held_seats(trip_id, seat_ids):
+    """Move several seats from held to booked in one cache update"""
+
+    def mutate(data):
+        indexes = [_seat_index(data, seat_id) for seat_id in seat_ids]
+        if None in indexes:
+            return False
+        for index in indexes:
+            data["booked"] |= 1 << index
+            data["held"] &= ~(1 << index)
+            data["holds"].pop(index, None)
+
+    _schedule(trip_id, mutate)
+
+
+def release_hold(trip_id, seat_id):
+    def mutate(data):
+        index = _seat_index(data, seat_id)
+        if index is None:
+            return False
+        data["held"] &= ~(1 << index)
+        data["holds"].pop(index, None)
+
+    _schedule(trip_id, mutate)
+
+
+def release_user_holds(trip_id, user_id, seat_id=None):
+    """Clear holds owned by ``user_id`` (optionally only on one seat)"""
+
+    def mutate(data):
+        target = None if seat_id is None else _seat_index(data, seat_id)
+        for index, (owner_id, _) in list(data["holds"].items()):
+            if owner_id != user_id or (target is not None and index != target):
+                continue
+            data["held"] &= ~(1 << index)
+            del data["holds"][index]
+
+    _schedule(trip_id, mutate)
+
+
+def sync_trip(trip):
+    """Drop the cached entry if trip-level fields it depends on changed"""
+    data = cache.get(_cache_key(trip.id))
+    if data is None:
+        return
+    if (
+        data["bus_id"] != trip.bus_id
+        or data["company_id"] != trip.company_id
+        or data["base_fare"] != trip.base_fare
+        or data["available_seats"] != trip.available_seats
+    ):
+        transaction.on_commit(lambda: invalidate(trip.id))
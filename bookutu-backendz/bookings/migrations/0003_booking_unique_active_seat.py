@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:14
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.utils.timezone
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = ['PENDING', 'CONFIRMED']
+
+
+def cancel_duplicate_seat_bookings(apps, schema_editor):
+    # Seats could be double booked before the constraint. Keep one active
+    # booking per trip seat, confirmed before pending and then the oldest, and
+    # cancel the rest. Trip booked_seats counters are corrected by the
+    # periodic reconcile_booked_seats task.
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingCancellation = apps.get_model('bookings', 'BookingCancellation')
+    duplicated = (
+        Booking.objects.filter(status__in=ACTIVE)
+        .values('trip_id', 'seat_id')
+        .annotate(active=Count('id'))
+        .filter(active__gt=1)
+        .order_by()
+    )
+    now = django.utils.timezone.now()
+    # Active bookings that somehow already have a cancellation record
+    recorded = set(
+        BookingCancellation.objects.filter(booking__status__in=ACTIVE)
+        .values_list('booking_id', flat=True)
+    )
+    for group in duplicated:
+        bookings = sorted(
+            Booking.objects.filter(
+                trip_id=group['trip_id'], seat_id=group['seat_id'], status__in=ACTIVE
+            ),
+            key=lambda booking: (booking.status != 'CONFIRMED', booking.created_at, booking.id),
+        )
+        kept, extra = bookings[0], bookings[1:]
+        Booking.objects.filter(id__in=[booking.id for booking in extra]).update(
+            status='CANCELLED', cancelled_at=now, updated_at=now
+        )
+        BookingCancellation.objects.bulk_create([
+            BookingCancellation(
+                booking_id=booking.id,
+                reason=f'Duplicate booking of seat {group["seat_id"]}; kept {kept.booking_reference}',
+            )
+            for booking in extra
+            if booking.id not in recorded
+        ])
+        logger.warning(
+            'Cancelled duplicate seat bookings %s (kept %s)',
+            ', '.join(booking.booking_reference for booking in extra),
+            kept.booking_reference,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_seat_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'CONFIRMED'])), fields=('trip', 'seat'), name='unique_active_booking_per_trip_seat'),
+        ),
+    ]
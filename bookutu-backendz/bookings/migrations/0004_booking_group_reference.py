@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_unique_active_seat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='group_reference',
+            field=models.CharField(blank=True, db_index=True, max_length=20),
+        ),
+    ]
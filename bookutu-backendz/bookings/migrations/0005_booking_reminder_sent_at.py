@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_group_reference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('reminder_sent_at__isnull', True), ('status', 'CONFIRMED')), fields=['trip'], name='booking_reminder_due_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 import logging
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from accounts.managers import TenantAwareManager
@@ -34,6 +34,8 @@ class Booking(models.Model):
 
     # Unique booking reference
     booking_reference = models.CharField(max_length=20, unique=True, editable=False)
+    # Shared by all bookings made together in one multi-seat request
+    group_reference = models.CharField(max_length=20, blank=True, db_index=True)
 
     # Relationships
     company = models.ForeignKey(
@@ -78,6 +80,8 @@ class Booking(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     confirmed_at = models.DateTimeField(null=True, blank=True)
     cancelled_at = models.DateTimeField(null=True, blank=True)
+    # Set when the pre-departure reminder is claimed by the sweep
+    reminder_sent_at = models.DateTimeField(null=True, blank=True)
 
     objects = TenantAwareManager()
 
@@ -91,6 +95,20 @@ class Booking(models.Model):
             models.Index(fields=["trip", "status"]),
             models.Index(fields=["passenger", "status"]),
             models.Index(fields=["booking_reference"]),
+            # Confirmed bookings still owed a departure reminder
+            models.Index(
+                fields=["trip"],
+                condition=models.Q(status="CONFIRMED", reminder_sent_at__isnull=True),
+                name="booking_reminder_due_idx",
+            ),
+        ]
+        constraints = [
+            # At most one active booking per seat on a trip
+            models.UniqueConstraint(
+                fields=["trip", "seat"],
+                condition=models.Q(status__in=["PENDING", "CONFIRMED"]),
+                name="unique_active_booking_per_trip_seat",
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -114,34 +132,40 @@ class Booking(models.Model):
 
     def confirm_booking(self):
         """Confirm the booking"""
-        logger.info(f"Confirming booking {self.booking_reference} for trip {self.trip}")
+        from .counters import adjust_booked_seats
+
+        logger.info(f"Confirming booking {self.booking_reference} for trip {self.trip_id}")
+        was_confirmed = self.status == "CONFIRMED"
         self.status = "CONFIRMED"
         self.confirmed_at = timezone.now()
-        self.save()
-
-        # Update trip booked seats count
-        old_booked = self.trip.booked_seats
-        self.trip.booked_seats += 1
-        self.trip.save()
-        logger.info(
-            f"Updated trip {self.trip} booked seats: {old_booked} -> {self.trip.booked_seats}"
-        )
+        with transaction.atomic():
+            self.save()
+            # Atomic counter update; bypasses Trip.save validation and pricing
+            if not was_confirmed:
+                adjust_booked_seats(self.trip_id, 1)
+        if not was_confirmed:
+            logger.info(f"Incremented booked seats for trip {self.trip_id}")
+            self._refresh_cached_trip_counter()
 
     def cancel_booking(self, reason=""):
         """Cancel the booking"""
-        logger.info(f"Cancelling booking {self.booking_reference} for trip {self.trip}")
+        from .counters import adjust_booked_seats
+        from .utils import send_sms_cancellation
+
+        logger.info(f"Cancelling booking {self.booking_reference} for trip {self.trip_id}")
+        was_confirmed = self.status == "CONFIRMED"
         self.status = "CANCELLED"
         self.cancelled_at = timezone.now()
-        self.save()
-
-        # Update trip booked seats count
-        if self.trip.booked_seats > 0:
-            old_booked = self.trip.booked_seats
-            self.trip.booked_seats -= 1
-            self.trip.save()
-            logger.info(
-                f"Updated trip {self.trip} booked seats: {old_booked} -> {self.trip.booked_seats}"
-            )
+        with transaction.atomic():
+            self.save()
+            # Only confirmed bookings are counted in booked_seats
+            if was_confirmed:
+                adjust_booked_seats(self.trip_id, -1)
+            # Written to the outbox with the cancellation itself
+            send_sms_cancellation(self)
+        if was_confirmed:
+            logger.info(f"Decremented booked seats for trip {self.trip_id}")
+            self._refresh_cached_trip_counter()
 
         # Create cancellation record
         BookingCancellation.objects.create(
@@ -149,17 +173,38 @@ class Booking(models.Model):
         )
         logger.info(f"Created cancellation record for booking {self.booking_reference}")
 
-    def calculate_cancellation_fee(self):
-        """Calculate cancellation fee based on company policy"""
-        company_settings = self.company.settings
+    def _refresh_cached_trip_counter(self):
+        """Reload booked_seats on an already-loaded trip after an SQL increment"""
+        if Booking.trip.is_cached(self):
+            self.trip.refresh_from_db(fields=["booked_seats", "updated_at"])
+
+    def hours_until_departure(self, now=None):
         # Ensure both datetimes are timezone-aware
         departure_dt = timezone.make_aware(
             timezone.datetime.combine(
                 self.trip.departure_date, self.trip.departure_time
             )
         )
-        now = timezone.now()
-        hours_until_departure = (departure_dt - now).total_seconds() / 3600
+        now = now or timezone.now()
+        return (departure_dt - now).total_seconds() / 3600
+
+    def can_be_cancelled(self, company_settings=None, now=None):
+        """Confirmed bookings can be cancelled free of charge until the cutoff"""
+        if self.status != "CONFIRMED":
+            return False
+        if company_settings is None:
+            from bookutu.settings_cache import get_company_settings
+
+            company_settings = get_company_settings(self.company_id)
+        return self.hours_until_departure(now) >= company_settings.cancellation_hours
+
+    def calculate_cancellation_fee(self, company_settings=None, now=None):
+        """Calculate cancellation fee based on company policy"""
+        if company_settings is None:
+            from bookutu.settings_cache import get_company_settings
+
+            company_settings = get_company_settings(self.company_id)
+        hours_until_departure = self.hours_until_departure(now)
         if hours_until_departure >= company_settings.cancellation_hours:
             return 0  # Free cancellation
         else:
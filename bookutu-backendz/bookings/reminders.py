@@ -0,0 +1,129 @@
+"""
+Pre-departure reminder SMS.
+
+``send_departure_reminders`` runs periodically from Celery beat. Each run
+selects every confirmed booking departing within ``REMINDER_WINDOW_HOURS``
+that has not had a reminder yet, with one query over the partial
+``booking_reminder_due_idx`` index, and works through them in batches: a
+batch is claimed by stamping ``Booking.reminder_sent_at`` and written to the
+notification outbox in the same transaction, from where workers send it in
+batches through the SMS backend's ``send_many``. A claimed booking is never
+picked up again, so overlapping runs cannot send duplicates.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from notifications import delivery, sms
+from notifications.models import Notification
+from .models import Booking
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+REMINDER_FIELDS = (
+    "id",
+    "booking_reference",
+    "passenger_phone",
+    "trip__departure_date",
+    "trip__departure_time",
+    "trip__route__origin_city",
+    "trip__route__destination_city",
+    "trip__route__origin_terminal",
+    "seat__seat_number",
+)
+
+
+def _window():
+    return datetime.timedelta(hours=getattr(settings, "REMINDER_WINDOW_HOURS", 24))
+
+
+def render_reminder(row, departs_at, now):
+    """Reminder text for a ``REMINDER_FIELDS`` row"""
+    hours = int((departs_at - now).total_seconds() // 3600)
+    return f"""
+BOOKUTU REMINDER
+Your trip is in {hours} hours!
+
+Ref: {row['booking_reference']}
+Route: {row['trip__route__origin_city']} → {row['trip__route__destination_city']}
+Date: {row['trip__departure_date']:%Y-%m-%d} {row['trip__departure_time']:%H:%M}
+Seat: {row['seat__seat_number']}
+Terminal: {row['trip__route__origin_terminal']}
+
+Please arrive 30 minutes early.
+Safe travels!
+""".strip()
+
+
+def due_reminders(now):
+    """
+    ``(row, departure datetime)`` pairs for confirmed bookings departing between
+    ``now`` and the end of the reminder window without a reminder yet
+    """
+    until = now + _window()
+    local_now = timezone.localtime(now)
+    local_until = timezone.localtime(until)
+    rows = Booking.objects.filter(
+        status="CONFIRMED",
+        reminder_sent_at__isnull=True,
+        trip__status__in=("SCHEDULED", "DELAYED"),
+        trip__departure_date__range=(local_now.date(), local_until.date()),
+    ).exclude(passenger_phone="").order_by(
+        "trip__departure_date", "trip__departure_time", "id"
+    ).values(*REMINDER_FIELDS)
+
+    due = []
+    for row in rows:
+        departs_at = timezone.make_aware(
+            datetime.datetime.combine(row["trip__departure_date"], row["trip__departure_time"])
+        )
+        if now < departs_at <= until:
+            due.append((row, departs_at))
+    return due
+
+
+def _claim(batch, now):
+    """
+    Stamp the batch's bookings and write their reminders to the outbox.
+    Returns the number of reminders queued for bookings this call claimed.
+    """
+    ids = [row["id"] for row, _ in batch]
+    with transaction.atomic():
+        Booking.objects.filter(id__in=ids, reminder_sent_at__isnull=True).update(
+            reminder_sent_at=now
+        )
+        claimed = set(
+            Booking.objects.filter(id__in=ids, reminder_sent_at=now).values_list("id", flat=True)
+        )
+        return delivery.enqueue_many([
+            Notification(
+                channel="SMS",
+                kind="REMINDER",
+                booking_id=row["id"],
+                recipient=row["passenger_phone"],
+                message=render_reminder(row, departs_at, now),
+            )
+            for row, departs_at in batch
+            if row["id"] in claimed
+        ])
+
+
+def send_departure_reminders(now=None, batch_size=BATCH_SIZE):
+    """
+    Queue reminders for every booking due one. Returns the number queued.
+    """
+    if not sms.get_backend().is_configured():
+        logger.warning("SMS provider not configured; departure reminders skipped")
+        return 0
+
+    now = now or timezone.now()
+    due = due_reminders(now)
+    queued = 0
+    for start in range(0, len(due), batch_size):
+        queued += _claim(due[start:start + batch_size], now)
+    return queued
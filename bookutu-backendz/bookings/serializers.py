@@ -4,16 +4,36 @@ from companies.models import BusSeat
 from trips.models import Trip
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from payments.models import Payment
+from bookutu.settings_cache import get_company_settings_many
+from .holds import SeatUnavailable, hold_and_book
 
 User = get_user_model()
 
 
+class BookingListSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of bookings with a fixed number of queries: missing
+    relations are loaded in bulk and cancellation terms are computed once
+    for the whole page
+    """
+
+    def to_representation(self, data):
+        bookings = list(data.all() if hasattr(data, "all") else data)
+        self.child.prepare(bookings)
+        return [self.child.to_representation(booking) for booking in bookings]
+
+
 class BookingSerializer(serializers.ModelSerializer):
     """
     Booking serializer for booking management
     """
 
+    # Relations read by the serializer; see setup_eager_loading
+    select_related_fields = ("trip__route", "trip__bus", "seat")
+
     trip_details = serializers.SerializerMethodField()
     seat_details = serializers.SerializerMethodField()
     passenger_details = serializers.SerializerMethodField()
@@ -61,6 +81,7 @@ class BookingSerializer(serializers.ModelSerializer):
             "can_cancel",
             "cancellation_fee",
         )
+        list_serializer_class = BookingListSerializer
 
     def get_trip_details(self, obj):
         return {
@@ -85,23 +106,43 @@ class BookingSerializer(serializers.ModelSerializer):
             "email": obj.passenger_email,
         }
 
-    def get_can_cancel(self, obj):
-        if obj.status != "CONFIRMED":
-            return False
-
-        # Check if within cancellation window
-        company_settings = obj.company.settings
-        # Ensure both datetimes are timezone-aware
-        departure_dt = timezone.make_aware(
-            timezone.datetime.combine(obj.trip.departure_date, obj.trip.departure_time)
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join everything the serializer reads into the list query"""
+        return queryset.select_related(*cls.select_related_fields)
+
+    def prepare(self, bookings):
+        """
+        Batch-load relations and cancellation terms for ``bookings``.
+
+        Relations already loaded (e.g. via setup_eager_loading) are not
+        fetched again; company settings come from the settings cache.
+        """
+        prefetch_related_objects(bookings, *self.select_related_fields)
+        company_settings = get_company_settings_many(
+            {booking.company_id for booking in bookings}
         )
         now = timezone.now()
-        hours_until_departure = (departure_dt - now).total_seconds() / 3600
+        self._cancellation_terms = {
+            booking.pk: (
+                booking.can_be_cancelled(company_settings[booking.company_id], now),
+                booking.calculate_cancellation_fee(company_settings[booking.company_id], now),
+            )
+            for booking in bookings
+        }
 
-        return hours_until_departure >= company_settings.cancellation_hours
+    def _terms(self, obj):
+        terms = getattr(self, "_cancellation_terms", {})
+        if obj.pk not in terms:
+            self.prepare([obj])
+            terms = self._cancellation_terms
+        return terms[obj.pk]
+
+    def get_can_cancel(self, obj):
+        return self._terms(obj)[0]
 
     def get_cancellation_fee(self, obj):
-        return float(obj.calculate_cancellation_fee())
+        return float(self._terms(obj)[1])
 
 
 class DirectBookingSerializer(serializers.ModelSerializer):
@@ -210,7 +251,7 @@ class DirectBookingSerializer(serializers.ModelSerializer):
         total_amount = base_fare + seat_fee + service_fee
 
         # Create booking
-        booking = Booking.objects.create(
+        booking = Booking(
             company=request.user.company,
             trip=trip,
             passenger=request.user,  # Temporary - will be updated if passenger account exists
@@ -227,27 +268,40 @@ class DirectBookingSerializer(serializers.ModelSerializer):
             booked_by=request.user,
         )
 
-        # Confirm the booking
-        booking.confirm_booking()
+        try:
+            with transaction.atomic():
+                # Claims the seat (taking over the clerk's own reservation)
+                hold_and_book(trip, request.user, [booking])
 
-        # Create a payment record based on selected method
-        payment_status = (
-            "COMPLETED"
-            if self.validated_data.get("payment_method") == "CASH"
-            else "PENDING"
-        )
-        payment = Payment.objects.create(
-            booking=booking,
-            user=request.user,
-            amount=total_amount,
-            payment_method=self.validated_data.get("payment_method"),
-            status=payment_status,
-            mobile_money_number=self.validated_data.get("mobile_money_number", ""),
-            mobile_money_provider=self.validated_data.get("mobile_money_provider", ""),
-        )
-        if payment.status == "COMPLETED":
-            payment.completed_at = timezone.now()
-            payment.save()
+                # Confirm the booking
+                booking.confirm_booking()
+
+                # Create a payment record based on selected method
+                payment_status = (
+                    "COMPLETED"
+                    if self.validated_data.get("payment_method") == "CASH"
+                    else "PENDING"
+                )
+                payment = Payment.objects.create(
+                    booking=booking,
+                    user=request.user,
+                    amount=total_amount,
+                    payment_method=self.validated_data.get("payment_method"),
+                    status=payment_status,
+                    mobile_money_number=self.validated_data.get(
+                        "mobile_money_number", ""
+                    ),
+                    mobile_money_provider=self.validated_data.get(
+                        "mobile_money_provider", ""
+                    ),
+                )
+                if payment.status == "COMPLETED":
+                    payment.completed_at = timezone.now()
+                    payment.save()
+        except SeatUnavailable:
+            raise serializers.ValidationError(
+                "Seat is already booked or reserved by another user"
+            )
 
         return booking
 
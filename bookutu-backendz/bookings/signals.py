@@ -0,0 +1,52 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from companies.models import BusSeat
+from trips.models import Trip
+from .models import Booking, SeatReservation
+from . import inventory
+
+
+@receiver(post_save, sender=Booking)
+def sync_booking_seat(sender, instance, **kwargs):
+    """
+    Keep the trip seat map in step with booking status changes
+    """
+    if instance.status in inventory.ACTIVE_BOOKING_STATUSES:
+        inventory.mark_booked(instance.trip_id, instance.seat_id)
+    else:
+        inventory.mark_unbooked(instance.trip_id, instance.seat_id)
+
+
+@receiver(post_delete, sender=Booking)
+def release_booking_seat(sender, instance, **kwargs):
+    inventory.mark_unbooked(instance.trip_id, instance.seat_id)
+
+
+@receiver(post_save, sender=SeatReservation)
+def sync_seat_reservation(sender, instance, **kwargs):
+    """
+    Mirror seat reservation writes into the trip seat map
+    """
+    if instance.is_active:
+        inventory.hold_seat(
+            instance.trip_id, instance.seat_id, instance.user_id, instance.expires_at
+        )
+    else:
+        inventory.release_hold(instance.trip_id, instance.seat_id)
+
+
+@receiver(post_delete, sender=SeatReservation)
+def release_seat_reservation(sender, instance, **kwargs):
+    inventory.release_hold(instance.trip_id, instance.seat_id)
+
+
+@receiver(post_save, sender=Trip)
+def sync_trip_seat_map(sender, instance, created, **kwargs):
+    if not created:
+        inventory.sync_trip(instance)
+
+
+@receiver(post_save, sender=BusSeat)
+@receiver(post_delete, sender=BusSeat)
+def invalidate_bus_seat_maps(sender, instance, **kwargs):
+    inventory.invalidate_bus(instance.bus_id)
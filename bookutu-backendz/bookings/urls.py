@@ -6,7 +6,8 @@ from .direct_booking_views import (
 )
 from .views import (
     BookingListView, BookingDetailView, BookingCancelView,
-    BookingHistoryView, company_booking_manifest
+    BookingHistoryView, BookingExportView, company_booking_manifest,
+    export_booking_manifest, booking_report
 )
 
 urlpatterns = [
@@ -15,7 +16,10 @@ urlpatterns = [
     path('<int:pk>/', BookingDetailView.as_view(), name='company_booking_detail'),
     path('<int:pk>/cancel/', BookingCancelView.as_view(), name='company_booking_cancel'),
     path('<int:pk>/history/', BookingHistoryView.as_view(), name='company_booking_history'),
+    path('export/', BookingExportView.as_view(), name='company_booking_export'),
     path('manifest/', company_booking_manifest, name='company_booking_manifest'),
+    path('manifest/export/', export_booking_manifest, name='company_booking_manifest_export'),
+    path('reports/', booking_report, name='company_booking_report'),
     
     # Direct booking system
     path('direct/routes/', DirectBookingRoutesView.as_view(), name='direct_booking_routes'),
@@ -1,7 +1,5 @@
 from django.conf import settings
 from django.utils import timezone
-import requests
-import json
 from datetime import datetime
 
 
@@ -47,46 +45,57 @@ def generate_ticket(booking, format="digital"):
     return ticket_data
 
 
-def send_sms_ticket(booking, ticket_data):
+def render_sms_ticket(booking, ticket_data):
     """
-    Send SMS ticket to passenger
+    Text of the SMS ticket for a booking
     """
-    if not settings.SMS_API_KEY or not settings.SMS_API_URL:
-        return False
-
-    message = f"""
+    return f"""
 BOOKUTU TICKET
 Ref: {booking.booking_reference}
 Passenger: {booking.passenger_name}
 Route: {ticket_data['route']}
 Date: {ticket_data['departure_date']} {ticket_data['departure_time']}
-Seat: {booking.seat.seat_number}
-Bus: {booking.trip.bus.license_plate}
+Seat: {ticket_data['seat_number']}
+Bus: {ticket_data['bus_registration']}
 Amount: UGX {booking.total_amount}
-Driver: {booking.trip.driver_name} ({booking.trip.driver_phone})
+Driver: {ticket_data['driver_name']} ({ticket_data['driver_phone']})
 
 Present this SMS at boarding.
 Safe travels!
 """.strip()
 
-    try:
-        # This is a generic SMS API call - adjust based on your SMS provider
-        response = requests.post(
-            settings.SMS_API_URL,
-            headers={
-                "Authorization": f"Bearer {settings.SMS_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={"to": booking.passenger_phone, "message": message, "from": "BOOKUTU"},
-            timeout=10,
-        )
-
-        return response.status_code == 200
-
-    except Exception as e:
-        # Log the error in production
-        print(f"SMS sending failed: {e}")
-        return False
+
+def send_sms_ticket(booking, ticket_data, custom_message=None, kind="TICKET"):
+    """
+    Queue an SMS ticket (or ``custom_message``) to the passenger
+
+    Delivery happens on a Celery worker once the current transaction
+    commits. Returns the queued Notification, or None when there is no phone
+    number or no SMS provider configured.
+    """
+    from notifications.delivery import queue_sms
+
+    return queue_sms(
+        booking.passenger_phone,
+        custom_message or render_sms_ticket(booking, ticket_data),
+        kind,
+        booking=booking,
+    )
+
+
+def send_sms_cancellation(booking):
+    """
+    Queue a cancellation notice to the passenger with the current transaction
+    """
+    from notifications.delivery import queue_sms
+
+    trip = booking.trip
+    message = (
+        f"BOOKUTU: Booking {booking.booking_reference} "
+        f"({trip.route.origin_city} → {trip.route.destination_city}, "
+        f"{trip.departure_date:%Y-%m-%d} {trip.departure_time:%H:%M}) has been cancelled."
+    )
+    return queue_sms(booking.passenger_phone, message, "CANCELLATION", booking=booking)
 
 
 def validate_phone_number(phone_number):
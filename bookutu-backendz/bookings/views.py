@@ -7,7 +7,11 @@ from django.db.models import Q, Count, Sum
 from .models import Booking, BookingHistory, BookingCancellation
 from .serializers import BookingSerializer, BookingHistorySerializer, BookingCancellationSerializer
 from accounts.permissions import IsCompanyStaff, IsSameCompany
+from bookutu.pagination import KeysetPagination
+from bookutu import exports, reporting
 from trips.models import Trip
+from trips import manifests
+from notifications import audit
 
 
 class BookingListView(generics.ListAPIView):
@@ -20,11 +24,13 @@ class BookingListView(generics.ListAPIView):
     search_fields = ['booking_reference', 'passenger_name', 'passenger_phone']
     ordering_fields = ['created_at', 'trip__departure_date']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ['-created_at', '-id']
     
     def get_queryset(self):
-        return Booking.objects.filter(
-            company=self.request.user.company
-        ).select_related('trip', 'seat', 'passenger')
+        return BookingSerializer.setup_eager_loading(
+            Booking.objects.filter(company=self.request.user.company)
+        )
 
 
 class BookingDetailView(generics.RetrieveAPIView):
@@ -35,7 +41,9 @@ class BookingDetailView(generics.RetrieveAPIView):
     permission_classes = [IsCompanyStaff, IsSameCompany]
     
     def get_queryset(self):
-        return Booking.objects.filter(company=self.request.user.company)
+        return BookingSerializer.setup_eager_loading(
+            Booking.objects.filter(company=self.request.user.company)
+        )
 
 
 class BookingCancelView(APIView):
@@ -75,6 +83,13 @@ class BookingCancelView(APIView):
             cancellation_fee=cancellation_fee,
             refund_amount=refund_amount
         )
+        audit.log(
+            'BOOKING_CANCELLED',
+            f'Booking {booking.booking_reference} cancelled: {reason}',
+            request=request,
+            target=booking,
+            metadata={'cancellation_fee': str(cancellation_fee), 'refund_amount': str(refund_amount)},
+        )
         
         return Response({
             'message': 'Booking cancelled successfully',
@@ -99,6 +114,66 @@ class BookingHistoryView(generics.ListAPIView):
         )
 
 
+BOOKING_EXPORT_COLUMNS = (
+    ('booking_reference', 'booking_reference'),
+    ('status', 'status'),
+    ('source', 'source'),
+    ('passenger_name', 'passenger_name'),
+    ('passenger_phone', 'passenger_phone'),
+    ('passenger_email', 'passenger_email'),
+    ('route', 'trip__route__name'),
+    ('departure_date', 'trip__departure_date'),
+    ('departure_time', 'trip__departure_time'),
+    ('seat_number', 'seat__seat_number'),
+    ('base_fare', 'base_fare'),
+    ('seat_fee', 'seat_fee'),
+    ('service_fee', 'service_fee'),
+    ('total_amount', 'total_amount'),
+    ('booked_by', 'booked_by__email'),
+    ('created_at', 'created_at'),
+    ('confirmed_at', 'confirmed_at'),
+    ('cancelled_at', 'cancelled_at'),
+)
+
+MANIFEST_EXPORT_COLUMNS = (
+    ('trip_id', 'trip_id'),
+    ('route', 'trip__route__name'),
+    ('departure_date', 'trip__departure_date'),
+    ('departure_time', 'trip__departure_time'),
+    ('bus', 'trip__bus__license_plate'),
+    ('seat_number', 'seat__seat_number'),
+    ('seat_type', 'seat__seat_type'),
+    ('booking_reference', 'booking_reference'),
+    ('passenger_name', 'passenger_name'),
+    ('passenger_phone', 'passenger_phone'),
+    ('amount_paid', 'total_amount'),
+    ('booking_source', 'source'),
+)
+
+
+class BookingExportView(BookingListView):
+    """
+    Stream the company's bookings as CSV or NDJSON (``?output=ndjson``)
+
+    Accepts the same filter, search and ordering parameters as the booking
+    list.
+    """
+
+    def get_queryset(self):
+        return Booking.objects.filter(company=self.request.user.company)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return exports.stream_export(
+                self.filter_queryset(self.get_queryset()),
+                BOOKING_EXPORT_COLUMNS,
+                request.query_params.get('output', 'csv'),
+                f"bookings-{timezone.localdate()}",
+            )
+        except exports.InvalidFormat as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['GET'])
 @permission_classes([IsCompanyStaff])
 def company_booking_manifest(request):
@@ -112,68 +187,139 @@ def company_booking_manifest(request):
     filters = {'company': company}
     
     if trip_id:
-        filters['trip_id'] = trip_id
+        filters['id'] = trip_id
     
     if departure_date:
         try:
             date = timezone.datetime.strptime(departure_date, '%Y-%m-%d').date()
-            filters['trip__departure_date'] = date
+            filters['departure_date'] = date
         except ValueError:
             return Response({
                 'error': 'Invalid date format. Use YYYY-MM-DD'
             }, status=status.HTTP_400_BAD_REQUEST)
     
-    bookings = Booking.objects.filter(
-        **filters,
-        status='CONFIRMED'
-    ).select_related('trip', 'seat', 'passenger').order_by(
+    # Trips with confirmed passengers, built together
+    trips = Trip.objects.filter(
+        pk__in=Booking.objects.filter(status='CONFIRMED').values('trip_id'),
+        **filters
+    ).order_by('departure_date', 'departure_time', 'id')
+    manifest = manifests.build_manifests(trips)
+    
+    return Response({
+        'manifest': manifest,
+        'total_trips': len(manifest)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsCompanyStaff])
+def export_booking_manifest(request):
+    """
+    Stream confirmed passengers as CSV or NDJSON, ordered by trip and seat
+
+    Filters as the booking manifest: ``trip_id`` and ``departure_date``.
+    """
+    filters = {'company': request.user.company, 'status': 'CONFIRMED'}
+
+    trip_id = request.query_params.get('trip_id')
+    if trip_id:
+        filters['trip_id'] = trip_id
+
+    departure_date = request.query_params.get('departure_date')
+    if departure_date:
+        try:
+            filters['trip__departure_date'] = timezone.datetime.strptime(
+                departure_date, '%Y-%m-%d'
+            ).date()
+        except ValueError:
+            return Response({
+                'error': 'Invalid date format. Use YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    bookings = Booking.objects.filter(**filters).order_by(
         'trip__departure_date',
         'trip__departure_time',
+        'trip_id',
         'seat__row_number',
         'seat__seat_number'
     )
-    
-    # Group bookings by trip
-    manifest_data = {}
-    for booking in bookings:
-        trip_key = f"{booking.trip.id}"
-        
-        if trip_key not in manifest_data:
-            manifest_data[trip_key] = {
-                'trip_info': {
-                    'id': booking.trip.id,
-                    'route': f"{booking.trip.route.origin_city} → {booking.trip.route.destination_city}",
-                    'departure_date': booking.trip.departure_date,
-                    'departure_time': booking.trip.departure_time,
-                    'bus_registration': booking.trip.bus.registration_number,
-                    'driver_name': booking.trip.driver_name,
-                    'driver_phone': booking.trip.driver_phone
-                },
-                'passengers': [],
-                'summary': {
-                    'total_passengers': 0,
-                    'total_revenue': 0,
-                    'payment_methods': {}
-                }
-            }
-        
-        # Add passenger to manifest
-        manifest_data[trip_key]['passengers'].append({
-            'booking_reference': booking.booking_reference,
-            'passenger_name': booking.passenger_name,
-            'passenger_phone': booking.passenger_phone,
-            'seat_number': booking.seat.seat_number,
-            'seat_type': booking.seat.seat_type,
-            'amount_paid': float(booking.total_amount),
-            'booking_source': booking.source,
-            'created_at': booking.created_at
-        })
-        
-        # Update summary
-        manifest_data[trip_key]['summary']['total_passengers'] += 1
-        manifest_data[trip_key]['summary']['total_revenue'] += float(booking.total_amount)
-    
+    try:
+        return exports.stream_export(
+            bookings,
+            MANIFEST_EXPORT_COLUMNS,
+            request.query_params.get('output', 'csv'),
+            f"manifest-{departure_date or trip_id or timezone.localdate()}",
+        )
+    except exports.InvalidFormat as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# Fields bookings can be grouped by in reports
+REPORT_GROUPS = {
+    'route': 'trip__route__name',
+    'company': 'company__name',
+    'source': 'source',
+    'status': 'status',
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsCompanyStaff])
+def booking_report(request):
+    """
+    Booking counts and revenue bucketed by day, week or month in local time
+
+    Query params: ``date_from``/``date_to`` (YYYY-MM-DD, default the last 30
+    days), ``period`` (day, week, month) and ``group_by`` (route, company,
+    source, status).
+    """
+    today = timezone.localdate()
+    try:
+        date_to = timezone.datetime.strptime(
+            request.query_params.get('date_to', today.isoformat()), '%Y-%m-%d'
+        ).date()
+        date_from = timezone.datetime.strptime(
+            request.query_params.get(
+                'date_from', (date_to - timezone.timedelta(days=30)).isoformat()
+            ),
+            '%Y-%m-%d'
+        ).date()
+    except ValueError:
+        return Response({
+            'error': 'Invalid date format. Use YYYY-MM-DD'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    period = request.query_params.get('period', 'day')
+    group_by = request.query_params.get('group_by')
+    if group_by and group_by not in REPORT_GROUPS:
+        return Response({
+            'error': f"group_by must be one of {', '.join(REPORT_GROUPS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        series = reporting.time_series(
+            Booking.objects.filter(company=request.user.company),
+            'created_at',
+            date_from,
+            date_to,
+            period=period,
+            metrics={
+                'bookings': Count('id'),
+                'confirmed': Count('id', filter=Q(status='CONFIRMED')),
+                'revenue': Sum('total_amount', filter=Q(status='CONFIRMED')),
+            },
+            group_by=REPORT_GROUPS.get(group_by),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    for point in series:
+        point['revenue'] = float(point['revenue'])
+
     return Response({
-        'manifest': list(manifest_data.values()),
-        'total_trips': len(manifest_data)
+        'date_from': date_from,
+        'date_to': date_to,
+        'period': period,
+        'group_by': group_by,
+        'series': series,
     })
@@ -4,4 +4,10 @@ from django.apps import AppConfig
 class BookutuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookutu'
-    verbose_name = 'Bookutu System'
\ No newline at end of file
+    verbose_name = 'Bookutu System'
+
+    def ready(self):
+        import bookutu.signals
+        from .checks import warn_if_cache_not_shared
+
+        warn_if_cache_not_shared()
@@ -0,0 +1,52 @@
+"""
+Startup checks for deployment settings.
+
+Seat maps, dashboard counters, cached manifests, outbox rate limits and the
+locks guarding them all live in the default cache and must be seen by every
+web and Celery worker process. A per-process backend such as LocMemCache
+silently gives each process its own copy, so it is refused outside DEBUG.
+"""
+import logging
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+logger = logging.getLogger(__name__)
+
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_is_shared(alias="default"):
+    """Whether every process sees the same entries in the cache ``alias``"""
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def _required_shared_aliases():
+    return {"default", getattr(settings, "NOTIFICATION_RATE_LIMIT_CACHE", "default")}
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if settings.DEBUG or getattr(settings, "TESTING", False):
+        return []
+    return [
+        Error(
+            f"The '{alias}' cache is local to each process.",
+            hint="Point it at a shared cache such as Redis (CACHE_BACKEND/CACHE_LOCATION).",
+            id="bookutu.E001",
+        )
+        for alias in sorted(_required_shared_aliases())
+        if not cache_is_shared(alias)
+    ]
+
+
+def warn_if_cache_not_shared():
+    # System checks are skipped by WSGI servers, so say it in the log too
+    for error in check_shared_cache(None):
+        logger.warning(
+            f"{error.msg} Seat maps, counters and rate limits will not be shared "
+            "between workers"
+        )
@@ -0,0 +1,90 @@
+"""
+Conditional GET support for polled, read-mostly endpoints.
+
+Views are wrapped with Django's ``condition`` decorator and a cheap version
+lookup (an aggregate over ``updated_at`` columns, or the cached seat-map
+version), so an unchanged poll is answered with ``304 Not Modified`` before
+the view queries or serializes anything.
+"""
+import functools
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+
+def version_etag(parts):
+    """Stable ETag value for a tuple of version parts"""
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def queryset_version(queryset, *timestamp_fields):
+    """
+    Return ``(count, latest)`` for ``queryset`` with one aggregate query.
+
+    ``latest`` is the newest value across ``timestamp_fields`` (default
+    ``updated_at``); related fields such as ``route__updated_at`` let changes
+    to serialized relations count too. The row count catches deletions.
+    """
+    timestamp_fields = timestamp_fields or ("updated_at",)
+    aggregates = {f"latest_{index}": Max(field) for index, field in enumerate(timestamp_fields)}
+    result = queryset.aggregate(count=Count("pk"), **aggregates)
+    stamps = [result[key] for key in aggregates if result[key] is not None]
+    return result["count"], max(stamps, default=None)
+
+
+def list_last_modified(latest):
+    """
+    Last-Modified for a list filtered on today's date.
+
+    Rows drop out of such lists at midnight without being updated, so the
+    value never predates the start of the current day.
+    """
+    midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(latest, midnight) if latest else midnight
+
+
+def conditional_view(version_func):
+    """
+    Decorate a view so GET/HEAD can be answered with 304 Not Modified.
+
+    ``version_func(request, *args, **kwargs)`` returns ``(parts, last_modified)``;
+    ``parts`` is a tuple hashed into the ETag (None disables it) and
+    ``last_modified`` is an aware datetime or None. It runs once per request.
+    Apply it outside ``@api_view``.
+
+    When the view has an ETag, a request carrying only ``If-Modified-Since``
+    is answered in full: a deleted row leaves ``Last-Modified`` unchanged, so
+    only the ETag (which includes the row count) can tell the data is stale.
+    """
+
+    def version(request, *args, **kwargs):
+        if not hasattr(request, "_conditional_version"):
+            request._conditional_version = version_func(request, *args, **kwargs)
+        return request._conditional_version
+
+    def etag(request, *args, **kwargs):
+        parts = version(request, *args, **kwargs)[0]
+        return version_etag(parts) if parts is not None else None
+
+    def last_modified(request, *args, **kwargs):
+        return version(request, *args, **kwargs)[1]
+
+    def decorator(view):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                "HTTP_IF_MODIFIED_SINCE" in request.META
+                and "HTTP_IF_NONE_MATCH" not in request.META
+                and version(request, *args, **kwargs)[0] is not None
+            ):
+                del request.META["HTTP_IF_MODIFIED_SINCE"]
+            return conditional(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
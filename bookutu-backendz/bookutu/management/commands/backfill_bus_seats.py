@@ -1,15 +1,25 @@
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
-from companies.models import Bus, BusSeat
+from companies.models import Bus, SeatLayout
+from companies.seating import materialize_fleet, materialize_seats
 from django.db import transaction
 
 
 class Command(BaseCommand):
-    help = "Create seatmaps for buses that do not have seats yet (2-2 layout)"
+    help = "Create seatmaps for buses that do not have seats yet, from their seat layout"
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--bus", type=str, help="License plate of a specific bus to backfill"
         )
+        parser.add_argument(
+            "--layout", type=int, help="Assign this SeatLayout id to the selected buses first"
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Re-materialize seats on buses that already have them",
+        )
 
     @transaction.atomic
     def handle(self, *args, **options):
@@ -22,39 +32,36 @@ class Command(BaseCommand):
         else:
             buses = Bus.objects.all()
 
-        updated = 0
-        for bus in buses:
-            if bus.total_seats and not bus.seats.exists():
-                self._create_seats(bus)
+        if options.get("layout"):
+            try:
+                layout = SeatLayout.objects.get(pk=options["layout"])
+            except SeatLayout.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"Seat layout {options['layout']} not found"))
+                return
+            buses.update(seat_layout=layout, total_seats=layout.seat_count)
+
+        buses = buses.select_related("seat_layout").filter(total_seats__gt=0)
+        seatless = set(buses.filter(seats__isnull=True).values_list("id", flat=True))
+        buses = list(buses)
+
+        created = materialize_fleet([bus for bus in buses if bus.id in seatless])
+        updated = len(seatless)
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {len(created)} seats for {len(seatless)} buses")
+        )
+
+        if options.get("replace"):
+            for bus in buses:
+                if bus.id in seatless:
+                    continue
+                try:
+                    materialize_seats(bus, replace=True)
+                except ValidationError as e:
+                    self.stdout.write(self.style.ERROR(f"Skipping {bus.license_plate}: {e.messages[0]}"))
+                    continue
                 updated += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f"Created seats for {bus.license_plate}")
-                )
-            else:
-                self.stdout.write(
-                    f"Skipping {bus.license_plate}: seats already exist or total_seats not set"
-                )
+                self.stdout.write(self.style.SUCCESS(f"Re-materialized seats for {bus.license_plate}"))
 
         self.stdout.write(
             self.style.SUCCESS(f"Backfill complete. {updated} buses updated.")
         )
-
-    def _create_seats(self, bus: Bus):
-        seats_per_row = 4
-        num_rows = bus.total_seats // seats_per_row
-        seat_positions = ["LEFT_WINDOW", "LEFT_AISLE", "RIGHT_AISLE", "RIGHT_WINDOW"]
-        seat_letters = ["A", "B", "C", "D"]
-        for row in range(1, num_rows + 1):
-            for i in range(seats_per_row):
-                seat_number = f"{row}{seat_letters[i]}"
-                BusSeat.objects.create(
-                    bus=bus,
-                    seat_number=seat_number,
-                    row_number=row,
-                    seat_position=seat_positions[i],
-                    seat_type="REGULAR",
-                    is_window=(i == 0 or i == 3),
-                    is_aisle=(i == 1 or i == 2),
-                    has_extra_legroom=False,
-                    price_multiplier=1.00,
-                )
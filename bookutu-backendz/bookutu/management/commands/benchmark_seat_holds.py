@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.utils import timezone
+
+from bookings.holds import SeatUnavailable, hold_and_book
+from bookings.inventory import ACTIVE_BOOKING_STATUSES
+from bookings.models import Booking
+from companies.models import Bus, Company
+from trips.models import Route, Trip
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a single trip with parallel hold-and-book writers and verify "
+        "that no seat ends up with more than one active booking"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=16, help="Parallel writer threads")
+        parser.add_argument("--attempts", type=int, default=25, help="Booking attempts per writer")
+        parser.add_argument("--seats", type=int, default=48, help="Seats on the benchmark bus")
+        parser.add_argument("--max-group", type=int, default=3, help="Largest multi-seat request")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark data")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite serialises writers; run against PostgreSQL for representative throughput"
+                )
+            )
+
+        company, trip, users = self._setup(options["writers"], options["seats"])
+        seats = list(trip.bus.seats.all())
+        counters = {"booked": 0, "conflicts": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def writer(user):
+            rng = random.Random(user.id)
+            try:
+                for _ in range(options["attempts"]):
+                    group = rng.sample(seats, rng.randint(1, options["max_group"]))
+                    bookings = [
+                        Booking(
+                            trip=trip,
+                            passenger=user,
+                            seat=seat,
+                            passenger_name=user.email,
+                            passenger_phone="0700000000",
+                            base_fare=trip.base_fare,
+                            total_amount=trip.base_fare,
+                        )
+                        for seat in group
+                    ]
+                    try:
+                        hold_and_book(trip, user, bookings)
+                        outcome, amount = "booked", len(bookings)
+                    except SeatUnavailable:
+                        outcome, amount = "conflicts", 1
+                    except OperationalError:
+                        outcome, amount = "errors", 1
+                    with lock:
+                        counters[outcome] += amount
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=writer, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = options["writers"] * options["attempts"]
+        double_booked = (
+            Booking.objects.filter(trip=trip, status__in=ACTIVE_BOOKING_STATUSES)
+            .values("seat_id")
+            .annotate(claims=Count("id"))
+            .filter(claims__gt=1)
+            .count()
+        )
+
+        self.stdout.write(f"Writers: {options['writers']}  Attempts: {attempts}  Seats: {len(seats)}")
+        self.stdout.write(f"Elapsed: {elapsed:.2f}s  Throughput: {attempts / elapsed:.1f} attempts/s")
+        self.stdout.write(
+            f"Seats booked: {counters['booked']}  Conflicts: {counters['conflicts']}  "
+            f"DB errors: {counters['errors']}"
+        )
+        if double_booked:
+            self.stdout.write(self.style.ERROR(f"Double-booked seats: {double_booked}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Double-booked seats: 0"))
+
+        if not options["keep"]:
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+            company.delete()
+
+    def _setup(self, writers, seat_count):
+        tag = uuid.uuid4().hex[:8]
+        company = Company.objects.create(
+            name=f"Benchmark {tag}",
+            email=f"bench-{tag}@example.com",
+            phone_number="0700000000",
+            address="Benchmark",
+            city="Kampala",
+            state="Central",
+            registration_number=f"BENCH-{tag}",
+            license_number=f"BENCH-{tag}",
+            status="ACTIVE",
+        )
+        bus = Bus.objects.create(
+            company=company,
+            license_plate=f"BENCH-{tag}",
+            model="Benchmark",
+            make="Benchmark",
+            year=timezone.now().year,
+            total_seats=seat_count,
+        )
+        route = Route.objects.create(
+            company=company,
+            name=f"Benchmark {tag}",
+            origin_city=f"Origin {tag}",
+            origin_terminal="Terminal",
+            destination_city=f"Destination {tag}",
+            destination_terminal="Terminal",
+            distance_km=100,
+            estimated_duration_hours=2,
+            base_fare=10000,
+        )
+        tomorrow = timezone.now().date() + timezone.timedelta(days=1)
+        trip = Trip.objects.create(
+            company=company,
+            route=route,
+            bus=bus,
+            departure_date=tomorrow,
+            departure_time=timezone.datetime(2000, 1, 1, 8, 0).time(),
+            arrival_time=timezone.datetime(2000, 1, 1, 10, 0).time(),
+            base_fare=10000,
+            available_seats=seat_count,
+        )
+        users = [
+            User.objects.create_passenger(email=f"bench-{tag}-{i}@example.com", password=None)
+            for i in range(writers)
+        ]
+        return company, trip, users
@@ -0,0 +1,39 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from payments import earnings
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily CompanyEarnings rollups from payments and refunds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--company", type=int, action="append", help="Only rebuild this company id (repeatable)"
+        )
+        parser.add_argument("--from", dest="date_from", help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="date_to", help="Last day to rebuild (YYYY-MM-DD)")
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rows written per batch"
+        )
+
+    def _date(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        written, removed = earnings.rebuild(
+            company_ids=options["company"],
+            start=self._date(options["date_from"]),
+            end=self._date(options["date_to"]),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Company earnings rebuilt. {written} rows written, {removed} stale rows removed."
+            )
+        )
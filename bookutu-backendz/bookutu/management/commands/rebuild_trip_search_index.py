@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from trips import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trip search index from scheduled upcoming trips"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Rows written per batch"
+        )
+
+    def handle(self, *args, **options):
+        indexed, removed = search.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Trip search index rebuilt. {indexed} trips indexed, {removed} stale rows removed."
+            )
+        )
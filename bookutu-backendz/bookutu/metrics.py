@@ -0,0 +1,251 @@
+"""
+Dashboard metrics.
+
+Each dashboard is computed with one conditional-aggregation query per table
+(``COUNT(...) FILTER (WHERE ...)`` / ``SUM(...) FILTER``) instead of a COUNT
+or SUM query per number, and the result is cached per tenant for
+``DASHBOARD_CACHE_TTL`` seconds.
+
+Cached entries carry a soft expiry. When it passes, one process recomputes
+the entry under a cache lock while the others keep serving the stale value,
+so an expiring entry never sends every dashboard request to the database at
+once.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+# How long a request without any cached value waits for another process to
+# finish computing it before computing it itself
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_SECONDS = 0.05
+
+
+def _ttl():
+    return getattr(settings, "DASHBOARD_CACHE_TTL", 60)
+
+
+def cached_metrics(key, compute, ttl=None):
+    """
+    Return ``compute()`` cached under ``key`` with stampede protection.
+
+    Entries are kept for ten times ``ttl`` but considered fresh for ``ttl``;
+    stale entries are refreshed by whichever request takes the lock first.
+    """
+    ttl = ttl or _ttl()
+    cache_key = f"metrics:{key}"
+    lock_key = f"metrics_lock:{key}"
+
+    entry = cache.get(cache_key)
+    if entry is not None and entry["expires"] > time.time():
+        return entry["value"]
+
+    if not cache.add(lock_key, 1, timeout=max(int(ttl), 10)):
+        if entry is not None:
+            return entry["value"]
+        # Nothing to serve yet: give the lock holder a moment
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_SECONDS)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                return entry["value"]
+        return compute()
+
+    try:
+        value = compute()
+        cache.set(cache_key, {"value": value, "expires": time.time() + ttl}, ttl * 10)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def invalidate(key):
+    cache.delete(f"metrics:{key}")
+
+
+def _periods():
+    """Today's local date, and aware datetimes for the start of today and the month"""
+    today = timezone.localdate()
+    month_start = today.replace(day=1)
+    start_of = lambda day: timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return today, start_of(today), start_of(month_start)
+
+
+def _company_metrics(company_id):
+    from bookings.models import Booking
+    from companies.models import Bus, Driver
+    from trips.models import Route, Trip
+
+    today, today_start, month_start = _periods()
+    tomorrow_start = today_start + datetime.timedelta(days=1)
+    metrics = {}
+
+    metrics.update(
+        Booking.objects.filter(company_id=company_id).aggregate(
+            total_bookings=Count("id"),
+            today_bookings=Count(
+                "id", filter=Q(created_at__gte=today_start, created_at__lt=tomorrow_start)
+            ),
+            total_revenue=Sum("total_amount", filter=Q(status="CONFIRMED")),
+            monthly_revenue=Sum(
+                "total_amount", filter=Q(status="CONFIRMED", created_at__gte=month_start)
+            ),
+        )
+    )
+
+    bus_counts = {"total_buses": Count("id")}
+    for status, _ in Bus.BUS_STATUS_CHOICES:
+        bus_counts[f"buses_{status.lower()}"] = Count("id", filter=Q(status=status))
+    buses = Bus.objects.filter(company_id=company_id).aggregate(**bus_counts)
+    metrics["total_buses"] = buses["total_buses"]
+    metrics["active_buses"] = buses["buses_active"]
+    metrics["fleet_status"] = [
+        {"status": status, "count": buses[f"buses_{status.lower()}"]}
+        for status, _ in Bus.BUS_STATUS_CHOICES
+        if buses[f"buses_{status.lower()}"]
+    ]
+
+    metrics.update(
+        Route.objects.filter(company_id=company_id).aggregate(
+            total_routes=Count("id"),
+            active_routes=Count("id", filter=Q(is_active=True)),
+        )
+    )
+
+    metrics.update(
+        Trip.objects.filter(company_id=company_id).aggregate(
+            total_trips=Count("id"),
+            scheduled_trips=Count(
+                "id", filter=Q(status="SCHEDULED", departure_date__gte=today)
+            ),
+            completed_trips=Count("id", filter=Q(status="COMPLETED")),
+            cancelled_trips=Count("id", filter=Q(status="CANCELLED")),
+            today_trips=Count("id", filter=Q(departure_date=today)),
+        )
+    )
+
+    metrics["total_drivers"] = Driver.objects.filter(company_id=company_id).count()
+
+    metrics["total_revenue"] = metrics["total_revenue"] or 0
+    metrics["monthly_revenue"] = metrics["monthly_revenue"] or 0
+    return metrics
+
+
+def company_metrics(company_id):
+    """
+    Booking, fleet, route, trip and driver figures for one company.
+
+    Shared by the company dashboard, the trip dashboard API and the super
+    admin company detail page.
+    """
+    return cached_metrics(f"company:{company_id}", lambda: _company_metrics(company_id))
+
+
+def _platform_metrics():
+    from accounts.models import User
+    from bookings.models import Booking
+    from companies.models import Bus, Company
+
+    _, _, month_start = _periods()
+    metrics = {}
+
+    metrics.update(
+        Company.objects.aggregate(
+            total_companies=Count("id"),
+            active_companies=Count("id", filter=Q(status="ACTIVE")),
+            verified_companies=Count("id", filter=Q(verified_at__isnull=False)),
+            new_companies_this_month=Count("id", filter=Q(created_at__gte=month_start)),
+        )
+    )
+    metrics["total_staff"] = User.objects.filter(user_type="COMPANY_STAFF").count()
+    metrics.update(
+        Booking.objects.aggregate(
+            total_bookings=Count("id"),
+            total_revenue=Sum("total_amount", filter=Q(status="CONFIRMED")),
+            new_bookings_this_month=Count("id", filter=Q(created_at__gte=month_start)),
+        )
+    )
+    metrics.update(
+        Bus.objects.aggregate(
+            total_buses=Count("id"),
+            active_buses=Count("id", filter=Q(status="ACTIVE")),
+            maintenance_buses=Count("id", filter=Q(status="MAINTENANCE")),
+        )
+    )
+    metrics["total_revenue"] = metrics["total_revenue"] or 0
+    return metrics
+
+
+def platform_metrics():
+    """Platform-wide figures for the super admin dashboard"""
+    return cached_metrics("platform", _platform_metrics)
+
+
+def _financial_metrics():
+    from payments.models import CompanyEarnings, Payment, Refund
+
+    today, today_start, _ = _periods()
+    tomorrow_start = today_start + datetime.timedelta(days=1)
+
+    payments = Payment.objects.aggregate(
+        total_revenue=Sum("amount", filter=Q(status="COMPLETED")),
+        today_revenue=Sum(
+            "amount",
+            filter=Q(
+                status="COMPLETED",
+                completed_at__gte=today_start,
+                completed_at__lt=tomorrow_start,
+            ),
+        ),
+        pending_payments=Sum("amount", filter=Q(status="PENDING")),
+    )
+    refunds = Refund.objects.aggregate(
+        total_refunds=Sum("amount", filter=Q(status="COMPLETED"))
+    )
+    earnings = CompanyEarnings.objects.aggregate(
+        platform_commission=Sum("platform_commission"),
+        pending_payouts=Sum("net_earnings", filter=Q(date__lte=today)),
+    )
+    metrics = {
+        key: float(value or 0)
+        for key, value in {**payments, **refunds, **earnings}.items()
+    }
+
+    # Payment method breakdown
+    metrics["payment_methods"] = [
+        {
+            "method": method["payment_method"],
+            "count": method["count"],
+            "total_amount": float(method["total_amount"]),
+        }
+        for method in Payment.objects.filter(status="COMPLETED")
+        .values("payment_method")
+        .annotate(count=Count("id"), total_amount=Sum("amount"))
+        .order_by("-total_amount")
+    ]
+
+    # Top earning companies
+    metrics["top_earning_companies"] = [
+        {
+            "company_name": company["company__name"],
+            "total_earnings": float(company["total_earnings"] or 0),
+            "total_commission": float(company["total_commission"] or 0),
+        }
+        for company in CompanyEarnings.objects.values("company__name")
+        .annotate(
+            total_earnings=Sum("gross_revenue"),
+            total_commission=Sum("platform_commission"),
+        )
+        .order_by("-total_earnings")[:10]
+    ]
+    return metrics
+
+
+def financial_metrics():
+    """Platform payment, refund and earnings figures for super admins"""
+    return cached_metrics("financial", _financial_metrics)
@@ -50,9 +50,9 @@ class SystemSettings(models.Model):
     
     @classmethod
     def get_settings(cls):
-        """Get or create system settings"""
-        settings, created = cls.objects.get_or_create(pk=1)
-        return settings
+        """Get or create system settings (cached, read-only)"""
+        from .settings_cache import get_system_settings
+        return get_system_settings()
 
 
 class Advert(models.Model):
@@ -0,0 +1,261 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with a ``WHERE (ordering columns) > (last row seen)``
+predicate instead of ``OFFSET``, and no ``COUNT(*)`` is issued, so page N
+costs the same as page 1. The ordering always ends with the primary key to
+make it total; every ordering field must be non-null. Cursors are opaque
+base64 tokens carrying the boundary row's ordering values and a direction
+flag.
+"""
+import base64
+import datetime
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps datetimes and times at full precision; DjangoJSONEncoder cuts them
+    to milliseconds, which would skip rows sharing the boundary millisecond.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": values, "r": int(reverse)}, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return ``(values, reverse)`` or raise InvalidCursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return list(payload["v"]), bool(payload["r"])
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def normalize_ordering(ordering):
+    """Append the primary key so the ordering is total"""
+    ordering = list(ordering)
+    if not any(field.lstrip("-") in ("pk", "id") for field in ordering):
+        descending = ordering and ordering[0].startswith("-")
+        ordering.append("-pk" if descending else "pk")
+    return ordering
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _row_values(obj, ordering):
+    values = []
+    for field in ordering:
+        value = obj
+        for part in field.lstrip("-").split("__"):
+            value = getattr(value, part)
+        values.append(value)
+    return values
+
+
+def _after(ordering, values):
+    """
+    Q selecting rows strictly after ``values`` in ``ordering``.
+
+    Expands the row comparison into ``(a > x) OR (a = x AND b > y) ...`` so
+    mixed ascending/descending orderings work on every backend.
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[index]})
+        for prev_field, prev_value in zip(ordering[:index], values[:index]):
+            clause &= Q(**{prev_field.lstrip("-"): prev_value})
+        condition |= clause
+    return condition
+
+
+class KeysetPage:
+    """
+    One page of keyset results with cursors for its neighbours
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=25):
+    """
+    Fetch one page of ``queryset`` in ``ordering`` starting at ``cursor``.
+
+    Raises InvalidCursor for malformed cursors.
+    """
+    ordering = normalize_ordering(ordering)
+    values, reverse = decode_cursor(cursor) if cursor else (None, False)
+    if values is not None and len(values) != len(ordering):
+        raise InvalidCursor(cursor)
+
+    query_ordering = [_flip(field) for field in ordering] if reverse else ordering
+    queryset = queryset.order_by(*query_ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(query_ordering, values))
+
+    rows = list(queryset[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    next_cursor = previous_cursor = None
+    if rows:
+        first, last = _row_values(rows[0], ordering), _row_values(rows[-1], ordering)
+        if reverse:
+            # Walking backwards always came from a later page
+            next_cursor = encode_cursor(last)
+            if has_more:
+                previous_cursor = encode_cursor(first, reverse=True)
+        else:
+            if has_more:
+                next_cursor = encode_cursor(last)
+            if values is not None:
+                previous_cursor = encode_cursor(first, reverse=True)
+
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF cursor pagination over a composite keyset.
+
+    The ordering comes from the view's ``OrderingFilter`` when the client
+    asks for one, otherwise from ``view.keyset_ordering`` or ``ordering``.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("-created_at",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page = keyset_page(
+                queryset,
+                self.get_ordering(request, queryset, view),
+                cursor=request.query_params.get(self.cursor_query_param),
+                page_size=page_size,
+            )
+        except InvalidCursor:
+            raise NotFound("Invalid cursor")
+        return self.page.object_list
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        for backend in getattr(view, "filter_backends", None) or []:
+            if issubclass(backend, OrderingFilter) and request.query_params.get(
+                backend.ordering_param
+            ):
+                requested = backend().remove_invalid_fields(
+                    queryset,
+                    request.query_params[backend.ordering_param].split(","),
+                    view,
+                    request,
+                )
+                if requested:
+                    return requested
+        return getattr(view, "keyset_ordering", None) or self.ordering
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque pagination cursor",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results per page",
+                "schema": {"type": "integer"},
+            },
+        ]
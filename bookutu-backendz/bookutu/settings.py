@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from decouple import config
 
@@ -7,6 +8,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-change-me-in-production')
 DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lambda v: [s.strip() for s in v.split(',')])
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
 
 # Application definition
 DJANGO_APPS = [
@@ -42,6 +44,9 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # Outermost so it times and counts the queries of every later middleware;
+    # removes itself unless QUERY_PROFILER_ENABLED
+    'accounts.middleware.QueryProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -82,6 +87,59 @@ DATABASES = {
 }
 
 
+# Cache, shared by every web and Celery process (Redis, which Celery needs
+# anyway); tests use a local one. Process-local backends are refused outside
+# DEBUG, see bookutu.checks
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache' if TESTING
+            else 'django.core.cache.backends.redis.RedisCache',
+        ),
+        'LOCATION': config(
+            'CACHE_LOCATION',
+            # A database of its own: cache.clear() flushes it, so never the broker's
+            default='bookutu' if TESTING else 'redis://localhost:6379/1',
+        ),
+    }
+}
+
+# Seconds a trip seat map stays cached between rebuilds
+SEAT_MAP_CACHE_TIMEOUT = config('SEAT_MAP_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds SystemSettings/CompanySettings stay cached in each process, and an
+# optional CACHES alias shared between processes ('' keeps them local only)
+SETTINGS_CACHE_TTL = config('SETTINGS_CACHE_TTL', default=60, cast=int)
+SETTINGS_CACHE_BACKEND = config('SETTINGS_CACHE_BACKEND', default='')
+
+# Seconds dashboard counters are served from cache before being recomputed
+DASHBOARD_CACHE_TTL = config('DASHBOARD_CACHE_TTL', default=60, cast=int)
+
+# Audit events are buffered per process and written in bulk once this many
+# are waiting or the oldest has waited this many seconds
+AUDIT_LOG_BUFFER_SIZE = config('AUDIT_LOG_BUFFER_SIZE', default=100, cast=int)
+AUDIT_LOG_FLUSH_SECONDS = config('AUDIT_LOG_FLUSH_SECONDS', default=5, cast=int)
+# Whole months of audit events kept, including the current one
+AUDIT_LOG_RETENTION_MONTHS = config('AUDIT_LOG_RETENTION_MONTHS', default=12, cast=int)
+
+# Per-request query count, DB time and latency headers; off in production
+# unless needed, on when running tests
+QUERY_PROFILER_ENABLED = config('QUERY_PROFILER_ENABLED', default=TESTING, cast=bool)
+# Share of profiled requests also written to the log
+QUERY_PROFILER_LOG_SAMPLE_RATE = config('QUERY_PROFILER_LOG_SAMPLE_RATE', default=0.01, cast=float)
+# Most queries a view (by URL name) may run; going over logs a warning, or
+# raises QueryBudgetExceeded when strict
+QUERY_BUDGETS = {
+    'bookings:company_bookings': 6,
+    'trips:company_routes': 6,
+    'trips:trip_dashboard_stats': 9,
+    'companies:dashboard': 10,
+    'company:dashboard': 10,
+}
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=TESTING, cast=bool)
+
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -165,12 +223,43 @@ SPECTACULAR_SETTINGS = {
 }
 
 # Celery Configuration
+from celery.schedules import crontab
+
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-trip-seat-counters': {
+        'task': 'bookings.tasks.reconcile_trip_seat_counters',
+        'schedule': config('SEAT_COUNTER_RECONCILE_SECONDS', default=900, cast=int),
+    },
+    'pregenerate-trip-manifests': {
+        'task': 'trips.tasks.pregenerate_trip_manifests',
+        'schedule': config('MANIFEST_PREGENERATE_SECONDS', default=600, cast=int),
+    },
+    'send-departure-reminders': {
+        'task': 'bookings.tasks.send_departure_reminders',
+        'schedule': config('REMINDER_SWEEP_SECONDS', default=600, cast=int),
+    },
+    'send-daily-booking-reports': {
+        'task': 'bookings.tasks.send_daily_booking_reports',
+        'schedule': crontab(hour=config('DAILY_REPORT_HOUR', default=1, cast=int), minute=0),
+    },
+    'prune-system-logs': {
+        'task': 'notifications.tasks.prune_system_logs',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'drain-notification-outbox': {
+        'task': 'notifications.tasks.drain_outbox',
+        'schedule': config('NOTIFICATION_DRAIN_SECONDS', default=30, cast=int),
+    },
+}
+
+# Seconds a built trip manifest stays cached (rebuilt sooner if bookings change)
+MANIFEST_CACHE_TIMEOUT = config('MANIFEST_CACHE_TIMEOUT', default=7200, cast=int)
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -184,6 +273,20 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@bookutu.com')
 # SMS Configuration (for ticket notifications)
 SMS_API_KEY = config('SMS_API_KEY', default='')
 SMS_API_URL = config('SMS_API_URL', default='')
+# Provider backend; notifications.sms.LocMemSmsBackend keeps messages in memory
+SMS_BACKEND = config('SMS_BACKEND', default='notifications.sms.HttpSmsBackend')
+# Pooled provider connections per worker process, and request timeout seconds
+SMS_POOL_SIZE = config('SMS_POOL_SIZE', default=10, cast=int)
+SMS_TIMEOUT = config('SMS_TIMEOUT', default=10, cast=int)
+# Outbox messages sent per minute per channel, across all workers; counted
+# in this CACHES alias, which must be shared between processes
+NOTIFICATION_RATE_LIMIT_CACHE = config('NOTIFICATION_RATE_LIMIT_CACHE', default='default')
+NOTIFICATION_RATE_LIMITS = {
+    'SMS': config('SMS_RATE_LIMIT_PER_MINUTE', default=600, cast=int),
+    'EMAIL': config('EMAIL_RATE_LIMIT_PER_MINUTE', default=120, cast=int),
+}
+# Reminder SMS go to passengers departing within this many hours
+REMINDER_WINDOW_HOURS = config('REMINDER_WINDOW_HOURS', default=24, cast=int)
 
 # Payment Gateway Configuration
 PAYMENT_GATEWAY_API_KEY = config('PAYMENT_GATEWAY_API_KEY', default='')
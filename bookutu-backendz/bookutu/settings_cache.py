@@ -0,0 +1,143 @@
+"""
+Cached access to SystemSettings and CompanySettings.
+
+Settings are read on almost every booking-related request but change rarely.
+Lookups go through a small in-process cache with a TTL and, when
+``SETTINGS_CACHE_BACKEND`` names a cache alias, a shared cache behind it.
+Saving or deleting a settings row invalidates both layers in this process and
+the shared layer for everyone; other processes pick the change up within
+``SETTINGS_CACHE_TTL`` seconds.
+
+Returned instances are shared between callers and must be treated as
+read-only; edit settings through a freshly fetched instance.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+_local = {}
+_lock = threading.Lock()
+
+SYSTEM_KEY = "settings:system"
+
+
+def _company_key(company_id):
+    return f"settings:company:{company_id}"
+
+
+def _ttl():
+    return getattr(settings, "SETTINGS_CACHE_TTL", 60)
+
+
+def _shared():
+    alias = getattr(settings, "SETTINGS_CACHE_BACKEND", "")
+    return caches[alias] if alias else None
+
+
+def _get(key, load):
+    now = time.monotonic()
+    entry = _local.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    shared = _shared()
+    value = shared.get(key) if shared is not None else None
+    if value is None:
+        value = load()
+        if shared is not None:
+            shared.set(key, value, _ttl())
+    with _lock:
+        _local[key] = (now + _ttl(), value)
+    return value
+
+
+def _invalidate(key):
+    with _lock:
+        _local.pop(key, None)
+    shared = _shared()
+    if shared is not None:
+        shared.delete(key)
+
+
+def get_system_settings():
+    """The platform SystemSettings row, created with defaults if missing"""
+    from .models import SystemSettings
+
+    def load():
+        return SystemSettings.objects.get_or_create(pk=1)[0]
+
+    return _get(SYSTEM_KEY, load)
+
+
+def get_company_settings(company_id):
+    """CompanySettings for a company, created with defaults if missing"""
+    from companies.models import CompanySettings
+
+    def load():
+        return CompanySettings.objects.get_or_create(company_id=company_id)[0]
+
+    return _get(_company_key(company_id), load)
+
+
+def get_company_settings_many(company_ids):
+    """
+    ``{company_id: CompanySettings}`` for several companies.
+
+    Entries missing from the caches are loaded together with one query;
+    companies without a settings row get one created with defaults.
+    """
+    from companies.models import CompanySettings
+
+    company_ids = set(company_ids)
+    now = time.monotonic()
+    found = {}
+    for company_id in company_ids:
+        entry = _local.get(_company_key(company_id))
+        if entry is not None and entry[0] > now:
+            found[company_id] = entry[1]
+
+    missing = company_ids - found.keys()
+    fetched = {}
+    shared = _shared()
+    if missing and shared is not None:
+        cached = shared.get_many([_company_key(company_id) for company_id in missing])
+        for company_id in list(missing):
+            value = cached.get(_company_key(company_id))
+            if value is not None:
+                fetched[company_id] = value
+                missing.discard(company_id)
+    if missing:
+        loaded = {
+            company_settings.company_id: company_settings
+            for company_settings in CompanySettings.objects.filter(company_id__in=missing)
+        }
+        for company_id in missing - loaded.keys():
+            loaded[company_id] = CompanySettings.objects.get_or_create(company_id=company_id)[0]
+        if shared is not None:
+            shared.set_many(
+                {_company_key(company_id): value for company_id, value in loaded.items()},
+                _ttl(),
+            )
+        fetched.update(loaded)
+
+    with _lock:
+        for company_id, value in fetched.items():
+            _local[_company_key(company_id)] = (now + _ttl(), value)
+    found.update(fetched)
+    return found
+
+
+def invalidate_system_settings():
+    _invalidate(SYSTEM_KEY)
+
+
+def invalidate_company_settings(company_id):
+    _invalidate(_company_key(company_id))
+
+
+def clear():
+    """Drop every locally cached settings entry"""
+    with _lock:
+        _local.clear()
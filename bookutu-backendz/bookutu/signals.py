@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from companies.models import CompanySettings
+from .models import SystemSettings
+from . import settings_cache
+
+
+@receiver([post_save, post_delete], sender=SystemSettings)
+def invalidate_system_settings(sender, instance, **kwargs):
+    settings_cache.invalidate_system_settings()
+    # Readers inside the open transaction may re-cache the old row
+    transaction.on_commit(settings_cache.invalidate_system_settings)
+
+
+@receiver([post_save, post_delete], sender=CompanySettings)
+def invalidate_company_settings(sender, instance, **kwargs):
+    company_id = instance.company_id
+    settings_cache.invalidate_company_settings(company_id)
+    transaction.on_commit(lambda: settings_cache.invalidate_company_settings(company_id))
@@ -22,6 +22,7 @@ urlpatterns = [
     path('api/v1/trips/', include(('trips.urls', 'trips'), namespace='trips')),
     path('api/v1/bookings/', include(('bookings.urls', 'bookings'), namespace='bookings')),
     path('api/v1/payments/', include(('payments.urls', 'payments'), namespace='payments')),
+    path('api/v1/notifications/', include(('notifications.urls', 'notifications'), namespace='notifications')),
 
     # Group compatibility endpoints
     path('api/group-compat/', include(('group_compat.urls', 'group_compat'), namespace='group_compat')),
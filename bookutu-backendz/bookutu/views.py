@@ -9,6 +9,7 @@ from django.db.models import Q
 
 from .models import Advert
 from .serializers import AdvertSerializer
+from .conditional import conditional_view, list_last_modified, queryset_version
 
 
 def home_view(request):
@@ -20,6 +21,27 @@ def health_check(request):
     """Health check endpoint"""
     return JsonResponse({'status': 'healthy', 'service': 'bookutu-backend'})
 
+def _advert_queryset(fetch_all, today):
+    if fetch_all:
+        # Fetch all active adverts ignoring start/end dates
+        return Advert.objects.filter(is_active=True)
+    # Fetch only adverts within schedule
+    return Advert.objects.filter(
+        is_active=True
+    ).filter(
+        Q(start_date__lte=today) | Q(start_date__isnull=True),
+        Q(end_date__gte=today) | Q(end_date__isnull=True)
+    )
+
+
+def _adverts_version(request):
+    today = timezone.now().date()
+    fetch_all = request.GET.get('all', 'false').lower() == 'true'
+    count, latest = queryset_version(_advert_queryset(fetch_all, today))
+    return (today, fetch_all, count, latest), list_last_modified(latest)
+
+
+@conditional_view(_adverts_version)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def adverts_list(request):
@@ -29,18 +51,7 @@ def adverts_list(request):
     """
     today = timezone.now().date()
     fetch_all = request.GET.get('all', 'false').lower() == 'true'
-
-    if fetch_all:
-        # Fetch all active adverts ignoring start/end dates
-        adverts = Advert.objects.filter(is_active=True)
-    else:
-        # Fetch only adverts within schedule
-        adverts = Advert.objects.filter(
-            is_active=True
-        ).filter(
-            Q(start_date__lte=today) | Q(start_date__isnull=True),
-            Q(end_date__gte=today) | Q(end_date__isnull=True)
-        )
+    adverts = _advert_queryset(fetch_all, today)
 
     serializer = AdvertSerializer(adverts, many=True, context={'request': request})
     data = serializer.data
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Company, Bus, BusSeat, Driver, CompanySettings
+from .models import Company, Bus, BusSeat, Driver, CompanySettings, SeatLayout
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
@@ -15,6 +15,13 @@ class BusAdmin(admin.ModelAdmin):
     search_fields = ('license_plate', 'model', 'make')
     ordering = ('license_plate',)
 
+@admin.register(SeatLayout)
+class SeatLayoutAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company', 'rows', 'seat_count')
+    list_filter = ('company',)
+    search_fields = ('name',)
+    ordering = ('name',)
+
 @admin.register(BusSeat)
 class BusSeatAdmin(admin.ModelAdmin):
     list_display = ('bus', 'seat_number', 'row_number', 'seat_position', 'seat_type', 'is_window', 'is_aisle')
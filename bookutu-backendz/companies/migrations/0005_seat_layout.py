@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:21
+
+import companies.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_bus_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('rows', models.PositiveIntegerField()),
+                ('columns', models.JSONField(default=companies.models.default_seat_columns)),
+                ('row_overrides', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seat_layouts', to='companies.company')),
+            ],
+            options={
+                'verbose_name': 'Seat Layout',
+                'verbose_name_plural': 'Seat Layouts',
+                'db_table': 'companies_seat_layout',
+                'ordering': ['name'],
+                'unique_together': {('company', 'name')},
+            },
+        ),
+        migrations.AddField(
+            model_name='bus',
+            name='seat_layout',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='buses', to='companies.seatlayout'),
+        ),
+    ]
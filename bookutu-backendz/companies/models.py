@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.text import slugify
 from accounts.managers import TenantAwareManager
@@ -85,6 +85,56 @@ class Company(models.Model):
         super().save(*args, **kwargs)
 
 
+def default_seat_columns():
+    # Standard 2-2 coach: window and aisle seat either side of the aisle
+    return [
+        {"letter": "A", "position": "LEFT_WINDOW", "is_window": True, "is_aisle": False},
+        {"letter": "B", "position": "LEFT_AISLE", "is_window": False, "is_aisle": True},
+        {"letter": "C", "position": "RIGHT_AISLE", "is_window": False, "is_aisle": True},
+        {"letter": "D", "position": "RIGHT_WINDOW", "is_window": True, "is_aisle": False},
+    ]
+
+
+class SeatLayout(models.Model):
+    """
+    Reusable seat layout template that buses materialize their seats from
+    """
+
+    # Platform-wide layouts have no company
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="seat_layouts",
+    )
+    name = models.CharField(max_length=100)
+
+    # Seats are numbered "<row><letter>", e.g. 1A .. 12D
+    rows = models.PositiveIntegerField()
+    columns = models.JSONField(default=default_seat_columns)
+    # Per-row seat attributes keyed by row number:
+    # {"1": {"seat_type": "PREMIUM", "price_multiplier": "1.20", "has_extra_legroom": true}}
+    row_overrides = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "companies_seat_layout"
+        verbose_name = "Seat Layout"
+        verbose_name_plural = "Seat Layouts"
+        unique_together = ["company", "name"]
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"{self.name} ({self.seat_count} seats)"
+
+    @property
+    def seat_count(self):
+        return self.rows * len(self.columns)
+
+
 class Bus(models.Model):
     """
     Bus/Vehicle model for fleet management
@@ -116,6 +166,13 @@ class Bus(models.Model):
     bus_type = models.CharField(
         max_length=20, choices=BUS_TYPE_CHOICES, default="STANDARD"
     )
+    seat_layout = models.ForeignKey(
+        SeatLayout,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="buses",
+    )
 
     # Features
     has_ac = models.BooleanField(default=True)
@@ -152,35 +209,41 @@ class Bus(models.Model):
     def is_available(self):
         return self.status == "ACTIVE"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        bus = super().from_db(db, field_names, values)
+        # Remembered so save() can tell when the layout changes
+        if "seat_layout_id" in field_names:
+            bus._saved_seat_layout_id = bus.seat_layout_id
+        return bus
+
+    def _layout_changed(self):
+        if not hasattr(self, "_saved_seat_layout_id"):
+            self._saved_seat_layout_id = (
+                Bus.objects.filter(pk=self.pk).values_list("seat_layout_id", flat=True).first()
+            )
+        return self.seat_layout_id != self._saved_seat_layout_id
+
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        from .seating import materialize_seats
 
-        # Automatically create seatmap if new bus and no seats exist
-        if is_new and self.total_seats > 0 and not self.seats.exists():
-            seats_per_row = 4
-            num_rows = self.total_seats // seats_per_row
-            seat_positions = [
-                "LEFT_WINDOW",
-                "LEFT_AISLE",
-                "RIGHT_AISLE",
-                "RIGHT_WINDOW",
-            ]
-            seat_letters = ["A", "B", "C", "D"]
-            for row in range(1, num_rows + 1):
-                for i in range(seats_per_row):
-                    seat_number = f"{row}{seat_letters[i]}"
-                    BusSeat.objects.create(
-                        bus=self,
-                        seat_number=seat_number,
-                        row_number=row,
-                        seat_position=seat_positions[i],
-                        seat_type="REGULAR",
-                        is_window=(i == 0 or i == 3),
-                        is_aisle=(i == 1 or i == 2),
-                        has_extra_legroom=False,
-                        price_multiplier=1.00,
-                    )
+        is_new = self.pk is None
+        if self.seat_layout_id:
+            self.total_seats = self.seat_layout.seat_count
+
+        if not is_new and self._layout_changed():
+            # Rebuild the seats in step with the new capacity; seats that
+            # have bookings raise ValidationError and the change rolls back
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                materialize_seats(self, replace=True)
+        else:
+            super().save(*args, **kwargs)
+
+            # Automatically create seatmap for new buses
+            if is_new and self.total_seats > 0:
+                materialize_seats(self)
+        self._saved_seat_layout_id = self.seat_layout_id
 
 
 class BusSeat(models.Model):
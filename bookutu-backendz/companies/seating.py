@@ -0,0 +1,126 @@
+"""
+Seat materialization from SeatLayout templates.
+
+A layout is expanded once into a tuple of seat specs (number, row, position,
+type, flags, multiplier). The expansion is cached per layout version, and
+per row count for the default 2-2 layout, so every bus sharing a layout
+reuses it. Seats are then written with a single bulk insert per bus (or
+per batch for a whole fleet) instead of one INSERT per seat.
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import BusSeat, default_seat_columns
+
+SEAT_SPEC_FIELDS = (
+    "seat_number",
+    "row_number",
+    "seat_position",
+    "seat_type",
+    "is_window",
+    "is_aisle",
+    "has_extra_legroom",
+    "price_multiplier",
+)
+LAYOUT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_seat_specs(rows, columns, row_overrides=None):
+    """Expand a layout definition into per-seat attribute dicts"""
+    row_overrides = row_overrides or {}
+    specs = []
+    for row in range(1, rows + 1):
+        override = row_overrides.get(str(row), {})
+        for column in columns:
+            specs.append({
+                "seat_number": f"{row}{column['letter']}",
+                "row_number": row,
+                "seat_position": column["position"],
+                "seat_type": override.get("seat_type", column.get("seat_type", "REGULAR")),
+                "is_window": column.get("is_window", False),
+                "is_aisle": column.get("is_aisle", False),
+                "has_extra_legroom": override.get("has_extra_legroom", False),
+                "price_multiplier": Decimal(
+                    str(override.get("price_multiplier", column.get("price_multiplier", "1.00")))
+                ),
+            })
+    return tuple(specs)
+
+
+@lru_cache(maxsize=64)
+def default_seat_specs(rows):
+    return build_seat_specs(rows, default_seat_columns())
+
+
+def layout_seat_specs(layout):
+    """Seat specs for a SeatLayout, cached until the layout is edited"""
+    key = f"seat_layout:{layout.pk}:{layout.updated_at.timestamp()}"
+    specs = cache.get(key)
+    if specs is None:
+        specs = build_seat_specs(layout.rows, layout.columns, layout.row_overrides)
+        cache.set(key, specs, LAYOUT_CACHE_TIMEOUT)
+    return specs
+
+
+def seat_specs_for(bus):
+    if bus.seat_layout_id:
+        return layout_seat_specs(bus.seat_layout)
+    # Legacy buses without a layout: full 2-2 rows from total_seats
+    return default_seat_specs(bus.total_seats // len(default_seat_columns()))
+
+
+def materialize_seats(bus, replace=False):
+    """
+    Create the bus's seats from its layout with one bulk insert.
+
+    With ``replace=True`` existing seats are updated in place (keeping their
+    ids, so bookings stay attached), missing seats are added and seats the
+    layout no longer has are removed. Removing a seat that has bookings
+    raises ValidationError and nothing is written.
+    """
+    specs = seat_specs_for(bus)
+    seats = [BusSeat(bus=bus, **spec) for spec in specs]
+    if not replace:
+        return BusSeat.objects.bulk_create(seats)
+
+    with transaction.atomic():
+        extras = bus.seats.exclude(seat_number__in=[spec["seat_number"] for spec in specs])
+        booked = list(
+            extras.filter(bookings__isnull=False).values_list("seat_number", flat=True).distinct()
+        )
+        if booked:
+            raise ValidationError(
+                f"Cannot remove seats with bookings from bus {bus.license_plate}: {', '.join(booked)}"
+            )
+        extras.delete()
+        BusSeat.objects.bulk_create(
+            seats,
+            update_conflicts=True,
+            unique_fields=["bus", "seat_number"],
+            update_fields=[field for field in SEAT_SPEC_FIELDS if field != "seat_number"],
+        )
+        # bulk_create skips the BusSeat signals that keep seat maps and
+        # search fares in step
+        _invalidate_bus_caches(bus)
+    return seats
+
+
+def materialize_fleet(buses, batch_size=1000):
+    """Create seats for many seatless buses in batched bulk inserts"""
+    seats = [BusSeat(bus=bus, **spec) for bus in buses for spec in seat_specs_for(bus)]
+    return BusSeat.objects.bulk_create(seats, batch_size=batch_size)
+
+
+def _invalidate_bus_caches(bus):
+    from bookings import inventory
+    from trips import search
+    from trips.models import TripSearchIndex
+
+    transaction.on_commit(lambda: inventory.invalidate_bus(bus.id))
+    search.schedule_refresh(
+        TripSearchIndex.objects.filter(bus_id=bus.id).values_list("trip_id", flat=True)
+    )
@@ -14,10 +14,14 @@ from .forms import (
     CompanyStaffForm,
 )
 from trips.models import Route, Trip
+from trips.stats import with_route_stats
 from trips.forms import AssignDriverForm
 from bookings.models import Booking
 from bookings.forms import DirectBookingForm
+from bookings import inventory
+from payments.models import CompanyEarnings
 from accounts.models import User
+from bookutu import metrics, reporting
 
 
 @login_required
@@ -25,33 +29,8 @@ def company_dashboard(request):
     """Company dashboard with statistics and recent activity"""
     company = request.user.company
 
-    # Calculate statistics
-    today = timezone.now().date()
-    this_month = today.replace(day=1)
-
-    # Today's bookings
-    today_bookings = Booking.objects.filter(
-        company=company, created_at__date=today
-    ).count()
-
-    # Active buses
-    active_buses = Bus.objects.filter(company=company, status="ACTIVE").count()
-
-    # Active routes
-    active_routes = Route.objects.filter(company=company, is_active=True).count()
-
-    # Trip statistics
-    scheduled_trips = Trip.objects.filter(
-        company=company, status="SCHEDULED", departure_date__gte=today
-    ).count()
-
-    # Monthly revenue
-    monthly_revenue = (
-        Booking.objects.filter(
-            company=company, created_at__date__gte=this_month, status="CONFIRMED"
-        ).aggregate(total=Sum("total_amount"))["total"]
-        or 0
-    )
+    # Counters come from one aggregate per table, cached briefly
+    stats = metrics.company_metrics(company.id)
 
     # Recent bookings
     recent_bookings = (
@@ -60,19 +39,14 @@ def company_dashboard(request):
         .order_by("-created_at")[:5]
     )
 
-    # Fleet status
-    fleet_status = (
-        Bus.objects.filter(company=company).values("status").annotate(count=Count("id"))
-    )
-
     context = {
-        "today_bookings": today_bookings,
-        "active_buses": active_buses,
-        "active_routes": active_routes,
-        "scheduled_trips": scheduled_trips,
-        "monthly_revenue": monthly_revenue,
+        "today_bookings": stats["today_bookings"],
+        "active_buses": stats["active_buses"],
+        "active_routes": stats["active_routes"],
+        "scheduled_trips": stats["scheduled_trips"],
+        "monthly_revenue": stats["monthly_revenue"],
         "recent_bookings": recent_bookings,
-        "fleet_status": fleet_status,
+        "fleet_status": stats["fleet_status"],
     }
 
     return render(request, "company/dashboard.html", context)
@@ -287,7 +261,7 @@ def company_routes(request):
     # Get search parameter
     search = request.GET.get("search", "")
 
-    routes = Route.objects.filter(company=company).order_by(
+    routes = with_route_stats(Route.objects.filter(company=company)).order_by(
         "origin_city", "destination_city"
     )
 
@@ -503,18 +477,22 @@ def company_reports(request):
     start_date = end_date - timedelta(days=30)
 
     # Booking statistics
-    bookings = Booking.objects.filter(
-        company=company, created_at__date__range=[start_date, end_date]
+    bookings = reporting.date_range_filter(
+        Booking.objects.filter(company=company), "created_at", start_date, end_date
     )
 
     total_bookings = bookings.count()
     confirmed_bookings = bookings.filter(status="CONFIRMED").count()
-    total_revenue = (
-        bookings.filter(status="CONFIRMED").aggregate(total=Sum("total_amount"))[
-            "total"
-        ]
-        or 0
+
+    # Revenue from the daily earnings rollups
+    earnings = CompanyEarnings.objects.filter(
+        company=company, date__range=[start_date, end_date]
+    ).aggregate(
+        revenue=Sum("gross_revenue"),
+        commission=Sum("platform_commission"),
+        net=Sum("net_earnings"),
     )
+    total_revenue = earnings["revenue"] or 0
 
     # Route performance
     route_performance = (
@@ -524,17 +502,16 @@ def company_reports(request):
     )
 
     # Daily booking trends
-    daily_bookings = (
-        bookings.extra(select={"day": "date(created_at)"})
-        .values("day")
-        .annotate(count=Count("id"))
-        .order_by("day")
+    daily_bookings = reporting.time_series(
+        Booking.objects.filter(company=company), "created_at", start_date, end_date
     )
 
     context = {
         "total_bookings": total_bookings,
         "confirmed_bookings": confirmed_bookings,
         "total_revenue": total_revenue,
+        "platform_commission": earnings["commission"] or 0,
+        "net_earnings": earnings["net"] or 0,
         "route_performance": route_performance,
         "daily_bookings": daily_bookings,
         "start_date": start_date,
@@ -682,6 +659,8 @@ def trip_detail(request, trip_id):
     # Calculate trip statistics
     total_bookings = bookings.count()
     confirmed_bookings = bookings.filter(status="CONFIRMED").count()
+    # Earnings rollups are per company and day, so trip revenue still comes
+    # from the trip's own bookings
     total_revenue = (
         bookings.filter(status="CONFIRMED").aggregate(total=Sum("total_amount"))[
             "total"
@@ -706,11 +685,7 @@ def trip_detail(request, trip_id):
 
     # Constrain booking form choices
     direct_booking_form.fields["trip"].queryset = Trip.objects.filter(id=trip.id)
-    booked_seat_ids = set(
-        Booking.objects.filter(
-            trip=trip, status__in=["PENDING", "CONFIRMED"]
-        ).values_list("seat_id", flat=True)
-    )
+    booked_seat_ids = inventory.get_seat_map(trip.id).booked_seat_ids()
     direct_booking_form.fields["seat"].queryset = trip.bus.seats.exclude(
         id__in=booked_seat_ids
     )
@@ -812,12 +787,14 @@ def edit_trip(request, trip_id):
 def trip_manifest(request, trip_id):
     """View trip passenger manifest"""
     company = request.user.company
-    trip = get_object_or_404(Trip, id=trip_id, company=company)
+    trip = get_object_or_404(
+        Trip.objects.select_related("route", "bus"), id=trip_id, company=company
+    )
 
     # Get confirmed bookings for this trip
-    bookings = (
+    bookings = list(
         Booking.objects.filter(trip=trip, status="CONFIRMED")
-        .select_related("seat", "passenger")
+        .select_related("seat")
         .order_by("seat__row_number", "seat__seat_number")
     )
 
@@ -826,7 +803,7 @@ def trip_manifest(request, trip_id):
     context = {
         "trip": trip,
         "bookings": bookings,
-        "total_passengers": bookings.count(),
+        "total_passengers": len(bookings),
         "total_revenue": total_revenue,
     }
 
@@ -179,8 +179,17 @@ class CompatBookingSerializer(serializers.ModelSerializer):
             'created_at'
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related('seat').prefetch_related('payments')
+
+    def _latest_payment(self, obj):
+        # Payments are ordered newest first; slicing uses the prefetched
+        # list when there is one instead of querying per booking
+        return next(iter(obj.payments.all()[:1]), None)
+
     def get_payment_status(self, obj):
-        latest = obj.payments.order_by('-created_at').first()
+        latest = self._latest_payment(obj)
         if not latest:
             return 'pending'
         return {
@@ -193,11 +202,11 @@ class CompatBookingSerializer(serializers.ModelSerializer):
         }.get(latest.status, 'pending')
 
     def get_amount_paid(self, obj):
-        latest = obj.payments.order_by('-created_at').first()
+        latest = self._latest_payment(obj)
         return str(latest.amount) if latest else '0'
 
     def get_payment_method(self, obj):
-        latest = obj.payments.order_by('-created_at').first()
+        latest = self._latest_payment(obj)
         if not latest:
             return None
         return {
@@ -12,12 +12,15 @@ from .serializers import (
 )
 from rest_framework.decorators import action
 from bookings.models import Booking as CoreBooking
+from bookutu.pagination import KeysetPagination
 
 
 class CompatCompanyViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompatCompanySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ['-created_at', '-id']
     filterset_fields = ['status', 'city', 'country']
     search_fields = ['name', 'registration_number']
 
@@ -33,6 +36,8 @@ class CompatBusViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Bus.objects.all()
     serializer_class = CompatBusSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ['-created_at', '-id']
     filterset_fields = ['company', 'status', 'bus_type']
     search_fields = ['license_plate', 'model', 'make']
 
@@ -48,6 +53,8 @@ class CompatRouteViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Route.objects.all()
     serializer_class = CompatRouteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ['-created_at', '-id']
     filterset_fields = ['company', 'is_active', 'origin_city', 'destination_city']
     search_fields = ['name', 'origin_city', 'destination_city']
 
@@ -63,6 +70,8 @@ class CompatTripViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Trip.objects.all()
     serializer_class = CompatTripSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ['departure_date', 'departure_time', 'id']
     filterset_fields = ['company', 'route', 'bus', 'status', 'departure_date']
     search_fields = []
 
@@ -95,6 +104,8 @@ class CompatBookingViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = CoreBooking.objects.all()
     serializer_class = CompatBookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ['-created_at', '-id']
     filterset_fields = ['trip', 'status', 'created_at']
     search_fields = ['booking_reference', 'passenger_name', 'passenger_phone']
 
@@ -105,6 +116,6 @@ class CompatBookingViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(company=user.company)
         else:
             qs = qs.filter(passenger=user)
-        return qs
+        return CompatBookingSerializer.setup_eager_loading(qs)
 
 # Create your views here.
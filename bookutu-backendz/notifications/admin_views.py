@@ -0,0 +1,14 @@
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from accounts.permissions import IsSuperAdmin
+from . import delivery
+
+
+class OutboxStatsView(APIView):
+    """
+    Notification outbox depth and delivery latency for super admin
+    """
+    permission_classes = [IsSuperAdmin]
+    
+    def get(self, request):
+        return Response(delivery.outbox_stats())
@@ -0,0 +1,166 @@
+"""
+Buffered audit logging.
+
+``audit.log`` records a SystemLog event without adding an INSERT to the
+request that caused it. The event is built from the request (user, IP
+address, user agent, method and path) and added to an in-process buffer once
+the surrounding transaction commits, so actions that roll back are never
+logged. The buffer is written with one ``bulk_create`` when it holds
+``AUDIT_LOG_BUFFER_SIZE`` events, when a request finishes and the oldest
+event is ``AUDIT_LOG_FLUSH_SECONDS`` old, after every Celery task, and when
+the process exits. A batch that fails to write is put back and retried by
+the next flush, up to ``MAX_BUFFERED_BATCHES`` batches.
+
+The table is managed by month: the admin logs page reads one month at a
+time over the ``created_at`` index, and ``prune`` (run daily by Celery beat)
+deletes whole months older than ``AUDIT_LOG_RETENTION_MONTHS``.
+"""
+import atexit
+import datetime
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SystemLog
+
+logger = logging.getLogger(__name__)
+
+# Rows removed per DELETE when pruning old months
+PRUNE_BATCH_SIZE = 5000
+
+# Batches kept while the database refuses writes; older events beyond this
+# are dropped (and logged) so an outage cannot grow the buffer without bound
+MAX_BUFFERED_BATCHES = 10
+
+
+def client_ip(request):
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR")
+
+
+class AuditBuffer:
+    """Thread-safe buffer of unsaved SystemLog rows"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._oldest = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event):
+        with self._lock:
+            if not self._events:
+                self._oldest = time.monotonic()
+            self._events.append(event)
+            full = len(self._events) >= getattr(settings, "AUDIT_LOG_BUFFER_SIZE", 100)
+        if full:
+            self.flush()
+
+    def due(self):
+        return bool(self._events) and (
+            time.monotonic() - self._oldest >= getattr(settings, "AUDIT_LOG_FLUSH_SECONDS", 5)
+        )
+
+    def flush(self):
+        """Write buffered events; returns the number written"""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            SystemLog.objects.bulk_create(events, batch_size=500)
+        except Exception as e:
+            # Auditing must never fail the request that triggered the flush
+            logger.error(f"Could not write {len(events)} audit events, will retry: {e}")
+            self._put_back(events)
+            return 0
+        return len(events)
+
+    def _put_back(self, events):
+        cap = getattr(settings, "AUDIT_LOG_BUFFER_SIZE", 100) * MAX_BUFFERED_BATCHES
+        with self._lock:
+            events = events + self._events
+            dropped = len(events) - cap
+            if dropped > 0:
+                logger.error(f"Dropped the {dropped} oldest unwritten audit events")
+                events = events[dropped:]
+            self._events = events
+            self._oldest = time.monotonic()
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.flush)
+
+
+def log(action, description, request=None, user=None, target=None, metadata=None):
+    """
+    Record an audit event for ``action`` (a SystemLog action) once the current
+    transaction commits. ``target`` is the model instance acted on; ``user``
+    defaults to the request's authenticated user.
+    """
+    metadata = dict(metadata or {})
+    event = SystemLog(
+        action=action,
+        description=description,
+        created_at=timezone.now(),
+        metadata=metadata,
+    )
+    if request is not None:
+        if user is None and getattr(request, "user", None) and request.user.is_authenticated:
+            user = request.user
+        event.ip_address = client_ip(request)
+        event.user_agent = request.META.get("HTTP_USER_AGENT", "")
+        metadata.setdefault("method", request.method)
+        metadata.setdefault("path", request.path)
+    if user is not None:
+        event.user_id = user.pk
+    if target is not None:
+        event.target_model = type(target).__name__
+        event.target_id = target.pk
+    transaction.on_commit(lambda: buffer.add(event))
+    return event
+
+
+def flush_if_due():
+    """Write buffered events if the oldest has waited long enough"""
+    if buffer.due():
+        buffer.flush()
+
+
+def month_range(month):
+    """Aware datetimes bounding the month of the date ``month``"""
+    start = month.replace(day=1)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    make = lambda day: timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return make(start), make(end)
+
+
+def prune(now=None):
+    """
+    Delete audit events from months past the retention period. Returns the
+    number of rows deleted.
+    """
+    months = getattr(settings, "AUDIT_LOG_RETENTION_MONTHS", 12)
+    first_kept = timezone.localdate(now).replace(day=1)
+    for _ in range(months - 1):
+        first_kept = (first_kept - datetime.timedelta(days=1)).replace(day=1)
+    cutoff, _ = month_range(first_kept)
+
+    deleted = 0
+    while True:
+        ids = list(
+            SystemLog.objects.filter(created_at__lt=cutoff)
+            .order_by("created_at")
+            .values_list("id", flat=True)[:PRUNE_BATCH_SIZE]
+        )
+        if not ids:
+            return deleted
+        deleted += SystemLog.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,318 @@
+"""
+Notification outbox.
+
+``queue_sms``, ``queue_email`` and ``enqueue_many`` write Notification rows
+in the caller's transaction, so a message exists exactly when the booking
+change it announces commits, and nothing waits on a provider inside the
+request. Once the transaction commits a ``drain_outbox`` task is kicked for
+the channel; Celery beat also drains every channel periodically.
+
+``drain`` claims due rows in batches with a per-claim token, so any number
+of workers can drain the same channel without sending a row twice, and
+sends each batch in one go: SMS through the backend's ``send_many``, email
+over a single reused mail connection. Each channel is held to
+``NOTIFICATION_RATE_LIMITS`` messages a minute across all workers. Failed
+messages are retried with exponential backoff; permanent failures and
+messages out of attempts become DEAD (dead letters) and are left for
+inspection. A row left SENDING by a worker that died is claimed again after
+``STALE_AFTER``.
+
+``outbox_stats`` reports queue depth, dead letters and delivery latency per
+channel.
+"""
+import datetime
+import logging
+import smtplib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import Notification
+from . import sms
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = ("SMS", "EMAIL")
+
+MAX_ATTEMPTS = 5
+
+BATCH_SIZE = 100
+
+# Batches one drain call sends before handing over to the next task
+MAX_BATCHES = 10
+
+PENDING_STATUSES = ("QUEUED", "SENDING", "FAILED")
+
+# Rows mid-send for this long belong to a worker that died
+STALE_AFTER = datetime.timedelta(minutes=15)
+
+
+def _backoff(attempts):
+    return datetime.timedelta(seconds=min(30 * 2 ** (attempts - 1), 3600))
+
+
+def _is_configured(channel):
+    if channel == "SMS":
+        return sms.get_backend().is_configured()
+    return True
+
+
+def kick(channel):
+    """Ask a worker to drain ``channel`` now"""
+    from .tasks import drain_outbox
+
+    try:
+        drain_outbox.delay(channel)
+    except Exception as e:
+        # The rows stay queued for the periodic drain
+        logger.error(f"Could not queue outbox drain for {channel}: {e}")
+
+
+def enqueue(channel, recipient, message, kind, booking=None, subject=""):
+    """
+    Write a message to the outbox as part of the current transaction.
+
+    Returns the Notification, or None when there is no recipient or the
+    channel has no provider configured.
+    """
+    if not recipient or not _is_configured(channel):
+        return None
+    notification = Notification.objects.create(
+        channel=channel,
+        kind=kind,
+        booking=booking,
+        recipient=recipient,
+        subject=subject,
+        message=message,
+    )
+    transaction.on_commit(lambda: kick(channel))
+    return notification
+
+
+def enqueue_many(notifications):
+    """
+    Write unsaved Notification instances to the outbox in bulk as part of the
+    current transaction. Messages whose ``idempotency_key`` has been used
+    before are skipped. Returns the number written.
+    """
+    keys = [notification.idempotency_key for notification in notifications if notification.idempotency_key]
+    if keys:
+        taken = set(
+            Notification.objects.filter(idempotency_key__in=keys).values_list("idempotency_key", flat=True)
+        )
+        notifications = [
+            notification for notification in notifications if notification.idempotency_key not in taken
+        ]
+    # A concurrent writer may still take a key first; the unique constraint skips it
+    Notification.objects.bulk_create(notifications, batch_size=500, ignore_conflicts=bool(keys))
+    for channel in {notification.channel for notification in notifications}:
+        transaction.on_commit(lambda channel=channel: kick(channel))
+    return len(notifications)
+
+
+def queue_sms(recipient, message, kind, booking=None):
+    return enqueue("SMS", recipient, message, kind, booking=booking)
+
+
+def queue_email(recipient, subject, message, kind, booking=None):
+    return enqueue("EMAIL", recipient, message, kind, booking=booking, subject=subject)
+
+
+def _rate_key(channel):
+    return f"notifications:rate:{channel}:{int(time.time() // 60)}"
+
+
+def _limiter():
+    """
+    The cache holding the per-minute counters. It must be shared by every
+    worker process (see bookutu.checks) or each one gets the full allowance.
+    """
+    return caches[getattr(settings, "NOTIFICATION_RATE_LIMIT_CACHE", "default")]
+
+
+def _take(channel, wanted):
+    """Reserve up to ``wanted`` sends from this minute's allowance for ``channel``"""
+    limit = getattr(settings, "NOTIFICATION_RATE_LIMITS", {}).get(channel)
+    if not limit:
+        return wanted
+    limiter = _limiter()
+    key = _rate_key(channel)
+    limiter.add(key, 0, 120)
+    try:
+        used = limiter.incr(key, wanted)
+    except ValueError:
+        limiter.set(key, wanted, 120)
+        used = wanted
+    granted = max(0, min(wanted, limit - (used - wanted)))
+    _give_back(channel, wanted - granted)
+    return granted
+
+
+def _give_back(channel, unused):
+    if unused and getattr(settings, "NOTIFICATION_RATE_LIMITS", {}).get(channel):
+        try:
+            _limiter().decr(_rate_key(channel), unused)
+        except ValueError:
+            pass
+
+
+def _due(now):
+    return Q(status__in=("QUEUED", "FAILED"), next_attempt_at__lte=now) | Q(
+        status="SENDING", updated_at__lt=now - STALE_AFTER
+    )
+
+
+def claim(channel, limit):
+    """Mark up to ``limit`` due messages as being sent by this caller and return them"""
+    now = timezone.now()
+    due = Notification.objects.filter(_due(now), channel=channel)
+    ids = list(due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:limit])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Rows another worker claimed in the meantime no longer match _due
+    due.filter(id__in=ids).update(
+        status="SENDING",
+        claim_token=token,
+        attempts=F("attempts") + 1,
+        updated_at=now,
+    )
+    return list(Notification.objects.filter(claim_token=token).order_by("id"))
+
+
+def _send_email(notifications):
+    results = []
+    try:
+        # One connection for the whole batch
+        with get_connection() as connection:
+            for notification in notifications:
+                try:
+                    EmailMessage(
+                        notification.subject,
+                        notification.message,
+                        settings.DEFAULT_FROM_EMAIL,
+                        [notification.recipient],
+                        connection=connection,
+                    ).send()
+                    results.append("")
+                except Exception as e:
+                    results.append(e)
+    except Exception as e:
+        # Could not connect or the connection dropped; retry what is left
+        results += [e] * (len(notifications) - len(results))
+    return results
+
+
+def _send(channel, notifications):
+    if channel == "SMS":
+        return sms.get_backend().send_many(
+            [(notification.recipient, notification.message) for notification in notifications]
+        )
+    return _send_email(notifications)
+
+
+def _is_retryable(error):
+    return getattr(error, "retryable", not isinstance(error, smtplib.SMTPRecipientsRefused))
+
+
+def _record(notifications, results):
+    now = timezone.now()
+    sent = 0
+    for notification, result in zip(notifications, results):
+        notification.updated_at = now
+        if isinstance(result, Exception):
+            notification.last_error = str(result)
+            if not _is_retryable(result) or notification.attempts >= MAX_ATTEMPTS:
+                notification.status = "DEAD"
+                logger.error(
+                    f"{notification.channel} notification {notification.id} dead after "
+                    f"{notification.attempts} attempts: {result}"
+                )
+            else:
+                notification.status = "FAILED"
+                notification.next_attempt_at = now + _backoff(notification.attempts)
+        else:
+            notification.status = "SENT"
+            notification.provider_reference = result or ""
+            notification.last_error = ""
+            notification.sent_at = now
+            sent += 1
+    Notification.objects.bulk_update(
+        notifications,
+        ["status", "provider_reference", "last_error", "next_attempt_at", "sent_at", "updated_at"],
+    )
+    return sent
+
+
+def drain(channel, batch_size=BATCH_SIZE, max_batches=MAX_BATCHES):
+    """
+    Send due messages on ``channel`` in batches until none are left, the
+    channel's rate limit is reached or ``max_batches`` have been sent.
+
+    Returns ``(sent, more)``: the number sent, and whether due messages may
+    remain.
+    """
+    sent = 0
+    for _ in range(max_batches):
+        allowed = _take(channel, batch_size)
+        if not allowed:
+            return sent, True
+        batch = claim(channel, allowed)
+        _give_back(channel, allowed - len(batch))
+        if not batch:
+            return sent, False
+
+        results = _send(channel, batch)
+        sent += _record(batch, results)
+        oldest = min(notification.created_at for notification in batch)
+        logger.info(
+            f"Outbox {channel}: {len(batch)} delivered in batch, oldest queued "
+            f"{(timezone.now() - oldest).total_seconds():.1f}s ago"
+        )
+        if len(batch) < allowed:
+            return sent, False
+    return sent, True
+
+
+def outbox_stats(window=datetime.timedelta(hours=1)):
+    """
+    Per-channel queue depth, age of the oldest pending message, dead letters,
+    and messages sent with their delivery latency over the last ``window``
+    """
+    now = timezone.now()
+    pending = Q(status__in=PENDING_STATUSES)
+    recent = Q(status="SENT", sent_at__gte=now - window)
+    latency = ExpressionWrapper(F("sent_at") - F("created_at"), output_field=DurationField())
+    rows = {
+        row["channel"]: row
+        for row in Notification.objects.values("channel").annotate(
+            depth=Count("id", filter=pending),
+            oldest=Min("created_at", filter=pending),
+            dead=Count("id", filter=Q(status="DEAD")),
+            sent=Count("id", filter=recent),
+            avg_latency=Avg(latency, filter=recent),
+            max_latency=Max(latency, filter=recent),
+        ).order_by()
+    }
+
+    def seconds(value):
+        return round(value.total_seconds(), 3) if value is not None else None
+
+    stats = {}
+    for channel in CHANNELS:
+        row = rows.get(channel, {})
+        stats[channel] = {
+            "depth": row.get("depth", 0),
+            "oldest_pending_seconds": seconds(now - row["oldest"]) if row.get("oldest") else None,
+            "dead": row.get("dead", 0),
+            "sent": row.get("sent", 0),
+            "avg_latency_seconds": seconds(row.get("avg_latency")),
+            "max_latency_seconds": seconds(row.get("max_latency")),
+        }
+    return stats
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def dead_letter_failed(apps, schema_editor):
+    # FAILED used to be final; it now means a retry is scheduled
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.filter(status='FAILED').update(status='DEAD')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notificatio_status_9a4505_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='claim_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='subject',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='channel',
+            field=models.CharField(choices=[('SMS', 'SMS'), ('EMAIL', 'Email')], default='SMS', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('TICKET', 'Ticket'), ('REMINDER', 'Reminder'), ('CANCELLATION', 'Cancellation'), ('REPORT', 'Report'), ('PASSWORD_RESET', 'Password Reset')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed, will retry'), ('DEAD', 'Dead letter')], default='QUEUED', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['channel', 'status', 'next_attempt_at'], name='notificatio_channel_ecc20a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['claim_token'], name='notificatio_claim_t_66ad01_idx'),
+        ),
+        migrations.RunPython(dead_letter_failed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:54
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemlog',
+            name='action',
+            field=models.CharField(choices=[('USER_CREATED', 'User Created'), ('USER_UPDATED', 'User Updated'), ('USER_DELETED', 'User Deleted'), ('COMPANY_CREATED', 'Company Created'), ('COMPANY_VERIFIED', 'Company Verified'), ('COMPANY_SUSPENDED', 'Company Suspended'), ('COMPANY_ACTIVATED', 'Company Activated'), ('COMPANY_UNVERIFIED', 'Company Unverified'), ('BOOKING_CREATED', 'Booking Created'), ('BOOKING_CANCELLED', 'Booking Cancelled'), ('PAYMENT_PROCESSED', 'Payment Processed'), ('SYSTEM_SETTING_CHANGED', 'System Setting Changed')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='systemlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['created_at'], name='notificatio_created_79e3df_idx'),
+        ),
+    ]
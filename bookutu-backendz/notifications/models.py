@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -54,6 +55,8 @@ class SystemLog(models.Model):
         ('COMPANY_CREATED', 'Company Created'),
         ('COMPANY_VERIFIED', 'Company Verified'),
         ('COMPANY_SUSPENDED', 'Company Suspended'),
+        ('COMPANY_ACTIVATED', 'Company Activated'),
+        ('COMPANY_UNVERIFIED', 'Company Unverified'),
         ('BOOKING_CREATED', 'Booking Created'),
         ('BOOKING_CANCELLED', 'Booking Cancelled'),
         ('PAYMENT_PROCESSED', 'Payment Processed'),
@@ -72,7 +75,8 @@ class SystemLog(models.Model):
     # Store additional data as JSON
     metadata = models.JSONField(default=dict, blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered row is written
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'notifications_system_log'
@@ -82,7 +86,81 @@ class SystemLog(models.Model):
         indexes = [
             models.Index(fields=['action', 'created_at']),
             models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['created_at']),
         ]
     
     def __str__(self):
         return f"{self.action} - {self.created_at}"
+
+
+class Notification(models.Model):
+    """
+    Outbox of messages to passengers and companies, and their delivery status
+
+    Rows are written in the same transaction as the change they announce and
+    sent by workers draining the outbox (see notifications.delivery).
+    """
+    CHANNEL_CHOICES = [
+        ('SMS', 'SMS'),
+        ('EMAIL', 'Email'),
+    ]
+    
+    KIND_CHOICES = [
+        ('TICKET', 'Ticket'),
+        ('REMINDER', 'Reminder'),
+        ('CANCELLATION', 'Cancellation'),
+        ('REPORT', 'Report'),
+        ('PASSWORD_RESET', 'Password Reset'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed, will retry'),
+        ('DEAD', 'Dead letter'),
+    ]
+    
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='SMS')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    booking = models.ForeignKey(
+        'bookings.Booking', on_delete=models.CASCADE, null=True, blank=True, related_name='notifications'
+    )
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=200, blank=True)
+    message = models.TextField()
+    # Set for messages that must go out at most once, e.g. "daily-report:<company>:<date>"
+    idempotency_key = models.CharField(max_length=100, blank=True)
+    
+    # Delivery
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    provider_reference = models.CharField(max_length=100, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notifications_notification'
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notifications'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['booking', 'kind']),
+            models.Index(fields=['channel', 'status', 'next_attempt_at']),
+            models.Index(fields=['claim_token']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=~models.Q(idempotency_key=''),
+                name='unique_notification_idempotency_key',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.channel} {self.kind} to {self.recipient} - {self.status}"
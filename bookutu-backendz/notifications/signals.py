@@ -0,0 +1,22 @@
+from celery.signals import task_postrun, worker_process_shutdown
+from django.core.signals import request_finished
+from django.dispatch import receiver
+from . import audit
+
+
+@receiver(request_finished)
+def flush_audit_log(sender, **kwargs):
+    """
+    Write buffered audit events once the oldest has waited long enough
+    """
+    audit.flush_if_due()
+
+
+@task_postrun.connect
+@worker_process_shutdown.connect
+def flush_audit_log_after_task(**kwargs):
+    """
+    Write events logged by a Celery task; prefork children leave with
+    os._exit, which skips the atexit flush
+    """
+    audit.buffer.flush()
@@ -0,0 +1,128 @@
+"""
+SMS provider backends.
+
+``SMS_BACKEND`` names the backend class. ``HttpSmsBackend`` posts to the
+provider API at ``SMS_API_URL`` through one pooled ``requests.Session`` per
+process, so consecutive messages reuse open connections, and ``send_many``
+sends a batch over that pool with at most ``SMS_POOL_SIZE`` requests in
+flight. ``LocMemSmsBackend`` keeps messages in ``notifications.sms.outbox``
+instead of sending them, for tests and local development.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+SENDER_ID = "BOOKUTU"
+
+# Messages "sent" through LocMemSmsBackend, as (to, message) pairs
+outbox = []
+
+
+class SmsError(Exception):
+    """
+    Delivery failed. ``retryable`` is False when sending the same message
+    again cannot succeed (rejected number, bad credentials).
+    """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class BaseSmsBackend:
+    def is_configured(self):
+        return True
+
+    def send(self, to, message):
+        """Send one message and return the provider's reference, or raise SmsError"""
+        raise NotImplementedError
+
+    def send_many(self, messages):
+        """
+        Send ``(to, message)`` pairs. Returns one result per message, in order:
+        the provider's reference, or the SmsError it failed with.
+        """
+        return [self._send_one(to, message) for to, message in messages]
+
+    def _send_one(self, to, message):
+        try:
+            return self.send(to, message)
+        except SmsError as e:
+            return e
+
+
+class LocMemSmsBackend(BaseSmsBackend):
+    def send(self, to, message):
+        outbox.append((to, message))
+        return f"locmem-{len(outbox)}"
+
+
+class HttpSmsBackend(BaseSmsBackend):
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=getattr(settings, "SMS_POOL_SIZE", 10),
+            max_retries=0,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {settings.SMS_API_KEY}",
+            "Content-Type": "application/json",
+        })
+
+    def is_configured(self):
+        return bool(settings.SMS_API_KEY and settings.SMS_API_URL)
+
+    def send_many(self, messages):
+        messages = list(messages)
+        workers = min(getattr(settings, "SMS_POOL_SIZE", 10), len(messages))
+        if workers <= 1:
+            return super().send_many(messages)
+        # One thread per pooled connection; the provider has no bulk endpoint
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda pair: self._send_one(*pair), messages))
+
+    def send(self, to, message):
+        try:
+            response = self.session.post(
+                settings.SMS_API_URL,
+                json={"to": to, "message": message, "from": SENDER_ID},
+                timeout=getattr(settings, "SMS_TIMEOUT", 10),
+            )
+        except requests.RequestException as e:
+            raise SmsError(f"SMS provider unreachable: {e}")
+
+        if response.status_code >= 500 or response.status_code == 429:
+            raise SmsError(f"SMS provider returned {response.status_code}")
+        if response.status_code != 200:
+            raise SmsError(
+                f"SMS provider rejected message: {response.status_code} {response.text[:200]}",
+                retryable=False,
+            )
+        try:
+            return str(response.json().get("id", ""))
+        except ValueError:
+            return ""
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The configured backend, created once per process"""
+    global _backend
+    path = getattr(settings, "SMS_BACKEND", "notifications.sms.HttpSmsBackend")
+    if _backend is None or type(_backend).__module__ + "." + type(_backend).__name__ != path:
+        with _backend_lock:
+            _backend = import_string(path)()
+    return _backend
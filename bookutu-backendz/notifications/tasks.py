@@ -0,0 +1,43 @@
+from celery import shared_task
+from . import audit, delivery
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def drain_outbox(channel=None):
+    """
+    Send due outbox messages for one channel, or for all of them when run
+    periodically
+    """
+    try:
+        summary = []
+        for name in [channel] if channel else delivery.CHANNELS:
+            sent, more = delivery.drain(name)
+            if more and sent:
+                # Backlog left: hand the rest to the next free worker
+                drain_outbox.delay(name)
+            summary.append(f"{name}: {sent} sent")
+        if channel is None:
+            for name, stats in delivery.outbox_stats().items():
+                logger.info(f"Outbox {name} metrics: {stats}")
+        return "; ".join(summary)
+    except Exception as e:
+        logger.error(f"Error draining notification outbox: {e}")
+        return f"Error: {e}"
+
+
+@shared_task
+def prune_system_logs():
+    """
+    Daily task to delete audit log months past the retention period
+    """
+    try:
+        deleted = audit.prune()
+        if deleted:
+            logger.info(f"Pruned {deleted} audit log entries")
+        return f"Pruned {deleted} audit log entries"
+    except Exception as e:
+        logger.error(f"Error pruning audit logs: {e}")
+        return f"Error: {e}"
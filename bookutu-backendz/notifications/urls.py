@@ -0,0 +1,7 @@
+from django.urls import path
+from .admin_views import OutboxStatsView
+
+urlpatterns = [
+    # Delivery monitoring
+    path('admin/outbox-stats/', OutboxStatsView.as_view(), name='admin_outbox_stats'),
+]
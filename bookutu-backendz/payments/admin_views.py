@@ -8,6 +8,8 @@ from datetime import timedelta
 from .models import Payment, CompanyEarnings, Refund
 from accounts.permissions import IsSuperAdmin
 from companies.models import Company
+from bookutu import metrics
+from notifications import audit
 
 
 class PlatformFinancialStatsView(APIView):
@@ -17,76 +19,8 @@ class PlatformFinancialStatsView(APIView):
     permission_classes = [IsSuperAdmin]
     
     def get(self, request):
-        today = timezone.now().date()
-        
-        # Overall financial stats
-        financial_stats = {
-            'total_revenue': float(
-                Payment.objects.filter(status='COMPLETED').aggregate(
-                    total=Sum('amount')
-                )['total'] or 0
-            ),
-            'today_revenue': float(
-                Payment.objects.filter(
-                    status='COMPLETED',
-                    completed_at__date=today
-                ).aggregate(total=Sum('amount'))['total'] or 0
-            ),
-            'pending_payments': float(
-                Payment.objects.filter(status='PENDING').aggregate(
-                    total=Sum('amount')
-                )['total'] or 0
-            ),
-            'total_refunds': float(
-                Refund.objects.filter(status='COMPLETED').aggregate(
-                    total=Sum('amount')
-                )['total'] or 0
-            ),
-            'platform_commission': float(
-                CompanyEarnings.objects.aggregate(
-                    total=Sum('platform_commission')
-                )['total'] or 0
-            ),
-            'pending_payouts': float(
-                CompanyEarnings.objects.filter(
-                    date__lte=today
-                ).aggregate(total=Sum('net_earnings'))['total'] or 0
-            )
-        }
-        
-        # Payment method breakdown
-        payment_methods = Payment.objects.filter(
-            status='COMPLETED'
-        ).values('payment_method').annotate(
-            count=Count('id'),
-            total_amount=Sum('amount')
-        ).order_by('-total_amount')
-        
-        financial_stats['payment_methods'] = [
-            {
-                'method': method['payment_method'],
-                'count': method['count'],
-                'total_amount': float(method['total_amount'])
-            }
-            for method in payment_methods
-        ]
-        
-        # Top earning companies
-        top_companies = CompanyEarnings.objects.values(
-            'company__name'
-        ).annotate(
-            total_earnings=Sum('gross_revenue'),
-            total_commission=Sum('platform_commission')
-        ).order_by('-total_earnings')[:10]
-        
-        financial_stats['top_earning_companies'] = [
-            {
-                'company_name': company['company__name'],
-                'total_earnings': float(company['total_earnings'] or 0),
-                'total_commission': float(company['total_commission'] or 0)
-            }
-            for company in top_companies
-        ]
+        # One aggregate per table plus the two breakdowns, cached briefly
+        financial_stats = metrics.financial_metrics()
         
         return Response(financial_stats)
 
@@ -160,6 +94,13 @@ def process_company_payout(request, company_id):
     
     # In a real implementation, this would integrate with payment gateway
     # to process the actual payout
+    audit.log(
+        'PAYMENT_PROCESSED',
+        f'Payout of {pending_earnings} processed for {company.name}',
+        request=request,
+        target=company,
+        metadata={'amount': str(pending_earnings)},
+    )
     
     return Response({
         'message': f'Payout of {pending_earnings} processed for {company.name}',
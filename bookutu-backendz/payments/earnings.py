@@ -0,0 +1,196 @@
+"""
+Daily CompanyEarnings rollups.
+
+One CompanyEarnings row holds a company's takings for one local day: money
+from completed payments, less completed refunds, split by payment method,
+with the platform commission taken at the company's ``commission_rate``.
+
+Rows are refreshed from the payments and refunds of their day whenever one of
+those changes (see ``payments.signals``), so recomputing is idempotent and a
+repeated signal never double counts. ``rebuild`` recomputes a whole range in
+bulk for backfills.
+"""
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import CompanyEarnings, Payment, Refund
+
+logger = logging.getLogger(__name__)
+
+# Payment statuses that mean money was received. Refunded payments still
+# count here; the refund itself is subtracted on the day it completes.
+PAID_STATUSES = ("COMPLETED", "REFUNDED")
+REFUNDED_STATUSES = ("COMPLETED",)
+
+# Statuses that cannot have changed a day's takings yet
+IN_FLIGHT_STATUSES = ("PENDING", "PROCESSING")
+
+METHOD_FIELDS = {
+    "CASH": "cash_payments",
+    "MOBILE_MONEY": "mobile_money_payments",
+    "CARD": "card_payments",
+}
+
+ROW_FIELDS = (
+    "total_bookings",
+    "gross_revenue",
+    "platform_commission",
+    "net_earnings",
+) + tuple(METHOD_FIELDS.values())
+
+CENT = Decimal("0.01")
+
+
+def earnings_date(payment_or_refund):
+    """The local day a payment or refund is booked against"""
+    moment = payment_or_refund.completed_at or payment_or_refund.created_at or timezone.now()
+    return timezone.localdate(moment)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _in_range(queryset, company_field, company_ids, start, end):
+    queryset = queryset.annotate(
+        settled_at=Coalesce("completed_at", "created_at")
+    )
+    if company_ids is not None:
+        queryset = queryset.filter(**{f"{company_field}__in": company_ids})
+    if start is not None:
+        queryset = queryset.filter(settled_at__gte=_day_start(start))
+    if end is not None:
+        queryset = queryset.filter(
+            settled_at__lt=_day_start(end + datetime.timedelta(days=1))
+        )
+    return queryset.annotate(day=TruncDate("settled_at"))
+
+
+def compute_rows(company_ids=None, start=None, end=None):
+    """
+    Build unsaved CompanyEarnings rows from payments and refunds.
+
+    ``start``/``end`` are inclusive local dates; either may be omitted. Two
+    grouped queries read the payments (amounts by method, then bookings) and
+    one the refunds.
+    """
+    from companies.models import Company
+
+    totals = defaultdict(lambda: defaultdict(Decimal))
+
+    payments = _in_range(
+        Payment.objects.filter(status__in=PAID_STATUSES),
+        "company_id", company_ids, start, end,
+    )
+    for row in payments.values("company_id", "day", "payment_method").annotate(
+        amount=Sum("amount")
+    ).order_by():
+        entry = totals[(row["company_id"], row["day"])]
+        entry["gross_revenue"] += row["amount"]
+        field = METHOD_FIELDS.get(row["payment_method"])
+        if field:
+            entry[field] += row["amount"]
+
+    # Counted per day rather than per method, so a booking paid in two
+    # methods (say a retry after a partial payment) is counted once
+    for row in payments.values("company_id", "day").annotate(
+        bookings=Count("booking", distinct=True)
+    ).order_by():
+        totals[(row["company_id"], row["day"])]["total_bookings"] = row["bookings"]
+
+    refunds = _in_range(
+        Refund.objects.filter(status__in=REFUNDED_STATUSES),
+        "payment__company_id", company_ids, start, end,
+    )
+    for row in refunds.values(
+        "payment__company_id", "day", "payment__payment_method"
+    ).annotate(amount=Sum("amount")).order_by():
+        entry = totals[(row["payment__company_id"], row["day"])]
+        entry["gross_revenue"] -= row["amount"]
+        field = METHOD_FIELDS.get(row["payment__payment_method"])
+        if field:
+            entry[field] -= row["amount"]
+
+    rates = dict(
+        Company.objects.filter(id__in={company_id for company_id, _ in totals})
+        .values_list("id", "commission_rate")
+    )
+
+    rows = []
+    for (company_id, day), entry in totals.items():
+        gross = entry["gross_revenue"]
+        commission = (gross * rates[company_id] / 100).quantize(CENT)
+        rows.append(CompanyEarnings(
+            company_id=company_id,
+            date=day,
+            total_bookings=int(entry["total_bookings"]),
+            gross_revenue=gross,
+            platform_commission=commission,
+            net_earnings=gross - commission,
+            **{field: entry[field] for field in METHOD_FIELDS.values()},
+        ))
+    return rows
+
+
+def _write_batch(batch):
+    CompanyEarnings.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=["company", "date"],
+        update_fields=ROW_FIELDS + ("updated_at",),
+    )
+
+
+def _store(rows, company_ids, start, end, batch_size=500):
+    """Upsert ``rows`` and drop rows in the range that no longer have activity"""
+    now = timezone.now()
+    for row in rows:
+        row.created_at = row.updated_at = now
+    for offset in range(0, len(rows), batch_size):
+        _write_batch(rows[offset:offset + batch_size])
+
+    stale = CompanyEarnings.objects.all()
+    if company_ids is not None:
+        stale = stale.filter(company_id__in=company_ids)
+    if start is not None:
+        stale = stale.filter(date__gte=start)
+    if end is not None:
+        stale = stale.filter(date__lte=end)
+    keep = {(row.company_id, row.date) for row in rows}
+    stale_ids = [
+        pk for pk, company_id, day in stale.values_list("id", "company_id", "date")
+        if (company_id, day) not in keep
+    ]
+    CompanyEarnings.objects.filter(id__in=stale_ids).delete()
+    return len(stale_ids)
+
+
+def refresh_day(company_id, day):
+    """Recompute one company's row for one day"""
+    with transaction.atomic():
+        _store(compute_rows([company_id], day, day), [company_id], day, day)
+
+
+def schedule_refresh(company_id, day):
+    """Refresh the row once the current transaction commits"""
+    transaction.on_commit(lambda: refresh_day(company_id, day))
+
+
+def rebuild(company_ids=None, start=None, end=None, batch_size=500):
+    """
+    Recompute every row in the range from payments and refunds.
+
+    Returns ``(written, removed)`` row counts.
+    """
+    with transaction.atomic():
+        rows = compute_rows(company_ids, start, end)
+        removed = _store(rows, company_ids, start, end, batch_size=batch_size)
+    logger.info(f"Company earnings rebuilt: {len(rows)} rows, {removed} removed")
+    return len(rows), removed
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Payment, Refund
+from . import earnings
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_payment_earnings(sender, instance, **kwargs):
+    """
+    Roll a settled payment into its company's earnings for the day
+    """
+    if kwargs.get("signal") is post_save and instance.status in earnings.IN_FLIGHT_STATUSES:
+        return
+    earnings.schedule_refresh(instance.company_id, earnings.earnings_date(instance))
+
+
+@receiver(post_save, sender=Refund)
+@receiver(post_delete, sender=Refund)
+def refresh_refund_earnings(sender, instance, **kwargs):
+    if kwargs.get("signal") is post_save and instance.status in earnings.IN_FLIGHT_STATUSES:
+        return
+    company_id = Payment.objects.filter(pk=instance.payment_id).values_list(
+        "company_id", flat=True
+    ).first()
+    if company_id:
+        earnings.schedule_refresh(company_id, earnings.earnings_date(instance))
@@ -2,8 +2,12 @@ from django.urls import path
 from .admin_views import (
     PlatformFinancialStatsView, company_earnings_report, process_company_payout
 )
+from .views import PaymentExportView
 
 urlpatterns = [
+    # Company exports
+    path('export/', PaymentExportView.as_view(), name='company_payment_export'),
+    
     # Financial Management
     path('admin/financial-stats/', PlatformFinancialStatsView.as_view(), name='admin_financial_stats'),
     path('admin/earnings-report/', company_earnings_report, name='admin_earnings_report'),
@@ -0,0 +1,66 @@
+from rest_framework import generics, status
+from rest_framework.response import Response
+from django.utils import timezone
+from .models import Payment
+from accounts.permissions import IsCompanyStaff
+from bookutu import exports, reporting
+
+
+PAYMENT_EXPORT_COLUMNS = (
+    ('payment_reference', 'payment_reference'),
+    ('booking_reference', 'booking__booking_reference'),
+    ('amount', 'amount'),
+    ('currency', 'currency'),
+    ('payment_method', 'payment_method'),
+    ('status', 'status'),
+    ('mobile_money_provider', 'mobile_money_provider'),
+    ('mobile_money_number', 'mobile_money_number'),
+    ('gateway_transaction_id', 'gateway_transaction_id'),
+    ('created_at', 'created_at'),
+    ('completed_at', 'completed_at'),
+)
+
+
+class PaymentExportView(generics.GenericAPIView):
+    """
+    Stream the company's payments as CSV or NDJSON (``?output=ndjson``)
+
+    Filters: ``status``, ``payment_method``, ``search`` and an inclusive
+    ``date_from``/``date_to`` on the payment date.
+    """
+    permission_classes = [IsCompanyStaff]
+    filterset_fields = ['status', 'payment_method']
+    search_fields = ['payment_reference', 'booking__booking_reference', 'gateway_transaction_id']
+    ordering_fields = ['created_at', 'completed_at', 'amount']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        return Payment.objects.filter(company=self.request.user.company)
+
+    def get(self, request):
+        payments = self.filter_queryset(self.get_queryset())
+
+        date_from = request.query_params.get('date_from')
+        date_to = request.query_params.get('date_to')
+        if date_from or date_to:
+            try:
+                start = timezone.datetime.strptime(date_from or '2000-01-01', '%Y-%m-%d').date()
+                end = (
+                    timezone.datetime.strptime(date_to, '%Y-%m-%d').date()
+                    if date_to else timezone.localdate()
+                )
+            except ValueError:
+                return Response({
+                    'error': 'Invalid date format. Use YYYY-MM-DD'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            payments = reporting.date_range_filter(payments, 'created_at', start, end)
+
+        try:
+            return exports.stream_export(
+                payments,
+                PAYMENT_EXPORT_COLUMNS,
+                request.query_params.get('output', 'csv'),
+                f"payments-{timezone.localdate()}",
+            )
+        except exports.InvalidFormat as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
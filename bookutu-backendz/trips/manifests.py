@@ -0,0 +1,322 @@
+"""
+Passenger manifests for many trips at once.
+
+``build_manifests`` loads the trips, their confirmed passengers and the
+payment method counts with three queries however many trips are included, so
+a terminal can print every departure of the morning in one request. Built
+manifests are cached per trip and keyed on a cheap version query, and
+``pregenerate_upcoming`` (run by Celery beat) warms the cache for trips
+departing within the next hour.
+
+Manifests render as JSON-ready dicts, fixed-width text for thermal receipt
+printers, or a plain monospaced PDF.
+"""
+import datetime
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Trip
+
+logger = logging.getLogger(__name__)
+
+# Characters per line on an 80mm receipt printer
+PRINT_WIDTH = 42
+
+PASSENGER_FIELDS = {
+    "booking_reference": "booking_reference",
+    "passenger_name": "passenger_name",
+    "passenger_phone": "passenger_phone",
+    "seat_number": "seat__seat_number",
+    "seat_type": "seat__seat_type",
+    "amount_paid": "total_amount",
+    "booking_source": "source",
+    "created_at": "created_at",
+}
+
+
+def _cache_timeout():
+    return getattr(settings, "MANIFEST_CACHE_TIMEOUT", 2 * 60 * 60)
+
+
+def _cache_key(trip_id):
+    return f"manifest:trip:{trip_id}"
+
+
+def trips_departing(company, departure_date, terminal=None):
+    """The company's non-cancelled trips leaving on a date, optionally from one terminal"""
+    trips = Trip.objects.filter(
+        company=company, departure_date=departure_date
+    ).exclude(status="CANCELLED")
+    if terminal:
+        trips = trips.filter(route__origin_terminal__iexact=terminal)
+    return trips.order_by("departure_time", "id")
+
+
+def _trip_info(trip):
+    return {
+        "id": trip.id,
+        "route": f"{trip.route.origin_city} → {trip.route.destination_city}",
+        "route_name": trip.route.name,
+        "origin_terminal": trip.route.origin_terminal,
+        "destination_terminal": trip.route.destination_terminal,
+        "departure_date": trip.departure_date,
+        "departure_time": trip.departure_time,
+        "arrival_time": trip.arrival_time,
+        "bus_registration": trip.bus.license_plate,
+        "driver_name": trip.driver_name,
+        "driver_phone": trip.driver_phone,
+        "conductor_name": trip.conductor_name,
+        "conductor_phone": trip.conductor_phone,
+        "status": trip.status,
+        "available_seats": trip.available_seats,
+        "booked_seats": trip.booked_seats,
+    }
+
+
+def _build(trips):
+    from bookings.models import Booking
+    from payments.models import Payment
+
+    trip_ids = [trip.id for trip in trips]
+    passengers = defaultdict(list)
+    rows = Booking.objects.filter(trip_id__in=trip_ids, status="CONFIRMED").order_by(
+        "trip_id", "seat__row_number", "seat__seat_number"
+    ).values("trip_id", *PASSENGER_FIELDS.values())
+    for row in rows:
+        passengers[row["trip_id"]].append(
+            {name: row[field] for name, field in PASSENGER_FIELDS.items()}
+        )
+
+    payment_methods = defaultdict(dict)
+    for row in Payment.objects.filter(
+        booking__trip_id__in=trip_ids, booking__status="CONFIRMED", status="COMPLETED"
+    ).values("booking__trip_id", "payment_method").annotate(count=Count("id")).order_by():
+        payment_methods[row["booking__trip_id"]][row["payment_method"]] = row["count"]
+
+    manifests = {}
+    for trip in trips:
+        trip_passengers = passengers[trip.id]
+        manifests[trip.id] = {
+            "trip_info": _trip_info(trip),
+            "passengers": trip_passengers,
+            "summary": {
+                "total_passengers": len(trip_passengers),
+                "total_revenue": sum(
+                    (passenger["amount_paid"] for passenger in trip_passengers), Decimal(0)
+                ),
+                "payment_methods": payment_methods[trip.id],
+            },
+        }
+    return manifests
+
+
+def _versions(trip_ids):
+    """A value per trip that changes whenever its manifest could"""
+    return {
+        trip_id: version
+        for trip_id, *version in Trip.objects.filter(id__in=trip_ids)
+        .annotate(
+            changed=Max("bookings__updated_at"),
+            paid=Max("bookings__payments__updated_at"),
+            count=Count("bookings", distinct=True),
+        )
+        .values_list(
+            "id",
+            "updated_at",
+            "booked_seats",
+            "route__updated_at",
+            "bus__updated_at",
+            "changed",
+            "paid",
+            "count",
+        )
+        .order_by()
+    }
+
+
+def build_manifests(trips, use_cache=True):
+    """
+    Manifests for ``trips`` (a Trip queryset), in queryset order.
+
+    Cached manifests are reused while their trip, route, bus and bookings are
+    unchanged; the rest are built together.
+    """
+    trips = list(trips.select_related("route", "bus"))
+    if not use_cache:
+        built = _build(trips)
+        return [built[trip.id] for trip in trips]
+
+    versions = _versions([trip.id for trip in trips])
+    cached = cache.get_many([_cache_key(trip.id) for trip in trips])
+    manifests = {}
+    stale = []
+    for trip in trips:
+        entry = cached.get(_cache_key(trip.id))
+        if entry is not None and entry["version"] == versions.get(trip.id):
+            manifests[trip.id] = entry["manifest"]
+        else:
+            stale.append(trip)
+
+    if stale:
+        built = _build(stale)
+        manifests.update(built)
+        cache.set_many(
+            {
+                _cache_key(trip_id): {"version": versions.get(trip_id), "manifest": manifest}
+                for trip_id, manifest in built.items()
+            },
+            _cache_timeout(),
+        )
+    return [manifests[trip.id] for trip in trips]
+
+
+def pregenerate_upcoming(within=datetime.timedelta(hours=1)):
+    """
+    Build and cache manifests for trips departing in the next ``within``.
+
+    Returns the number of trips covered. The manifests are built in a Celery
+    worker for web processes to serve, so nothing is done unless the cache
+    is shared between processes.
+    """
+    from bookutu.checks import cache_is_shared
+
+    if not cache_is_shared():
+        logger.warning("Skipping manifest pre-generation: the default cache is local to each process")
+        return 0
+    now = timezone.localtime()
+    until = now + within
+    candidates = Trip.objects.filter(
+        departure_date__in={now.date(), until.date()}, status="SCHEDULED"
+    )
+    trip_ids = [
+        trip_id
+        for trip_id, departure_date, departure_time in candidates.values_list(
+            "id", "departure_date", "departure_time"
+        )
+        if now <= timezone.make_aware(
+            datetime.datetime.combine(departure_date, departure_time)
+        ) <= until
+    ]
+    if trip_ids:
+        build_manifests(Trip.objects.filter(id__in=trip_ids))
+        logger.info(f"Pre-generated manifests for {len(trip_ids)} trips")
+    return len(trip_ids)
+
+
+def _clip(text, width):
+    text = "" if text is None else str(text)
+    return text if len(text) <= width else text[:width - 1] + "~"
+
+
+def _format_time(value):
+    return value.strftime("%H:%M") if value else ""
+
+
+def render_text(manifests, width=PRINT_WIDTH):
+    """
+    Fixed-width text for receipt printers, one manifest per form feed.
+    """
+    pages = []
+    for manifest in manifests:
+        info = manifest["trip_info"]
+        summary = manifest["summary"]
+        lines = [
+            "=" * width,
+            _clip(info["route"], width).center(width),
+            _clip(
+                f"{info['departure_date']:%Y-%m-%d} {_format_time(info['departure_time'])}"
+                f" - {_format_time(info['arrival_time'])}",
+                width,
+            ).center(width),
+            "=" * width,
+            _clip(f"Terminal: {info['origin_terminal']}", width),
+            _clip(f"Bus: {info['bus_registration']}", width),
+            _clip(f"Driver: {info['driver_name'] or '-'} {info['driver_phone'] or ''}", width),
+        ]
+        if info["conductor_name"]:
+            lines.append(_clip(
+                f"Conductor: {info['conductor_name']} {info['conductor_phone'] or ''}", width
+            ))
+        lines.append("-" * width)
+
+        name_width = width - 5 - 12 - 2
+        lines.append(f"{'Seat':<5}{'Passenger':<{name_width}}  {'Phone':>12}"[:width])
+        for passenger in manifest["passengers"]:
+            lines.append(
+                f"{_clip(passenger['seat_number'], 4):<5}"
+                f"{_clip(passenger['passenger_name'], name_width):<{name_width}}  "
+                f"{_clip(passenger['passenger_phone'], 12):>12}"
+            )
+        if not manifest["passengers"]:
+            lines.append("No confirmed passengers".center(width))
+
+        lines += [
+            "-" * width,
+            _clip(f"Passengers: {summary['total_passengers']}", width),
+            _clip(f"Revenue: UGX {summary['total_revenue']:,.0f}", width),
+            "",
+        ]
+        pages.append("\n".join(lines))
+    return "\n\f".join(pages) + "\n"
+
+
+def _pdf_text(line):
+    line = line.replace("→", "->")
+    line = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return line.encode("latin-1", "replace")
+
+
+def render_pdf(manifests, lines_per_page=64):
+    """
+    A4 PDF of the text manifests in Courier, starting each trip on a new page.
+
+    Written directly rather than through a PDF library; manifests are plain
+    monospaced text, which needs only the standard Courier font.
+    """
+    pages = []
+    for page in render_text(manifests, width=80).rstrip("\n").split("\n\f"):
+        lines = page.split("\n")
+        for start in range(0, max(len(lines), 1), lines_per_page):
+            pages.append(lines[start:start + lines_per_page])
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        stream = b"BT /F1 9 Tf 11 TL 40 800 Td " + b" ".join(
+            b"(" + _pdf_text(line) + b") '" for line in lines
+        ) + b" ET"
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref
+    )
+    return bytes(output)
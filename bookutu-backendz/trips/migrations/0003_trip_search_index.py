@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_bus_options_and_more'),
+        ('trips', '0002_trip_driver_alter_trip_conductor_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSearchIndex',
+            fields=[
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='trips.trip')),
+                ('origin_city', models.CharField(max_length=100)),
+                ('destination_city', models.CharField(max_length=100)),
+                ('origin_key', models.CharField(max_length=100)),
+                ('destination_key', models.CharField(max_length=100)),
+                ('departure_at', models.DateTimeField()),
+                ('departure_date', models.DateField()),
+                ('departure_time', models.TimeField()),
+                ('arrival_time', models.TimeField()),
+                ('company_name', models.CharField(max_length=200)),
+                ('bus_type', models.CharField(max_length=20)),
+                ('remaining_seats', models.IntegerField()),
+                ('min_fare', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('bus', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.bus')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='trips.route')),
+            ],
+            options={
+                'verbose_name': 'Trip Search Entry',
+                'verbose_name_plural': 'Trip Search Index',
+                'db_table': 'trips_search_index',
+                'ordering': ['departure_at', 'trip'],
+                'indexes': [models.Index(fields=['origin_key', 'destination_key', 'departure_at'], name='trip_search_od_time_idx'), models.Index(fields=['origin_key', 'destination_key', 'min_fare'], name='trip_search_od_fare_idx'), models.Index(fields=['departure_at'], name='trip_search_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_trip_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['departure_date', 'departure_time'], name='trips_trip_departu_0a0e6d_idx'),
+        ),
+    ]
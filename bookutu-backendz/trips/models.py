@@ -4,6 +4,7 @@ from django.utils import timezone #type:ignore
 from django.core.exceptions import ValidationError #type:ignore
 from accounts.managers import TenantAwareManager
 from decimal import Decimal
+from .scheduling import check_bus_schedule, validate_times
 
 logger = logging.getLogger(__name__)
 
@@ -146,6 +147,7 @@ class Trip(models.Model):
             models.Index(fields=["company", "departure_date"]),
             models.Index(fields=["route", "departure_date"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["departure_date", "departure_time"]),
         ]
 
     def __str__(self):
@@ -179,62 +181,29 @@ class Trip(models.Model):
             if not driver_matches.exists():
                 logger.warning(f"Driver {self.driver_name} ({self.driver_phone}) not found in company {self.company} drivers. Consider creating the driver record.")
 
-        # Check for bus scheduling conflicts
-        if (
-            self.bus
-            and self.departure_date
-            and self.departure_time
-            and self.arrival_time
-        ):
-            # Check if bus is already scheduled for another trip at overlapping time
-            # A conflict occurs if:
-            # - Another trip starts during this trip's duration
-            # - Another trip ends during this trip's duration
-            # - Another trip completely encompasses this trip
-            conflicting_trips = (
-                Trip.objects.filter(bus=self.bus, departure_date=self.departure_date)
-                .exclude(pk=self.pk)
-                .filter(
-                    models.Q(
-                        # Other trip starts during this trip
-                        departure_time__gte=self.departure_time,
-                        departure_time__lt=self.arrival_time,
-                    )
-                    | models.Q(
-                        # Other trip ends during this trip
-                        arrival_time__gt=self.departure_time,
-                        arrival_time__lte=self.arrival_time,
-                    )
-                    | models.Q(
-                        # Other trip encompasses this trip
-                        departure_time__lte=self.departure_time,
-                        arrival_time__gte=self.arrival_time,
-                    )
-                )
-            )
-
-            if conflicting_trips.exists():
-                conflict_details = [
-                    f"Trip {t.id}: {t.route.name} ({t.departure_time}-{t.arrival_time})"
-                    for t in conflicting_trips
-                ]
+        # Validate departure and arrival; arrival before departure means the
+        # trip runs overnight and arrives the next day
+        if self.departure_time and self.arrival_time:
+            try:
+                validate_times(self.departure_time, self.arrival_time)
+            except ValidationError:
                 logger.error(
-                    f"Bus scheduling conflict for {self.bus} on {self.departure_date}: {conflict_details}"
-                )
-                raise ValidationError(
-                    f"Bus {self.bus.license_plate} is already scheduled for conflicting trips: {', '.join(conflict_details)}"
+                    f"Trip {self} has invalid times: departure {self.departure_time} == arrival {self.arrival_time}"
                 )
+                raise
 
-        # Validate departure before arrival
+        # Check for bus scheduling conflicts over full departure/arrival datetimes
         if (
-            self.departure_time
+            self.bus
+            and self.departure_date
+            and self.departure_time
             and self.arrival_time
-            and self.departure_time >= self.arrival_time
         ):
-            logger.error(
-                f"Trip {self} has invalid times: departure {self.departure_time} >= arrival {self.arrival_time}"
-            )
-            raise ValidationError("Arrival time must be after departure time")
+            try:
+                check_bus_schedule(self.bus, [self], exclude_ids=[self.pk])
+            except ValidationError:
+                logger.error(f"Bus scheduling conflict for {self.bus} on {self.departure_date}")
+                raise
 
         # Set available seats based on bus capacity if not already set (e.g., for new trips)
         # For existing trips, available_seats might be dynamically updated based on bookings.
@@ -351,3 +320,56 @@ class TripPricing(models.Model):
             final_fare = final_fare * (1 - self.early_bird_discount)
 
         return final_fare.quantize(Decimal("0.01"))
+
+
+class TripSearchIndex(models.Model):
+    """
+    Denormalized read model with one row per bookable trip, used by trip search
+    """
+
+    trip = models.OneToOneField(
+        Trip, on_delete=models.CASCADE, primary_key=True, related_name="search_entry"
+    )
+    company = models.ForeignKey(
+        "companies.Company", on_delete=models.CASCADE, related_name="+"
+    )
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="+")
+    bus = models.ForeignKey("companies.Bus", on_delete=models.CASCADE, related_name="+")
+
+    # Search keys are lower-cased, whitespace-collapsed city names
+    origin_city = models.CharField(max_length=100)
+    destination_city = models.CharField(max_length=100)
+    origin_key = models.CharField(max_length=100)
+    destination_key = models.CharField(max_length=100)
+
+    departure_at = models.DateTimeField()
+    departure_date = models.DateField()
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+
+    company_name = models.CharField(max_length=200)
+    bus_type = models.CharField(max_length=20)
+    remaining_seats = models.IntegerField()
+    min_fare = models.DecimalField(max_digits=10, decimal_places=2)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "trips_search_index"
+        verbose_name = "Trip Search Entry"
+        verbose_name_plural = "Trip Search Index"
+        ordering = ["departure_at", "trip"]
+        indexes = [
+            models.Index(
+                fields=["origin_key", "destination_key", "departure_at"],
+                name="trip_search_od_time_idx",
+            ),
+            models.Index(
+                fields=["origin_key", "destination_key", "min_fare"],
+                name="trip_search_od_fare_idx",
+            ),
+            models.Index(fields=["departure_at"], name="trip_search_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.origin_city} → {self.destination_city} @ {self.departure_at}"
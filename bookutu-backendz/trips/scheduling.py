@@ -0,0 +1,140 @@
+"""
+Bus scheduling conflict detection.
+
+Trips are compared as full departure/arrival datetime intervals. A trip whose
+arrival time is earlier than its departure time arrives the next day, so
+overnight trips overlap correctly with trips on either date. A batch of
+proposed trips for one bus is checked against the bus's existing trips with
+a single query; the overlap tests then run in memory against a sorted
+interval list.
+"""
+import bisect
+import datetime
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+
+# Cancelled trips no longer occupy the bus
+INACTIVE_STATUSES = ("CANCELLED",)
+
+Conflict = namedtuple("Conflict", ["proposed", "existing"])
+
+
+def trip_interval(departure_date, departure_time, arrival_time):
+    """Return ``(start, end)`` datetimes; arrivals before departure are next-day"""
+    start = datetime.datetime.combine(departure_date, departure_time)
+    end = datetime.datetime.combine(departure_date, arrival_time)
+    if arrival_time < departure_time:
+        end += datetime.timedelta(days=1)
+    return start, end
+
+
+def interval_of(trip):
+    return trip_interval(trip.departure_date, trip.departure_time, trip.arrival_time)
+
+
+def validate_times(departure_time, arrival_time):
+    if departure_time == arrival_time:
+        raise ValidationError("Arrival time must differ from departure time")
+
+
+def _overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+class IntervalSet:
+    """
+    Sorted, read-only set of trip intervals with overlap lookups
+    """
+
+    def __init__(self, items):
+        entries = sorted(((interval_of(item), item) for item in items), key=lambda e: e[0])
+        self.intervals = [interval for interval, _ in entries]
+        self.items = [item for _, item in entries]
+        self.starts = [interval[0] for interval in self.intervals]
+        self.longest = max(
+            (end - start for start, end in self.intervals), default=datetime.timedelta(0)
+        )
+
+    def overlapping(self, interval):
+        """Items whose interval overlaps ``interval``"""
+        start, end = interval
+        found = []
+        index = bisect.bisect_left(self.starts, end) - 1
+        # Nothing starting earlier than start - longest can still be running
+        while index >= 0 and self.starts[index] > start - self.longest:
+            if _overlaps(self.intervals[index], interval):
+                found.append(self.items[index])
+            index -= 1
+        return found[::-1]
+
+
+def existing_trips(bus_id, proposed, exclude_ids=()):
+    """
+    One query for every active trip of the bus that could overlap ``proposed``
+    """
+    from .models import Trip
+
+    dates = [item.departure_date for item in proposed]
+    return list(
+        Trip.objects.filter(
+            bus_id=bus_id,
+            # Overnight trips from the previous day can reach into the window
+            departure_date__gte=min(dates) - datetime.timedelta(days=1),
+            departure_date__lte=max(dates),
+        )
+        .exclude(status__in=INACTIVE_STATUSES)
+        .exclude(pk__in=[pk for pk in exclude_ids if pk])
+        .select_related("route")
+        .only(
+            "id", "departure_date", "departure_time", "arrival_time",
+            "status", "route__name",
+        )
+    )
+
+
+def find_conflicts(bus_id, proposed, exclude_ids=()):
+    """
+    Check proposed trips for one bus against its existing trips and each other.
+
+    ``proposed`` items need ``departure_date``, ``departure_time`` and
+    ``arrival_time`` (unsaved Trip instances work). Existing trips listed in
+    ``exclude_ids`` (e.g. the trip being edited) are ignored. Returns a list
+    of ``Conflict(proposed, existing)``; ``existing`` is a Trip or another
+    proposed item.
+    """
+    proposed = list(proposed)
+    if not proposed:
+        return []
+
+    existing = IntervalSet(existing_trips(bus_id, proposed, exclude_ids))
+    conflicts = []
+    for item in proposed:
+        for other in existing.overlapping(interval_of(item)):
+            conflicts.append(Conflict(item, other))
+
+    # Proposed trips must not overlap each other either
+    batch = IntervalSet(proposed)
+    for index, item in enumerate(batch.items):
+        interval = batch.intervals[index]
+        for later in range(index + 1, len(batch.items)):
+            if batch.starts[later] >= interval[1]:
+                break
+            conflicts.append(Conflict(batch.items[later], item))
+    return conflicts
+
+
+def describe(trip):
+    route = getattr(trip, "route", None)
+    label = f"Trip {trip.pk}: {route.name}" if trip.pk and route else "Proposed trip"
+    return f"{label} ({trip.departure_date} {trip.departure_time}-{trip.arrival_time})"
+
+
+def check_bus_schedule(bus, proposed, exclude_ids=()):
+    """Raise ValidationError listing every conflict for ``proposed`` on ``bus``"""
+    conflicts = find_conflicts(bus.pk, proposed, exclude_ids)
+    if conflicts:
+        details = [describe(conflict.existing) for conflict in conflicts]
+        raise ValidationError(
+            f"Bus {bus.license_plate} is already scheduled for conflicting trips: {', '.join(details)}"
+        )
@@ -0,0 +1,183 @@
+"""
+Maintenance and querying of the TripSearchIndex read model.
+
+The index holds one row per bookable trip (SCHEDULED and departing in the
+future) with everything the mobile search screen needs, so a search is a
+single indexed range scan instead of a join over trips, routes, buses and
+companies. Rows are refreshed from signals after commit; trips that stop
+being bookable are removed. ``rebuild_trip_search_index`` re-derives the
+whole table.
+"""
+import datetime
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Trip, TripSearchIndex
+
+logger = logging.getLogger(__name__)
+
+SORT_TIME = "time"
+SORT_PRICE = "price"
+SORT_ORDERINGS = {
+    SORT_TIME: ("departure_at", "pk"),
+    SORT_PRICE: ("min_fare", "departure_at", "pk"),
+}
+
+
+def search_key(city):
+    """Normalise a city name for exact, index-friendly matching"""
+    return " ".join((city or "").split()).lower()
+
+
+def departure_datetime(trip):
+    return timezone.make_aware(
+        datetime.datetime.combine(trip.departure_date, trip.departure_time)
+    )
+
+
+def _indexable_trips():
+    return Trip.objects.select_related("route", "bus", "company").annotate(
+        min_price_multiplier=Min("bus__seats__price_multiplier")
+    )
+
+
+ROW_FIELDS = (
+    "company_id",
+    "route_id",
+    "bus_id",
+    "origin_city",
+    "destination_city",
+    "origin_key",
+    "destination_key",
+    "departure_at",
+    "departure_date",
+    "departure_time",
+    "arrival_time",
+    "company_name",
+    "bus_type",
+    "remaining_seats",
+    "min_fare",
+)
+
+
+def _row_values(trip):
+    multiplier = trip.min_price_multiplier or Decimal("1.00")
+    return {
+        "company_id": trip.company_id,
+        "route_id": trip.route_id,
+        "bus_id": trip.bus_id,
+        "origin_city": trip.route.origin_city,
+        "destination_city": trip.route.destination_city,
+        "origin_key": search_key(trip.route.origin_city),
+        "destination_key": search_key(trip.route.destination_city),
+        "departure_at": departure_datetime(trip),
+        "departure_date": trip.departure_date,
+        "departure_time": trip.departure_time,
+        "arrival_time": trip.arrival_time,
+        "company_name": trip.company.name,
+        "bus_type": trip.bus.bus_type,
+        "remaining_seats": trip.remaining_seats,
+        "min_fare": (trip.base_fare * multiplier).quantize(Decimal("0.01")),
+    }
+
+
+def _is_indexable(trip, now):
+    return trip.status == "SCHEDULED" and departure_datetime(trip) > now
+
+
+def refresh_trips(trip_ids):
+    """Re-derive index rows for ``trip_ids``, dropping unbookable trips"""
+    trip_ids = set(trip_ids)
+    if not trip_ids:
+        return
+    now = timezone.now()
+    rows = [
+        TripSearchIndex(trip_id=trip.id, **_row_values(trip))
+        for trip in _indexable_trips().filter(id__in=trip_ids)
+        if _is_indexable(trip, now)
+    ]
+    if rows:
+        _write_batch(rows)
+    keep = {row.trip_id for row in rows}
+    TripSearchIndex.objects.filter(trip_id__in=trip_ids - keep).delete()
+
+
+def refresh_trip(trip_id):
+    refresh_trips([trip_id])
+
+
+def schedule_refresh(trip_ids):
+    """Refresh rows once the current transaction commits"""
+    trip_ids = list(trip_ids)
+    if trip_ids:
+        transaction.on_commit(lambda: refresh_trips(trip_ids))
+
+
+def rebuild(batch_size=500):
+    """
+    Rebuild the whole index from the trips table.
+
+    Returns ``(indexed, removed)`` row counts.
+    """
+    now = timezone.now()
+    removed, _ = TripSearchIndex.objects.filter(departure_at__lte=now).delete()
+
+    trips = _indexable_trips().filter(
+        status="SCHEDULED", departure_date__gte=timezone.localdate(now)
+    )
+    indexed = 0
+    batch = []
+    for trip in trips.iterator(chunk_size=batch_size):
+        if not _is_indexable(trip, now):
+            continue
+        indexed += 1
+        batch.append(TripSearchIndex(trip_id=trip.id, **_row_values(trip)))
+        if len(batch) >= batch_size:
+            _write_batch(batch)
+            batch = []
+    if batch:
+        _write_batch(batch)
+
+    stale, _ = TripSearchIndex.objects.exclude(trip__status="SCHEDULED").delete()
+    logger.info(f"Trip search index rebuilt: {indexed} rows, {removed + stale} removed")
+    return indexed, removed + stale
+
+
+def _write_batch(batch):
+    TripSearchIndex.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=["trip"],
+        update_fields=ROW_FIELDS + ("updated_at",),
+    )
+
+
+def search(origin=None, destination=None, date_from=None, date_to=None,
+           sort=SORT_TIME, min_seats=1):
+    """
+    Return a queryset of bookable index rows.
+
+    ``date_from``/``date_to`` are inclusive local dates; departures in the
+    past are always excluded.
+    """
+    now = timezone.now()
+    rows = TripSearchIndex.objects.filter(departure_at__gt=now)
+    if origin:
+        rows = rows.filter(origin_key=search_key(origin))
+    if destination:
+        rows = rows.filter(destination_key=search_key(destination))
+    if date_from:
+        start = timezone.make_aware(datetime.datetime.combine(date_from, datetime.time.min))
+        rows = rows.filter(departure_at__gte=start)
+    if date_to:
+        end = timezone.make_aware(
+            datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min)
+        )
+        rows = rows.filter(departure_at__lt=end)
+    if min_seats:
+        rows = rows.filter(remaining_seats__gte=min_seats)
+    return rows.order_by(*SORT_ORDERINGS.get(sort, SORT_ORDERINGS[SORT_TIME]))
@@ -1,7 +1,10 @@
 from rest_framework import serializers
-from .models import Route, Trip, TripPricing
+from .models import Route, Trip, TripPricing, TripSearchIndex
 from companies.models import Bus
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
+from .scheduling import check_bus_schedule, describe, validate_times
+from .timetable import MAX_TIMETABLE_DAYS, Timetable
 
 
 class RouteSerializer(serializers.ModelSerializer):
@@ -11,6 +14,9 @@ class RouteSerializer(serializers.ModelSerializer):
 
     total_trips = serializers.SerializerMethodField()
     upcoming_trips = serializers.SerializerMethodField()
+    next_departure_date = serializers.DateField(read_only=True, default=None)
+    next_departure_time = serializers.TimeField(read_only=True, default=None)
+    average_occupancy = serializers.FloatField(read_only=True, default=None)
 
     class Meta:
         model = Route
@@ -29,13 +35,22 @@ class RouteSerializer(serializers.ModelSerializer):
             "created_at",
             "total_trips",
             "upcoming_trips",
+            "next_departure_date",
+            "next_departure_time",
+            "average_occupancy",
         )
         read_only_fields = ("id", "created_at", "total_trips", "upcoming_trips")
-    
+
+    # Listing views annotate these via trips.stats.with_route_stats; the
+    # COUNT fallbacks only run for single, unannotated routes
     def get_total_trips(self, obj):
+        if hasattr(obj, "total_trips"):
+            return obj.total_trips
         return obj.trips.count()
 
     def get_upcoming_trips(self, obj):
+        if hasattr(obj, "upcoming_trips"):
+            return obj.upcoming_trips
         return obj.trips.filter(
             departure_date__gte=timezone.now().date(), status="SCHEDULED"
         ).count()
@@ -110,8 +125,121 @@ class TripSerializer(serializers.ModelSerializer):
             if attrs.get("driver") and attrs["driver"].company != company:
                 raise serializers.ValidationError("Driver must belong to your company")
 
+        self.validate_schedule(attrs)
+        return attrs
+
+    def validate_schedule(self, attrs):
+        """Reject overlapping trips for the bus, including overnight ones"""
+        def value(field):
+            return attrs.get(field, getattr(self.instance, field, None))
+
+        proposed = Trip(
+            departure_date=value("departure_date"),
+            departure_time=value("departure_time"),
+            arrival_time=value("arrival_time"),
+        )
+        bus = value("bus")
+        if not (bus and proposed.departure_date and proposed.departure_time and proposed.arrival_time):
+            return
+        try:
+            validate_times(proposed.departure_time, proposed.arrival_time)
+            check_bus_schedule(bus, [proposed], exclude_ids=[getattr(self.instance, "pk", None)])
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+
+class TimetableSerializer(serializers.Serializer):
+    """
+    One recurring departure pattern: a route and bus, departure times,
+    weekdays (0 = Monday) and an inclusive date range
+    """
+    route = serializers.PrimaryKeyRelatedField(queryset=Route.objects.all())
+    bus = serializers.PrimaryKeyRelatedField(queryset=Bus.objects.all())
+    departure_times = serializers.ListField(child=serializers.TimeField(), allow_empty=False)
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        required=False,
+    )
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    duration_minutes = serializers.IntegerField(min_value=1, max_value=24 * 60 - 1, required=False)
+    base_fare = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    def validate(self, attrs):
+        request = self.context.get("request")
+        if request and hasattr(request, "user") and request.user.is_company_staff():
+            company = request.user.company
+            if attrs["bus"].company_id != company.id:
+                raise serializers.ValidationError("Bus must belong to your company")
+            if attrs["route"].company_id != company.id:
+                raise serializers.ValidationError("Route must belong to your company")
+        if attrs["end_date"] < attrs["start_date"]:
+            raise serializers.ValidationError("End date must be on or after the start date")
+        if (attrs["end_date"] - attrs["start_date"]).days >= MAX_TIMETABLE_DAYS:
+            raise serializers.ValidationError(
+                f"A timetable can cover at most {MAX_TIMETABLE_DAYS} days"
+            )
         return attrs
 
+    def to_timetable(self, attrs):
+        minutes = attrs.get("duration_minutes")
+        return Timetable(
+            route=attrs["route"],
+            bus=attrs["bus"],
+            departure_times=attrs["departure_times"],
+            start_date=attrs["start_date"],
+            end_date=attrs["end_date"],
+            weekdays=tuple(attrs.get("weekdays") or range(7)),
+            duration=timezone.timedelta(minutes=minutes) if minutes else None,
+            base_fare=attrs.get("base_fare"),
+        )
+
+
+class TimetableRequestSerializer(serializers.Serializer):
+    """
+    Trip generation request; ``dry_run`` previews without writing
+    """
+    timetables = TimetableSerializer(many=True, allow_empty=False)
+    dry_run = serializers.BooleanField(default=False)
+    skip_conflicts = serializers.BooleanField(default=False)
+
+    def get_timetables(self):
+        child = self.fields["timetables"].child
+        return [child.to_timetable(attrs) for attrs in self.validated_data["timetables"]]
+
+
+class TimetableTripSerializer(serializers.ModelSerializer):
+    """
+    Generated (or previewed) trip; ``id`` is null in a dry run
+    """
+
+    class Meta:
+        model = Trip
+        fields = (
+            "id",
+            "route",
+            "bus",
+            "departure_date",
+            "departure_time",
+            "arrival_time",
+            "base_fare",
+            "available_seats",
+        )
+
+
+class TimetableConflictSerializer(serializers.Serializer):
+    """
+    A generated trip that overlaps another trip on the same bus
+    """
+    bus = serializers.IntegerField(source="proposed.bus_id")
+    departure_date = serializers.DateField(source="proposed.departure_date")
+    departure_time = serializers.TimeField(source="proposed.departure_time")
+    conflicts_with = serializers.SerializerMethodField()
+
+    def get_conflicts_with(self, obj):
+        return describe(obj.existing)
+
 
 class TripPricingSerializer(serializers.ModelSerializer):
     """
@@ -158,3 +286,18 @@ class TripPublicSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = ['id', 'route_name', 'departure_time', 'arrival_time', 'departure_date', 'base_fare', 'bus_registration', 'company_name', 'capacity']
+
+
+class TripSearchResultSerializer(serializers.ModelSerializer):
+    """
+    Trip search result served from the denormalized search index
+    """
+    id = serializers.IntegerField(source='trip_id', read_only=True)
+
+    class Meta:
+        model = TripSearchIndex
+        fields = [
+            'id', 'origin_city', 'destination_city', 'departure_at', 'departure_date',
+            'departure_time', 'arrival_time', 'company_name', 'bus_type',
+            'remaining_seats', 'min_fare',
+        ]
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from companies.models import Company, Bus, BusSeat
+from .models import Route, Trip, TripSearchIndex
+from . import search
+
+
+@receiver(post_save, sender=Trip)
+def refresh_trip_search_entry(sender, instance, **kwargs):
+    """
+    Keep the trip's search row in step with schedule, status and seat changes
+    """
+    search.schedule_refresh([instance.id])
+
+
+@receiver(post_save, sender=Route)
+def refresh_route_search_entries(sender, instance, **kwargs):
+    TripSearchIndex.objects.filter(route=instance).update(
+        origin_city=instance.origin_city,
+        destination_city=instance.destination_city,
+        origin_key=search.search_key(instance.origin_city),
+        destination_key=search.search_key(instance.destination_city),
+    )
+
+
+@receiver(post_save, sender=Company)
+def refresh_company_search_entries(sender, instance, **kwargs):
+    TripSearchIndex.objects.filter(company=instance).update(company_name=instance.name)
+
+
+@receiver(post_save, sender=Bus)
+def refresh_bus_search_entries(sender, instance, created, **kwargs):
+    if not created:
+        TripSearchIndex.objects.filter(bus=instance).update(bus_type=instance.bus_type)
+
+
+@receiver(post_save, sender=BusSeat)
+@receiver(post_delete, sender=BusSeat)
+def refresh_bus_seat_fares(sender, instance, **kwargs):
+    """
+    Seat price multipliers feed the minimum fare of every indexed trip on the bus
+    """
+    search.schedule_refresh(
+        TripSearchIndex.objects.filter(bus_id=instance.bus_id).values_list("trip_id", flat=True)
+    )
@@ -0,0 +1,42 @@
+"""
+Per-route trip statistics computed in the route query itself.
+
+``with_route_stats`` annotates a Route queryset with trip counts, the next
+departure and average occupancy, so listing routes is one grouped query
+instead of one or two COUNT queries per route.
+"""
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Trip
+
+
+def upcoming_trip_filter(today, prefix=""):
+    return Q(**{
+        f"{prefix}departure_date__gte": today,
+        f"{prefix}status": "SCHEDULED",
+    })
+
+
+def with_route_stats(routes, today=None):
+    """
+    Annotate ``routes`` with ``total_trips``, ``upcoming_trips``,
+    ``next_departure_date``/``next_departure_time`` and ``average_occupancy``
+    (percent of seats booked across non-cancelled trips).
+    """
+    today = today or timezone.now().date()
+    next_trip = Trip.objects.filter(
+        upcoming_trip_filter(today), route=OuterRef("pk")
+    ).order_by("departure_date", "departure_time")
+
+    return routes.annotate(
+        total_trips=Count("trips"),
+        upcoming_trips=Count("trips", filter=upcoming_trip_filter(today, "trips__")),
+        next_departure_date=Subquery(next_trip.values("departure_date")[:1]),
+        next_departure_time=Subquery(next_trip.values("departure_time")[:1]),
+        average_occupancy=Avg(
+            Cast(F("trips__booked_seats"), FloatField()) * 100 / F("trips__available_seats"),
+            filter=Q(trips__available_seats__gt=0) & ~Q(trips__status="CANCELLED"),
+        ),
+    )
@@ -0,0 +1,18 @@
+from celery import shared_task
+from . import manifests
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def pregenerate_trip_manifests():
+    """
+    Periodic task to build manifests for trips departing within the hour
+    """
+    try:
+        count = manifests.pregenerate_upcoming()
+        return f"Pre-generated manifests for {count} trips"
+    except Exception as e:
+        logger.error(f"Error pre-generating trip manifests: {e}")
+        return f"Error: {e}"
@@ -0,0 +1,138 @@
+"""
+Recurring timetables.
+
+A timetable describes the departures of one route on one bus: departure
+times, days of the week and a date range. ``expand`` turns it into unsaved
+Trip instances; ``generate`` checks them for bus conflicts with one query per
+bus and writes trips and their TripPricing rows with bulk inserts, instead of
+running ``Trip.save`` (validation, logging and a pricing lookup) per trip.
+"""
+import datetime
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import search
+from .models import Trip, TripPricing
+from .scheduling import find_conflicts, validate_times
+
+# Longest date range a single timetable may cover
+MAX_TIMETABLE_DAYS = 366
+ALL_WEEKDAYS = tuple(range(7))
+
+Timetable = namedtuple(
+    "Timetable",
+    ["route", "bus", "departure_times", "start_date", "end_date", "weekdays", "duration", "base_fare"],
+    defaults=(ALL_WEEKDAYS, None, None),
+)
+
+TimetableResult = namedtuple("TimetableResult", ["trips", "conflicts", "created"])
+
+
+def route_duration(route):
+    return datetime.timedelta(hours=float(route.estimated_duration_hours))
+
+
+def timetable_dates(timetable):
+    """Dates in the range that fall on one of the timetable's weekdays"""
+    weekdays = set(timetable.weekdays)
+    day = timetable.start_date
+    while day <= timetable.end_date:
+        if day.weekday() in weekdays:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def validate_timetable(company, timetable):
+    if timetable.route.company_id != company.id:
+        raise ValidationError("Route must belong to the same company as the trip")
+    if timetable.bus.company_id != company.id:
+        raise ValidationError("Bus must belong to the same company as the trip")
+    if timetable.end_date < timetable.start_date:
+        raise ValidationError("End date must be on or after the start date")
+    if (timetable.end_date - timetable.start_date).days >= MAX_TIMETABLE_DAYS:
+        raise ValidationError(f"A timetable can cover at most {MAX_TIMETABLE_DAYS} days")
+    duration = timetable.duration or route_duration(timetable.route)
+    if not datetime.timedelta(0) < duration < datetime.timedelta(days=1):
+        raise ValidationError("Trip duration must be between 1 minute and 24 hours")
+
+
+def expand(company, timetable):
+    """Unsaved Trip instances for every departure in ``timetable``"""
+    validate_timetable(company, timetable)
+    duration = timetable.duration or route_duration(timetable.route)
+    fare = timetable.base_fare if timetable.base_fare is not None else timetable.route.base_fare
+    trips = []
+    for day in timetable_dates(timetable):
+        for departure_time in sorted(timetable.departure_times):
+            arrival_time = (datetime.datetime.combine(day, departure_time) + duration).time()
+            validate_times(departure_time, arrival_time)
+            trips.append(Trip(
+                company=company,
+                route=timetable.route,
+                bus=timetable.bus,
+                departure_date=day,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                base_fare=fare,
+                available_seats=timetable.bus.total_seats,
+            ))
+    return trips
+
+
+def _pricing_for(trip):
+    # Same defaults Trip.save uses for new trips
+    return TripPricing(
+        trip=trip,
+        peak_season_multiplier=Decimal("1.00"),
+        demand_multiplier=Decimal("1.00"),
+        early_bird_discount=Decimal("0.00"),
+        early_bird_days=7,
+        final_base_fare=trip.base_fare,
+    )
+
+
+def generate(company, timetables, dry_run=False, skip_conflicts=False, batch_size=500):
+    """
+    Expand ``timetables`` and create their trips.
+
+    Trips that overlap an existing trip on the same bus (or another trip in
+    the request) are reported in ``conflicts``. Unless ``skip_conflicts`` is
+    set any conflict aborts the whole request; with it, only the conflicting
+    trips are left out. ``dry_run`` returns the preview without writing.
+    """
+    from companies.models import Bus
+
+    proposed = [trip for timetable in timetables for trip in expand(company, timetable)]
+    by_bus = defaultdict(list)
+    for trip in proposed:
+        by_bus[trip.bus_id].append(trip)
+
+    with transaction.atomic():
+        if not dry_run:
+            # Serialize concurrent schedule changes for the same buses
+            list(Bus.objects.select_for_update().filter(id__in=by_bus).values_list("id", flat=True))
+
+        conflicts = []
+        for bus_id, trips in by_bus.items():
+            conflicts.extend(find_conflicts(bus_id, trips))
+
+        if skip_conflicts:
+            rejected = {id(conflict.proposed) for conflict in conflicts}
+            trips = [trip for trip in proposed if id(trip) not in rejected]
+        else:
+            trips = proposed
+
+        if dry_run or (conflicts and not skip_conflicts) or not trips:
+            return TimetableResult(trips, conflicts, False)
+
+        # bulk_create bypasses Trip.save: pricing and the search index are
+        # written here instead
+        Trip.objects.bulk_create(trips, batch_size=batch_size)
+        TripPricing.objects.bulk_create([_pricing_for(trip) for trip in trips], batch_size=batch_size)
+        for start in range(0, len(trips), batch_size):
+            search.schedule_refresh(trip.pk for trip in trips[start:start + batch_size])
+
+    return TimetableResult(trips, conflicts, True)
@@ -1,7 +1,7 @@
 from django.urls import path #type:ignore
 from .views import (
     RouteListCreateView, RouteDetailView, TripListCreateView, TripDetailView,
-    TripManifestView, trip_dashboard_stats
+    TripManifestView, trip_manifests, trip_dashboard_stats, generate_timetable
 )
 from .views import TripListCreateAPIView, PublicTripListAPIView
 
@@ -15,6 +15,8 @@ urlpatterns = [
     path('', TripListCreateView.as_view(), name='company_trips'),
     path('<int:pk>/', TripDetailView.as_view(), name='company_trip_detail'),
     path('<int:trip_id>/manifest/', TripManifestView.as_view(), name='trip_manifest'),
+    path('manifests/', trip_manifests, name='trip_manifests'),
+    path('timetable/', generate_timetable, name='trip_timetable'),
     
     # Dashboard
     path('dashboard/stats/', trip_dashboard_stats, name='trip_dashboard_stats'),
@@ -6,7 +6,17 @@ from django.utils import timezone #type:ignore
 from django.db.models import Count, Sum, Q #type:ignore
 from .models import Route, Trip
 from .serializers import RouteSerializer, TripSerializer, TripManifestSerializer
+from .serializers import (
+    TimetableRequestSerializer, TimetableTripSerializer, TimetableConflictSerializer
+)
+from .timetable import generate as generate_timetable_trips
+from .stats import with_route_stats
+from . import manifests
+from django.http import HttpResponse #type:ignore
+from django.core.exceptions import ValidationError as DjangoValidationError #type:ignore
 from accounts.permissions import IsCompanyStaff, IsSameCompany
+from bookutu.pagination import KeysetPagination
+from bookutu import metrics
 from bookings.models import Booking
 from bookings.serializers import BookingSerializer
 from .models import Trip
@@ -22,7 +32,10 @@ class RouteListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsCompanyStaff]
     
     def get_queryset(self):
-        return Route.objects.filter(company=self.request.user.company)
+        # Grouped queries ignore Meta.ordering, so order explicitly
+        return with_route_stats(
+            Route.objects.filter(company=self.request.user.company)
+        ).order_by('origin_city', 'destination_city')
     
     def perform_create(self, serializer):
         serializer.save(company=self.request.user.company)
@@ -36,7 +49,7 @@ class RouteDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsCompanyStaff, IsSameCompany]
     
     def get_queryset(self):
-        return Route.objects.filter(company=self.request.user.company)
+        return with_route_stats(Route.objects.filter(company=self.request.user.company))
 
 
 class TripListCreateView(generics.ListCreateAPIView):
@@ -48,6 +61,8 @@ class TripListCreateView(generics.ListCreateAPIView):
     filterset_fields = ['status', 'departure_date', 'route']
     ordering_fields = ['departure_date', 'departure_time', 'created_at']
     ordering = ['departure_date', 'departure_time']
+    pagination_class = KeysetPagination
+    keyset_ordering = ['departure_date', 'departure_time', 'id']
     
     def get_queryset(self):
         return Trip.objects.filter(company=self.request.user.company)
@@ -79,77 +94,119 @@ class TripManifestView(APIView):
         except Trip.DoesNotExist:
             return Response({'error': 'Trip not found'}, status=404)
         
-        # Get all confirmed bookings for this trip
-        bookings = Booking.objects.filter(
-            trip=trip,
-            status='CONFIRMED'
-        ).select_related('seat', 'passenger').order_by('seat__row_number', 'seat__seat_number')
-        
-        passengers = []
-        total_revenue = 0
-        
-        for booking in bookings:
-            passengers.append({
-                'booking_reference': booking.booking_reference,
-                'passenger_name': booking.passenger_name,
-                'passenger_phone': booking.passenger_phone,
-                'seat_number': booking.seat.seat_number,
-                'seat_type': booking.seat.seat_type,
-                'amount_paid': booking.total_amount,
-                'booking_source': booking.source,
-                'created_at': booking.created_at
-            })
-            total_revenue += booking.total_amount
+        manifest = manifests.build_manifests(Trip.objects.filter(id=trip.id))[0]
         
         manifest_data = {
             'trip_id': trip.id,
             'trip_details': TripSerializer(trip).data,
-            'passengers': passengers,
-            'total_passengers': len(passengers),
-            'total_revenue': total_revenue
+            'passengers': manifest['passengers'],
+            'total_passengers': manifest['summary']['total_passengers'],
+            'total_revenue': manifest['summary']['total_revenue']
         }
         
         serializer = TripManifestSerializer(manifest_data)
         return Response(serializer.data)
 
 
+
+@api_view(['GET'])
+@permission_classes([IsCompanyStaff])
+def trip_manifests(request):
+    """
+    Manifests for every trip departing on a date, optionally from one terminal
+
+    Query params: ``date`` (YYYY-MM-DD, default today), ``terminal`` and
+    ``output`` (json, text for receipt printers, or pdf).
+    """
+    departure_date = request.query_params.get('date')
+    try:
+        departure_date = (
+            timezone.datetime.strptime(departure_date, '%Y-%m-%d').date()
+            if departure_date else timezone.localdate()
+        )
+    except ValueError:
+        return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+
+    output = request.query_params.get('output', 'json')
+    if output not in ('json', 'text', 'pdf'):
+        return Response({'error': 'output must be one of json, text, pdf'}, status=400)
+
+    terminal = request.query_params.get('terminal')
+    built = manifests.build_manifests(
+        manifests.trips_departing(request.user.company, departure_date, terminal)
+    )
+
+    if output == 'text':
+        return HttpResponse(
+            manifests.render_text(built), content_type='text/plain; charset=utf-8'
+        )
+    if output == 'pdf':
+        response = HttpResponse(manifests.render_pdf(built), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="manifests-{departure_date}.pdf"'
+        return response
+
+    return Response({
+        'date': departure_date,
+        'terminal': terminal,
+        'manifests': built,
+        'total_trips': len(built)
+    })
+
 @api_view(['GET'])
 @permission_classes([IsCompanyStaff])
 def trip_dashboard_stats(request):
     """
     Trip dashboard statistics
     """
-    company = request.user.company
-    today = timezone.now().date()
-    
+    company_stats = metrics.company_metrics(request.user.company_id)
     stats = {
-        'total_trips': Trip.objects.filter(company=company).count(),
-        'scheduled_trips': Trip.objects.filter(
-            company=company,
-            status='SCHEDULED',
-            departure_date__gte=today
-        ).count(),
-        'completed_trips': Trip.objects.filter(
-            company=company,
-            status='COMPLETED'
-        ).count(),
-        'cancelled_trips': Trip.objects.filter(
-            company=company,
-            status='CANCELLED'
-        ).count(),
-        'today_trips': Trip.objects.filter(
-            company=company,
-            departure_date=today
-        ).count(),
-        'active_routes': Route.objects.filter(
-            company=company,
-            is_active=True
-        ).count()
+        key: company_stats[key]
+        for key in (
+            'total_trips', 'scheduled_trips', 'completed_trips',
+            'cancelled_trips', 'today_trips', 'active_routes',
+        )
     }
-    
+
     return Response(stats)
 
 
+@api_view(['POST'])
+@permission_classes([IsCompanyStaff])
+def generate_timetable(request):
+    """
+    Generate trips from recurring timetables in one request.
+
+    Conflicting trips abort the request unless ``skip_conflicts`` is set;
+    ``dry_run`` returns the trips that would be created without saving them.
+    """
+    serializer = TimetableRequestSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+
+    dry_run = serializer.validated_data['dry_run']
+    skip_conflicts = serializer.validated_data['skip_conflicts']
+    try:
+        result = generate_timetable_trips(
+            request.user.company,
+            serializer.get_timetables(),
+            dry_run=dry_run,
+            skip_conflicts=skip_conflicts,
+        )
+    except DjangoValidationError as e:
+        return Response({'error': e.messages[0]}, status=400)
+
+    data = {
+        'dry_run': dry_run,
+        'created': result.created,
+        'trip_count': len(result.trips),
+        'trips': TimetableTripSerializer(result.trips, many=True).data,
+        'conflicts': TimetableConflictSerializer(result.conflicts, many=True).data,
+    }
+    if result.conflicts and not (dry_run or skip_conflicts):
+        data['error'] = 'Some trips conflict with the existing bus schedule'
+        return Response(data, status=409)
+    return Response(data, status=201 if result.created else 200)
+
+
 class TripListCreateAPIView(generics.ListCreateAPIView):
     queryset = Trip.objects.all().select_related('route', 'bus', 'company')
     serializer_class = TripSerializer